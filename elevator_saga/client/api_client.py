@@ -3,11 +3,13 @@
 Unified API Client for Elevator Saga
 使用统一数据模型的客户端API封装
 """
-import json
-import urllib.error
-import urllib.request
-from typing import Any, Dict, Optional
 
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Callable, Dict, MutableMapping, Optional
+
+from elevator_saga.client.state_mirror import DEFAULT_RESYNC_INTERVAL, StateMirror
+from elevator_saga.client.transport import DEFAULT_GET_TIMEOUT, DEFAULT_POST_TIMEOUT, Transport, create_transport
 from elevator_saga.core.models import (
     ElevatorState,
     FloorState,
@@ -21,15 +23,115 @@ from elevator_saga.core.models import (
 from elevator_saga.utils.debug import debug_log
 
 
+@dataclass
+class StateSnapshot:
+    """一次状态获取得到的快照，附带按ID建立的索引，供代理对象以字典查找的代价读取属性"""
+
+    state: SimulationState
+    elevators: Dict[int, ElevatorState]
+    floors: Dict[int, FloorState]
+    passengers: MutableMapping[int, PassengerInfo]
+
+    @classmethod
+    def build(cls, state: SimulationState) -> "StateSnapshot":
+        return cls(
+            state=state,
+            elevators={e.id: e for e in state.elevators},
+            floors={f.floor: f for f in state.floors},
+            passengers=state.passengers,
+        )
+
+
+def parse_state_response(response_data: Dict[str, Any]) -> SimulationState:
+    """将 /api/state 的响应解析为 SimulationState"""
+    # 直接使用服务端返回的真实数据创建SimulationState
+    elevators = [ElevatorState.from_dict(e) for e in response_data.get("elevators", [])]
+    floors = [FloorState.from_dict(f) for f in response_data.get("floors", [])]
+
+    # 使用服务端返回的passengers和metrics数据
+    passengers_data = response_data.get("passengers", {})
+    if isinstance(passengers_data, dict) and "completed" in passengers_data:
+        # 如果是PassengerSummary格式，则创建空的passengers字典
+        passengers: Dict[int, PassengerInfo] = {}
+    else:
+        # 如果是真实的passengers数据，则转换
+        passengers = {int(k): PassengerInfo.from_dict(v) for k, v in passengers_data.items() if isinstance(v, dict)}
+
+    # 使用服务端返回的metrics数据
+    metrics_data = response_data.get("metrics", {})
+    if metrics_data:
+        # 直接从字典创建PerformanceMetrics对象
+        metrics = PerformanceMetrics.from_dict(metrics_data)
+    else:
+        metrics = PerformanceMetrics()
+
+    simulation_state = SimulationState(
+        tick=response_data.get("tick", 0),
+        elevators=elevators,
+        floors=floors,
+        passengers=passengers,
+        metrics=metrics,
+        events=[],
+    )
+    return simulation_state
+
+
+def parse_step_response(response_data: Dict[str, Any]) -> StepResponse:
+    """将 /api/step 的响应解析为 StepResponse，跳过无法识别的事件类型"""
+    # 使用服务端返回的真实数据
+    events_data = response_data.get("events", [])
+    events = []
+    for event_data in events_data:
+        # 手动转换type字段从字符串到EventType枚举
+        event_dict = event_data.copy()
+        if "type" in event_dict and isinstance(event_dict["type"], str):
+            # 尝试将字符串转换为EventType枚举
+            try:
+                from elevator_saga.core.models import EventType
+
+                event_dict["type"] = EventType(event_dict["type"])
+            except ValueError:
+                debug_log(f"Unknown event type: {event_dict['type']}")
+                continue
+        events.append(SimulationEvent.from_dict(event_dict))
+
+    step_response = StepResponse(
+        success=True,
+        tick=response_data.get("tick", 0),
+        events=events,
+        checksum=response_data.get("checksum"),
+        server_time=response_data.get("server_time"),
+    )
+    return step_response
+
+
 class ElevatorAPIClient:
     """统一的电梯API客户端"""
 
-    def __init__(self, base_url: str):
+    def __init__(
+        self,
+        base_url: str,
+        transport: Optional[Transport] = None,
+        mirror_state: bool = False,
+        resync_interval: int = DEFAULT_RESYNC_INTERVAL,
+    ):
+        """
+        Args:
+            base_url: 服务器URL
+            transport: 传输层，默认按URL选择（unix:// 使用Unix域套接字，否则使用HTTP/1.1长连接池）
+            mirror_state: 是否启用本地状态镜像，启用后稳态下get_state由步进事件推演得到，不再请求服务端
+            resync_interval: 状态镜像的定期对账间隔（tick）
+        """
         self.base_url = base_url.rstrip("/")
+        self.transport = transport if transport is not None else create_transport(self.base_url)
+        self.mirror: Optional[StateMirror] = StateMirror(resync_interval) if mirror_state else None
         # 缓存相关字段
         self._cached_state: Optional[SimulationState] = None
+        self._snapshot: Optional[StateSnapshot] = None
         self._cached_tick: int = -1
         self._tick_processed: bool = False  # 标记当前tick是否已处理完成
+        # 请求耗时回调（参数为往返秒数），由控制器的耗时统计设置
+        self.request_observer: Optional[Callable[[float], None]] = None
         debug_log(f"API Client initialized for {self.base_url}")
 
     def get_state(self, force_reload: bool = False) -> SimulationState:
@@ -42,50 +144,45 @@ class ElevatorAPIClient:
         if not force_reload and self._cached_state is not None and not self._tick_processed:
             return self._cached_state
 
+        # 状态镜像可用时直接使用本地推演的状态
+        mirror = self.mirror
+        if not force_reload and mirror is not None and mirror.state is not None:
+            return self._set_cached_state(mirror.state)
+
+        # 传输层可以直接提供状态（例如共享内存）
+        simulation_state = self.transport.read_state()
+        if simulation_state is not None:
+            if mirror is not None:
+                mirror.load(simulation_state)
+            return self._set_cached_state(simulation_state)
+
         # debug_log(f"Fetching new state (force_reload={force_reload}, tick_processed={self._tick_processed})")
         response_data = self._send_get_request("/api/state")
         if "error" not in response_data:
-            # 直接使用服务端返回的真实数据创建SimulationState
-            elevators = [ElevatorState.from_dict(e) for e in response_data.get("elevators", [])]
-            floors = [FloorState.from_dict(f) for f in response_data.get("floors", [])]
-
-            # 使用服务端返回的passengers和metrics数据
-            passengers_data = response_data.get("passengers", {})
-            if isinstance(passengers_data, dict) and "completed" in passengers_data:
-                # 如果是PassengerSummary格式，则创建空的passengers字典
-                passengers: Dict[int, PassengerInfo] = {}
-            else:
-                # 如果是真实的passengers数据，则转换
-                passengers = {
-                    int(k): PassengerInfo.from_dict(v) for k, v in passengers_data.items() if isinstance(v, dict)
-                }
-
-            # 使用服务端返回的metrics数据
-            metrics_data = response_data.get("metrics", {})
-            if metrics_data:
-                # 直接从字典创建PerformanceMetrics对象
-                metrics = PerformanceMetrics.from_dict(metrics_data)
-            else:
-                metrics = PerformanceMetrics()
-
-            simulation_state = SimulationState(
-                tick=response_data.get("tick", 0),
-                elevators=elevators,
-                floors=floors,
-                passengers=passengers,
-                metrics=metrics,
-                events=[],
-            )
-
-            # 更新缓存
-            self._cached_state = simulation_state
-            self._cached_tick = simulation_state.tick
-            self._tick_processed = False  # 重置处理标志，表示新tick开始
-
-            return simulation_state
+            simulation_state = parse_state_response(response_data)
+            if mirror is not None:
+                mirror.load(simulation_state)
+            return self._set_cached_state(simulation_state)
         else:
             raise RuntimeError(f"Failed to get state: {response_data.get('error')}")
 
+    def _set_cached_state(self, simulation_state: SimulationState) -> SimulationState:
+        """更新缓存"""
+        self._cached_state = simulation_state
+        self._snapshot = StateSnapshot.build(simulation_state)
+        self._cached_tick = simulation_state.tick
+        self._tick_processed = False  # 重置处理标志，表示新tick开始
+        return simulation_state
+
+    def get_snapshot(self) -> StateSnapshot:
+        """获取当前tick的索引快照，与get_state共用缓存"""
+        snapshot = self._snapshot
+        if snapshot is None or self._tick_processed:
+            self.get_state()
+            snapshot = self._snapshot
+            assert snapshot is not None
+        return snapshot
+
     def mark_tick_processed(self) -> None:
         """标记当前tick处理完成，使缓存在下次get_state时失效"""
         self._tick_processed = True
@@ -95,28 +192,9 @@ class ElevatorAPIClient:
         response_data = self._send_post_request("/api/step", {"ticks": ticks})
 
         if "error" not in response_data:
-            # 使用服务端返回的真实数据
-            events_data = response_data.get("events", [])
-            events = []
-            for event_data in events_data:
-                # 手动转换type字段从字符串到EventType枚举
-                event_dict = event_data.copy()
-                if "type" in event_dict and isinstance(event_dict["type"], str):
-                    # 尝试将字符串转换为EventType枚举
-                    try:
-                        from elevator_saga.core.models import EventType
-
-                        event_dict["type"] = EventType(event_dict["type"])
-                    except ValueError:
-                        debug_log(f"Unknown event type: {event_dict['type']}")
-                        continue
-                events.append(SimulationEvent.from_dict(event_dict))
-
-            step_response = StepResponse(
-                success=True,
-                tick=response_data.get("tick", 0),
-                events=events,
-            )
+            step_response = parse_step_response(response_data)
+            if self.mirror is not None:
+                self.mirror.apply_step(step_response)
 
             # debug_log(f"Step response: tick={step_response.tick}, events={len(events)}")
             return step_response
@@ -133,6 +211,8 @@ class ElevatorAPIClient:
         response_data = self._send_post_request(endpoint, command.parameters)
 
         if response_data.get("success"):
+            if self.mirror is not None:
+                self.mirror.record_command(command.elevator_id, command.floor, command.immediate)
             return bool(response_data["success"])
         else:
             raise RuntimeError(f"Command failed: {response_data.get('error_message')}")
@@ -157,16 +237,7 @@ class ElevatorAPIClient:
 
     def _send_get_request(self, endpoint: str) -> Dict[str, Any]:
         """发送GET请求"""
-        url = f"{self.base_url}{endpoint}"
-        # debug_log(f"GET {url}")
-
-        try:
-            with urllib.request.urlopen(url, timeout=60) as response:
-                data: Dict[str, Any] = json.loads(response.read().decode("utf-8"))
-                # debug_log(f"GET {url} -> {response.status}")
-                return data
-        except urllib.error.URLError as e:
-            raise RuntimeError(f"GET {url} failed: {e}")
+        return self._request("GET", endpoint, None, DEFAULT_GET_TIMEOUT)
 
     def reset(self) -> bool:
         """重置模拟"""
@@ -176,8 +247,11 @@ class ElevatorAPIClient:
             if success:
                 # 清空缓存，因为状态已重置
                 self._cached_state = None
+                self._snapshot = None
                 self._cached_tick = -1
                 self._tick_processed = False
+                if self.mirror is not None:
+                    self.mirror.invalidate()
                 debug_log("Cache cleared after reset")
             return success
         except Exception as e:
@@ -192,8 +266,11 @@ class ElevatorAPIClient:
             if success:
                 # 清空缓存，因为流量文件已切换，状态会改变
                 self._cached_state = None
+                self._snapshot = None
                 self._cached_tick = -1
                 self._tick_processed = False
+                if self.mirror is not None:
+                    self.mirror.invalidate()
                 debug_log("Cache cleared after traffic round switch")
             return success
         except Exception as e:
@@ -205,6 +282,9 @@ class ElevatorAPIClient:
         try:
             response_data = self._send_get_request("/api/traffic/info")
             if "error" not in response_data:
+                if self.mirror is not None:
+                    # 镜像需要知道最大时长，以推演服务端在结束时强制完成剩余乘客
+                    self.mirror.max_duration_ticks = int(response_data.get("max_tick", 0))
                 return response_data
             else:
                 debug_log(f"Get traffic info failed: {response_data.get('error')}")
@@ -213,19 +293,62 @@ class ElevatorAPIClient:
             debug_log(f"Get traffic info failed: {e}")
             return None
 
-    def _send_post_request(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
-        """发送POST请求"""
-        url = f"{self.base_url}{endpoint}"
-        request_body = json.dumps(data).encode("utf-8")
+    def start_recording(
+        self,
+        name: Optional[str] = None,
+        keyframe_interval: Optional[int] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        在服务端开始录制（录制目录位于服务端的 recordings 目录下）
 
-        # debug_log(f"POST {url} with data: {data}")
+        Args:
+            name: 录制名称，默认按时间生成
+            keyframe_interval: 关键帧间隔，默认使用服务端默认值
+            metadata: 写入 manifest 的附加信息
 
-        req = urllib.request.Request(url, data=request_body, headers={"Content-Type": "application/json"})
+        Returns:
+            录制状态（包含录制目录），失败时返回None
+        """
+        data: Dict[str, Any] = {}
+        if name:
+            data["name"] = name
+        if keyframe_interval is not None:
+            data["keyframe_interval"] = keyframe_interval
+        if metadata:
+            data["metadata"] = metadata
+        return self._recording_request("/api/recording/start", data)
+
+    def stop_recording(self) -> Optional[Dict[str, Any]]:
+        """结束服务端录制并等待写入完成，返回录制目录、场景数和帧数，失败时返回None"""
+        return self._recording_request("/api/recording/stop", {})
+
+    def _recording_request(self, endpoint: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            response_data = self._send_post_request(endpoint, data)
+        except Exception as e:
+            debug_log(f"Recording request {endpoint} failed: {e}")
+            return None
+        if "error" in response_data:
+            debug_log(f"Recording request {endpoint} failed: {response_data['error']}")
+            return None
+        return response_data
 
+    def _send_post_request(self, endpoint: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        """发送POST请求"""
+        return self._request("POST", endpoint, data, DEFAULT_POST_TIMEOUT)
+
+    def _request(self, method: str, endpoint: str, data: Optional[Dict[str, Any]], timeout: float) -> Dict[str, Any]:
+        """通过传输层发送请求，设置了 request_observer 时报告往返耗时"""
+        observer = self.request_observer
+        if observer is None:
+            return self.transport.request(method, endpoint, data, timeout=timeout)
+        start = perf_counter()
         try:
-            with urllib.request.urlopen(req, timeout=600) as response:
-                response_data: Dict[str, Any] = json.loads(response.read().decode("utf-8"))
-                # debug_log(f"POST {url} -> {response.status}")
-                return response_data
-        except urllib.error.URLError as e:
-            raise RuntimeError(f"POST {url} failed: {e}")
+            return self.transport.request(method, endpoint, data, timeout=timeout)
+        finally:
+            observer(perf_counter() - start)
+
+    def close(self) -> None:
+        """关闭传输层持有的连接"""
+        self.transport.close()
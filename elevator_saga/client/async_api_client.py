@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Asyncio API Client for Elevator Saga
+基于 asyncio 流的电梯API客户端：所有请求在同一个HTTP/1.1长连接上流水线发送，
+一个tick内的 go_to_floor 命令、步进和下一tick的状态获取只需要一次网络往返
+"""
+
+import asyncio
+import json
+import urllib.parse
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from elevator_saga.client.api_client import StateSnapshot, parse_state_response, parse_step_response
+from elevator_saga.client.state_mirror import DEFAULT_RESYNC_INTERVAL, StateMirror
+from elevator_saga.client.transport import DEFAULT_CONNECT_TIMEOUT, DEFAULT_POST_TIMEOUT
+from elevator_saga.core.models import GoToFloorCommand, SimulationState, StepResponse
+from elevator_saga.utils.debug import debug_log
+
+
+class PipelinedHTTPConnection:
+    """
+    单个HTTP/1.1流水线连接
+
+    请求写出后立即返回一个 Future，不等待响应；后台读取任务按发送顺序逐个解析响应并完成对应的 Future。
+    服务端（KeepAliveRequestHandler）按顺序处理同一连接上的请求，因此先写出的请求先执行
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        unix_socket: Optional[str] = None,
+    ):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self.unix_socket = unix_socket
+        self.address = f"unix://{unix_socket}" if unix_socket else f"http://{host}:{port}"
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._read_task: Optional["asyncio.Task[None]"] = None
+        self._pending: Deque[Tuple[str, "asyncio.Future[Dict[str, Any]]"]] = deque()
+        self._has_data = asyncio.Event()
+        self.connections_opened = 0
+
+    @property
+    def connected(self) -> bool:
+        """连接是否可用（服务端关闭空闲连接后 reader 会收到EOF）"""
+        if self._writer is None or self._writer.is_closing():
+            return False
+        return self._reader is not None and not self._reader.at_eof()
+
+    async def connect(self) -> None:
+        """建立连接并启动响应读取任务"""
+        if self.unix_socket:
+            opening = asyncio.open_unix_connection(self.unix_socket)
+        else:
+            opening = asyncio.open_connection(self.host, self.port)
+        try:
+            reader, writer = await asyncio.wait_for(opening, self.connect_timeout)
+        except (OSError, asyncio.TimeoutError) as e:
+            raise RuntimeError(f"Cannot connect to {self.address}: {e!r}")
+        self._reader, self._writer = reader, writer
+        self.connections_opened += 1
+        self._read_task = asyncio.get_running_loop().create_task(self._read_responses(reader))
+
+    def send(self, method: str, path: str, data: Optional[Dict[str, Any]] = None) -> "asyncio.Future[Dict[str, Any]]":
+        """写出一个请求，返回其响应的 Future（必须先 connect）"""
+        if not self.connected:
+            raise RuntimeError(f"{method} {path}: connection to {self.address} is closed")
+        assert self._writer is not None
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}"]
+        body = b""
+        if method != "GET":
+            body = json.dumps(data or {}).encode("utf-8")
+            lines.append("Content-Type: application/json")
+            lines.append(f"Content-Length: {len(body)}")
+        head = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+        self._writer.write(head + body)
+
+        future: "asyncio.Future[Dict[str, Any]]" = asyncio.get_running_loop().create_future()
+        self._pending.append((f"{method} {path}", future))
+        self._has_data.set()
+        return future
+
+    async def _read_responses(self, reader: asyncio.StreamReader) -> None:
+        """按顺序读取响应，直到连接关闭"""
+        try:
+            while True:
+                await self._has_data.wait()
+                if not self._pending:
+                    self._has_data.clear()
+                    continue
+                label, future = self._pending[0]
+                status, payload, will_close = await self._read_response(reader)
+                self._pending.popleft()
+                if future.done():
+                    continue
+                if status >= 400:
+                    future.set_exception(
+                        RuntimeError(f"{label} failed: HTTP {status} {payload[:200].decode('utf-8', 'replace')}")
+                    )
+                else:
+                    future.set_result(json.loads(payload.decode("utf-8")))
+                if will_close:
+                    raise ConnectionResetError("server closed the connection")
+        except asyncio.CancelledError:
+            self._fail_pending(RuntimeError("connection closed"))
+            raise
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            self._fail_pending(RuntimeError(f"connection to {self.address} lost: {e!r}"))
+            if self._writer is not None:
+                self._writer.close()
+
+    @staticmethod
+    async def _read_response(reader: asyncio.StreamReader) -> Tuple[int, bytes, bool]:
+        """读取一个响应，返回 (状态码, 响应体, 是否将关闭连接)"""
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("server closed the connection")
+        parts = status_line.decode("latin-1").split(" ", 2)
+        status = int(parts[1])
+        content_length: Optional[int] = None
+        will_close = False
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            key = key.strip().lower()
+            if key == "content-length":
+                content_length = int(value.strip())
+            elif key == "connection" and value.strip().lower() == "close":
+                will_close = True
+        if content_length is None:
+            # 没有长度的响应以关闭连接结束
+            return status, await reader.read(), True
+        return status, await reader.readexactly(content_length), will_close
+
+    def _fail_pending(self, error: Exception) -> None:
+        while self._pending:
+            _, future = self._pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+    async def close(self) -> None:
+        """关闭连接，未完成的请求以 RuntimeError 结束"""
+        if self._read_task is not None:
+            self._read_task.cancel()
+            try:
+                await self._read_task
+            except asyncio.CancelledError:
+                pass
+            self._read_task = None
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except OSError:
+                pass
+            self._writer = None
+        self._fail_pending(RuntimeError("connection closed"))
+
+
+class AsyncElevatorAPIClient:
+    """
+    异步电梯API客户端
+
+    go_to_floor 只写出请求、不等待响应，可以在同步回调中直接调用；
+    命令的响应在下一次 step_and_fetch 时与步进、状态请求一起收取
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        mirror_state: bool = False,
+        resync_interval: int = DEFAULT_RESYNC_INTERVAL,
+        timeout: float = DEFAULT_POST_TIMEOUT,
+    ):
+        """
+        Args:
+            base_url: 服务器URL（http://host:port 或 unix:///path/to/socket）
+            mirror_state: 是否启用本地状态镜像，启用后稳态下每个tick只需要一个步进请求
+            resync_interval: 状态镜像的定期对账间隔（tick）
+            timeout: 单次往返的超时（秒）
+        """
+        self.base_url = base_url.rstrip("/")
+        if self.base_url.startswith("unix://"):
+            self._path_prefix = ""
+            self.connection = PipelinedHTTPConnection("localhost", 0, unix_socket=self.base_url[len("unix://") :])
+        else:
+            parts = urllib.parse.urlsplit(self.base_url)
+            if parts.scheme != "http":
+                raise ValueError(f"AsyncElevatorAPIClient only supports http:// and unix:// URLs, got {base_url!r}")
+            self._path_prefix = parts.path
+            self.connection = PipelinedHTTPConnection(parts.hostname or "127.0.0.1", parts.port or 80)
+        self.timeout = timeout
+        self.mirror: Optional[StateMirror] = StateMirror(resync_interval) if mirror_state else None
+        self._snapshot: Optional[StateSnapshot] = None
+        self._cached_state: Optional[SimulationState] = None
+        self._pending_commands: List[Tuple[GoToFloorCommand, "asyncio.Future[Dict[str, Any]]"]] = []
+        debug_log(f"Async API Client initialized for {self.base_url}")
+
+    async def _ensure_connected(self) -> None:
+        if not self.connection.connected:
+            await self.connection.close()
+            await self.connection.connect()
+
+    async def _request(self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        await self._ensure_connected()
+        future = self.connection.send(method, self._path_prefix + endpoint, data)
+        return await self._wait(future, f"{method} {endpoint}")
+
+    async def _wait(self, future: "asyncio.Future[Dict[str, Any]]", label: str) -> Dict[str, Any]:
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+        except asyncio.TimeoutError:
+            # 流水线上的后续响应已无法对应，只能放弃整个连接
+            await self.connection.close()
+            raise RuntimeError(f"{label} timed out after {self.timeout}s")
+
+    def _set_state(self, simulation_state: SimulationState) -> SimulationState:
+        self._cached_state = simulation_state
+        self._snapshot = StateSnapshot.build(simulation_state)
+        return simulation_state
+
+    async def get_state(self, force_reload: bool = False) -> SimulationState:
+        """获取模拟状态；未强制重载时返回本tick已获取的状态"""
+        if not force_reload and self._cached_state is not None:
+            return self._cached_state
+        await self._flush_commands()
+        response_data = await self._request("GET", "/api/state")
+        if "error" in response_data:
+            raise RuntimeError(f"Failed to get state: {response_data.get('error')}")
+        simulation_state = parse_state_response(response_data)
+        if self.mirror is not None:
+            self.mirror.load(simulation_state)
+        return self._set_state(simulation_state)
+
+    def get_snapshot(self) -> StateSnapshot:
+        """获取当前tick的索引快照（供代理对象同步读取属性）"""
+        if self._snapshot is None:
+            raise RuntimeError("State has not been fetched yet; await get_state() first")
+        return self._snapshot
+
+    def go_to_floor(self, elevator_id: int, floor: int, immediate: bool = False) -> bool:
+        """写出 go_to_floor 请求并立即返回，响应在下一次步进时收取"""
+        command = GoToFloorCommand(elevator_id=elevator_id, floor=floor, immediate=immediate)
+        debug_log(f"Sending elevator command: {command.command_type} to elevator {elevator_id} To:F{floor}")
+        if not self.connection.connected:
+            debug_log(f"Go to floor failed: not connected to {self.base_url}")
+            return False
+        endpoint = f"{self._path_prefix}/api/elevators/{elevator_id}/go_to_floor"
+        self._pending_commands.append((command, self.connection.send("POST", endpoint, command.parameters)))
+        if self.mirror is not None:
+            self.mirror.record_command(elevator_id, floor, immediate)
+        return True
+
+    async def _flush_commands(self) -> None:
+        """收取已写出命令的响应，失败的命令只记录日志（与同步客户端的 go_to_floor 一致）"""
+        commands, self._pending_commands = self._pending_commands, []
+        for command, future in commands:
+            try:
+                response_data = await self._wait(future, "go_to_floor")
+                if not response_data.get("success"):
+                    debug_log(f"Go to floor failed: {response_data.get('error')}")
+            except RuntimeError as e:
+                debug_log(f"Go to floor E{command.elevator_id} F{command.floor} failed: {e}")
+
+    async def step_and_fetch(self, ticks: int = 1) -> Tuple[StepResponse, SimulationState]:
+        """
+        步进并获取步进后的状态
+
+        已写出的命令、步进请求和状态请求在同一连接上流水线发送，只等待一次往返；
+        状态镜像可用时不再请求状态
+        """
+        await self._ensure_connected()
+        mirror = self.mirror
+        step_future = self.connection.send("POST", f"{self._path_prefix}/api/step", {"ticks": ticks})
+        state_future = None
+        if mirror is None or mirror.state is None:
+            state_future = self.connection.send("GET", f"{self._path_prefix}/api/state")
+
+        await self._flush_commands()
+        step_data = await self._wait(step_future, "POST /api/step")
+        if "error" in step_data:
+            raise RuntimeError(f"Step failed: {step_data.get('error')}")
+        step_response = parse_step_response(step_data)
+
+        if state_future is not None:
+            state_data = await self._wait(state_future, "GET /api/state")
+            if "error" in state_data:
+                raise RuntimeError(f"Failed to get state: {state_data.get('error')}")
+            simulation_state = parse_state_response(state_data)
+            if mirror is not None:
+                mirror.load(simulation_state)
+            return step_response, self._set_state(simulation_state)
+
+        assert mirror is not None
+        if mirror.apply_step(step_response) and mirror.state is not None:
+            return step_response, self._set_state(mirror.state)
+        self._cached_state = None
+        return step_response, await self.get_state()
+
+    async def reset(self) -> bool:
+        """重置模拟"""
+        try:
+            await self._flush_commands()
+            response_data = await self._request("POST", "/api/reset", {})
+        except RuntimeError as e:
+            debug_log(f"Reset failed: {e}")
+            return False
+        success = bool(response_data.get("success", False))
+        if success:
+            self._invalidate()
+        return success
+
+    async def next_traffic_round(self, full_reset: bool = False) -> bool:
+        """切换到下一个流量文件"""
+        try:
+            await self._flush_commands()
+            response_data = await self._request("POST", "/api/traffic/next", {"full_reset": full_reset})
+        except RuntimeError as e:
+            debug_log(f"Next traffic round failed: {e}")
+            return False
+        success = bool(response_data.get("success", False))
+        if success:
+            self._invalidate()
+        return success
+
+    async def get_traffic_info(self) -> Optional[Dict[str, Any]]:
+        """获取当前流量文件信息"""
+        try:
+            response_data = await self._request("GET", "/api/traffic/info")
+        except RuntimeError as e:
+            debug_log(f"Get traffic info failed: {e}")
+            return None
+        if "error" in response_data:
+            debug_log(f"Get traffic info failed: {response_data.get('error')}")
+            return None
+        if self.mirror is not None:
+            self.mirror.max_duration_ticks = int(response_data.get("max_tick", 0))
+        return response_data
+
+    async def start_recording(
+        self,
+        name: Optional[str] = None,
+        keyframe_interval: Optional[int] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """在服务端开始录制，参数与 ElevatorAPIClient.start_recording 相同"""
+        data: Dict[str, Any] = {}
+        if name:
+            data["name"] = name
+        if keyframe_interval is not None:
+            data["keyframe_interval"] = keyframe_interval
+        if metadata:
+            data["metadata"] = metadata
+        return await self._recording_request("/api/recording/start", data)
+
+    async def stop_recording(self) -> Optional[Dict[str, Any]]:
+        """结束服务端录制并等待写入完成"""
+        return await self._recording_request("/api/recording/stop", {})
+
+    async def _recording_request(self, endpoint: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        try:
+            await self._flush_commands()
+            response_data = await self._request("POST", endpoint, data)
+        except RuntimeError as e:
+            debug_log(f"Recording request {endpoint} failed: {e}")
+            return None
+        if "error" in response_data:
+            debug_log(f"Recording request {endpoint} failed: {response_data['error']}")
+            return None
+        return response_data
+
+    def _invalidate(self) -> None:
+        """清空缓存，因为服务端状态已重置或切换"""
+        self._cached_state = None
+        self._snapshot = None
+        if self.mirror is not None:
+            self.mirror.invalidate()
+
+    async def close(self) -> None:
+        """收取未完成的命令响应并关闭连接"""
+        if self.connection.connected:
+            await self._flush_commands()
+        await self.connection.close()
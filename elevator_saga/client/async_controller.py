@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Asyncio Elevator Controller
+基于 asyncio 的电梯调度控制器：回调既可以是普通函数也可以是协程，
+每个tick的命令、步进和状态获取流水线发送；多个控制器可以在同一个事件循环中并发驱动多个模拟
+"""
+
+import asyncio
+import inspect
+from pprint import pprint
+from typing import Any, Callable, Iterable, List, Optional
+
+from elevator_saga.client.async_api_client import AsyncElevatorAPIClient
+from elevator_saga.client.base_controller import ElevatorController, group_events_by_type
+from elevator_saga.client.proxy_models import ProxyRegistry
+from elevator_saga.utils.debug import debug_log
+
+
+async def _maybe_await(result: Any) -> Any:
+    """回调返回协程（或其他可等待对象）时等待其完成"""
+    if inspect.isawaitable(result):
+        return await result
+    return result
+
+
+class AsyncElevatorController(ElevatorController):
+    """
+    异步电梯调度控制器基类
+
+    回调接口与 ElevatorController 相同，子类可以把任意回调实现为 async def。
+    代理对象的属性读取和 go_to_floor 仍是同步调用：属性来自本tick已获取的状态，
+    go_to_floor 只写出请求，响应在下一次步进时一并收取
+    """
+
+    api_client: AsyncElevatorAPIClient  # type: ignore[assignment]
+
+    def __init__(
+        self,
+        server_url: str = "http://127.0.0.1:8000",
+        debug: bool = False,
+        mirror_state: bool = False,
+        record: Optional[str] = None,
+    ):
+        """
+        初始化控制器
+
+        Args:
+            server_url: 服务器URL
+            debug: 是否启用debug模式
+            mirror_state: 是否在客户端维护由事件推演的状态镜像，稳态下每个tick只需要一个步进请求
+            record: 服务端录制名称，与 ElevatorController 相同
+        """
+        super().__init__(server_url, debug, record=record)
+        self.api_client = AsyncElevatorAPIClient(server_url, mirror_state=mirror_state)
+        self.proxies = ProxyRegistry(self.api_client)  # type: ignore[arg-type]
+
+    def start(self) -> None:
+        """在新的事件循环中启动控制器"""
+        asyncio.run(self.run())
+
+    async def run(self) -> None:
+        """启动控制器（在已有事件循环中使用）"""
+        # 基类钩子标注为 -> None，子类可以覆盖为协程函数
+        on_start: Callable[[], Any] = self.on_start
+        await _maybe_await(on_start())
+        self.is_running = True
+        if self.record is not None:
+            self._report_recording(await self.api_client.start_recording(self.record))
+
+        try:
+            await self._run_async_simulation()
+        except KeyboardInterrupt:
+            print("\n用户中断了算法运行")
+        except Exception as e:
+            print(f"算法运行出错: {e}")
+            raise
+        finally:
+            self.is_running = False
+            if self.record is not None:
+                self._report_recording(await self.api_client.stop_recording())
+            await self.api_client.close()
+            on_stop: Callable[[], Any] = self.on_stop
+            await _maybe_await(on_stop())
+
+    async def _run_async_simulation(self) -> None:
+        """运行事件驱动的模拟"""
+        client = self.api_client
+        state = await client.get_state()
+        if state.tick > 0:
+            print("模拟器可能已经开始了一次模拟，执行重置...")
+            await client.reset()
+            await asyncio.sleep(0.3)
+            return await self._run_async_simulation()
+        self._update_wrappers(state, init=True)
+
+        await self._update_traffic_info_async()
+        if self.current_traffic_max_tick == 0:
+            print("模拟器接收到的最大tick时间为0，可能所有的测试案例已用完，请求重置...")
+            await client.next_traffic_round(full_reset=True)
+            await asyncio.sleep(0.3)
+            return await self._run_async_simulation()
+
+        await self._internal_init_async()
+        while self.is_running:
+            if self.current_tick >= self.current_traffic_max_tick:
+                break
+
+            # 上一tick回调中写出的命令、本次步进和步进后的状态在一次往返中完成
+            step_response, state = await client.step_and_fetch(1)
+            self.current_tick = step_response.tick
+            events = step_response.events
+            self._update_wrappers(state)
+
+            await _maybe_await(self.on_event_execute_start(self.current_tick, events, self.elevators, self.floors))
+            if self.uses_tick_api:
+                on_tick: Callable[..., Any] = self.on_tick
+                await _maybe_await(on_tick(self.current_tick, group_events_by_type(events)))
+            else:
+                for event in events:
+                    await _maybe_await(self._handle_single_event(event))
+            await _maybe_await(self.on_event_execute_end(self.current_tick, events, self.elevators, self.floors))
+
+            if self.current_tick >= self.current_traffic_max_tick:
+                pprint(state.metrics.to_dict())
+                if not await client.next_traffic_round():
+                    break
+                await self._reset_and_reinit_async()
+
+    async def _internal_init_async(self) -> None:
+        """内部初始化方法"""
+        self.current_tick = 0
+        await _maybe_await(self.on_init(self.elevators, self.floors))
+
+    async def _update_traffic_info_async(self) -> None:
+        """更新当前流量文件信息"""
+        traffic_info = await self.api_client.get_traffic_info()
+        if traffic_info:
+            self.current_traffic_max_tick = int(traffic_info["max_tick"])
+            debug_log(f"Updated traffic info - max_tick: {self.current_traffic_max_tick}")
+        else:
+            debug_log("Failed to get traffic info")
+            self.current_traffic_max_tick = 0
+
+    async def _reset_and_reinit_async(self) -> None:
+        """重置并重新初始化"""
+        await self.api_client.reset()
+        self.current_tick = 0
+        state = await self.api_client.get_state()
+        self._update_wrappers(state)
+        self.proxies.clear_passengers()
+        await self._update_traffic_info_async()
+        await self._internal_init_async()
+
+
+async def run_controllers(controllers: Iterable[AsyncElevatorController]) -> List[Any]:
+    """在当前事件循环中并发运行多个控制器（各自连接不同的模拟服务器），返回每个控制器的结果或异常"""
+    return await asyncio.gather(*(controller.run() for controller in controllers), return_exceptions=True)
+
+
+def run_concurrently(controllers: Iterable[AsyncElevatorController]) -> List[Any]:
+    """在新的事件循环中并发运行多个控制器，一个控制器出错不会中断其他控制器"""
+    return asyncio.run(run_controllers(controllers))
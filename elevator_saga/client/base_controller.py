@@ -3,19 +3,43 @@
 Elevator Controller Base Class
 电梯调度基础控制器类 - 提供面向对象的算法开发接口
 """
+
 import os
 import time
 from abc import ABC, abstractmethod
 from pprint import pprint
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, List, Optional
 
 from elevator_saga.client.api_client import ElevatorAPIClient
-from elevator_saga.client.proxy_models import ProxyElevator, ProxyFloor, ProxyPassenger
+from elevator_saga.client.instrumentation import EVENT_CALLBACK_NAMES, ControllerProfiler, call_untimed
+from elevator_saga.client.proxy_models import ProxyElevator, ProxyFloor, ProxyPassenger, ProxyRegistry
+from elevator_saga.client.transport import Transport
 from elevator_saga.core.models import EventType, SimulationEvent, SimulationState
 
 # 避免循环导入，使用运行时导入
 from elevator_saga.utils.debug import debug_log
 
+# 事件类型到路由方法的映射，路由方法从事件数据构造代理对象并调用对应的逐事件回调
+EVENT_ROUTES: Dict[EventType, str] = {
+    EventType.UP_BUTTON_PRESSED: "_route_passenger_call",
+    EventType.DOWN_BUTTON_PRESSED: "_route_passenger_call",
+    EventType.STOPPED_AT_FLOOR: "_route_elevator_stopped",
+    EventType.IDLE: "_route_elevator_idle",
+    EventType.PASSING_FLOOR: "_route_passing_floor",
+    EventType.ELEVATOR_APPROACHING: "_route_elevator_approaching",
+    EventType.PASSENGER_BOARD: "_route_passenger_board",
+    EventType.PASSENGER_ALIGHT: "_route_passenger_alight",
+    EventType.ELEVATOR_MOVE: "_route_elevator_move",
+}
+
+
+def group_events_by_type(events: List[SimulationEvent]) -> Dict[EventType, List[SimulationEvent]]:
+    """按事件类型分组，组内保持发生顺序；只包含本tick出现过的类型"""
+    events_by_type: Dict[EventType, List[SimulationEvent]] = {}
+    for event in events:
+        events_by_type.setdefault(event.type, []).append(event)
+    return events_by_type
+
 
 class ElevatorController(ABC):
     """
@@ -24,13 +48,25 @@ class ElevatorController(ABC):
     用户通过继承此类并实现 abstract 方法来创建自己的调度算法
     """
 
-    def __init__(self, server_url: str = "http://127.0.0.1:8000", debug: bool = False):
+    def __init__(
+        self,
+        server_url: str = "http://127.0.0.1:8000",
+        debug: bool = False,
+        mirror_state: bool = False,
+        transport: Optional[Transport] = None,
+        profile: bool = False,
+        record: Optional[str] = None,
+    ):
         """
         初始化控制器
 
         Args:
-            server_url: 服务器URL
+            server_url: 服务器URL（http://host:port 或 unix:///path/to/socket）
             debug: 是否启用debug模式
+            mirror_state: 是否在客户端维护由事件推演的状态镜像，减少每个tick的状态请求
+            transport: 自定义传输层（例如 SharedMemoryTransport），默认按URL选择
+            profile: 是否统计回调、步进和状态获取的耗时，并在每轮流量结束时输出报告
+            record: 服务端录制名称，设置后由服务端直接录制本次运行（空字符串表示按时间命名），结束时停止录制
         """
         self.server_url = server_url
         self.debug = debug
@@ -39,9 +75,25 @@ class ElevatorController(ABC):
         self.current_tick = 0
         self.is_running = False
         self.current_traffic_max_tick: int = 0
+        self.record = record
 
         # 初始化API客户端
-        self.api_client = ElevatorAPIClient(server_url)
+        self.api_client = ElevatorAPIClient(server_url, transport=transport, mirror_state=mirror_state)
+        # 每个ID对应唯一的代理对象，事件回调中拿到的代理与 self.elevators / self.floors 中的是同一个实例
+        self.proxies = ProxyRegistry(self.api_client)
+        # 事件类型 -> 绑定的路由方法
+        self._event_router: Dict[EventType, Callable[[SimulationEvent], Any]] = {
+            event_type: getattr(self, route) for event_type, route in EVENT_ROUTES.items()
+        }
+        # 子类覆盖了 on_tick 时按tick批量分发事件，否则逐事件调用回调
+        self.uses_tick_api = type(self).on_tick is not ElevatorController.on_tick
+
+        # 耗时统计，未启用时回调和客户端操作直接调用
+        self.profiler: Optional[ControllerProfiler] = None
+        self._call_client = call_untimed
+        self._call_callback = call_untimed
+        if profile:
+            self.enable_profiling()
 
     @abstractmethod
     def on_init(self, elevators: List[Any], floors: List[Any]) -> None:
@@ -187,6 +239,20 @@ class ElevatorController(ABC):
         """
         pass
 
+    def on_tick(self, tick: int, events_by_type: Dict[EventType, List[SimulationEvent]]) -> None:
+        """
+        按tick批量处理事件的回调 - 可选实现
+
+        覆盖此方法后，每个tick只调用一次 on_tick，不再自动调用 on_passenger_call 等逐事件回调，
+        控制器可以一次看到本tick的全部呼叫并统一分配；仍需逐事件回调时调用 self.dispatch_events(events)。
+        on_event_execute_start / on_event_execute_end 照常在其前后调用
+
+        Args:
+            tick: 当前时间tick
+            events_by_type: 按事件类型分组的本tick事件，组内保持发生顺序，只包含出现过的类型
+        """
+        pass
+
     def _internal_init(self, elevators: List[Any], floors: List[Any]) -> None:
         """内部初始化方法"""
         self.elevators = elevators
@@ -202,6 +268,8 @@ class ElevatorController(ABC):
         """
         self.on_start()
         self.is_running = True
+        if self.record is not None:
+            self._report_recording(self.api_client.start_recording(self.record))
 
         try:
             self._run_event_driven_simulation()
@@ -212,8 +280,29 @@ class ElevatorController(ABC):
             raise
         finally:
             self.is_running = False
+            if self.record is not None:
+                self._report_recording(self.api_client.stop_recording())
+            self.api_client.close()
             self.on_stop()
 
+    def _report_recording(self, status: Optional[Dict[str, Any]]) -> None:
+        """输出服务端录制状态"""
+        if status is None:
+            print("服务端录制请求失败，本次运行不会被录制")
+        elif status.get("recording"):
+            print(f"服务端正在录制到 {status['directory']}")
+        elif "directory" in status:
+            print(f"服务端录制完成: {status['directory']}（{status['scenarios']}个场景，{status['frames']}帧）")
+
+    def enable_profiling(self) -> ControllerProfiler:
+        """启用耗时统计，返回统计对象"""
+        if self.profiler is None:
+            self.profiler = ControllerProfiler()
+            self.api_client.request_observer = self.profiler.record_request
+            self._call_client = self.profiler.time_call
+            self._call_callback = self.profiler.time_callback
+        return self.profiler
+
     def stop(self) -> None:
         """停止控制器"""
         self.is_running = False
@@ -262,35 +351,58 @@ class ElevatorController(ABC):
                     break
 
                 # 执行一个tick的模拟，从1开始
-                step_response = self.api_client.step(1)
+                step_response = self._call_client("step", self.api_client.step, 1)
                 # 更新当前状态
                 self.current_tick = step_response.tick
                 # 获取事件列表
                 events = step_response.events
 
                 # 获取当前状态
-                state = self.api_client.get_state()
+                state = self._call_client("get_state", self.api_client.get_state)
                 self._update_wrappers(state)
 
                 # 事件执行前回调
-                self.on_event_execute_start(self.current_tick, events, self.elevators, self.floors)
+                self._call_callback(
+                    "on_event_execute_start",
+                    self.on_event_execute_start,
+                    self.current_tick,
+                    events,
+                    self.elevators,
+                    self.floors,
+                )
 
                 # 处理事件
-                if events:
+                if self.uses_tick_api:
+                    self._call_callback("on_tick", self.on_tick, self.current_tick, group_events_by_type(events))
+                elif events:
                     for event in events:
-                        self._handle_single_event(event)
+                        callback_name = EVENT_CALLBACK_NAMES.get(event.type, event.type.value)
+                        self._call_callback(callback_name, self._handle_single_event, event)
 
                 # 获取更新后的状态
-                state = self.api_client.get_state()
+                state = self._call_client("get_state", self.api_client.get_state)
                 self._update_wrappers(state)
 
                 # 事件执行后回调
-                self.on_event_execute_end(self.current_tick, events, self.elevators, self.floors)
+                self._call_callback(
+                    "on_event_execute_end",
+                    self.on_event_execute_end,
+                    self.current_tick,
+                    events,
+                    self.elevators,
+                    self.floors,
+                )
                 # 标记tick处理完成，使API客户端缓存失效
                 self.api_client.mark_tick_processed()
+                if self.profiler is not None:
+                    self.profiler.record_server_time(step_response.server_time)
+                    self.profiler.end_tick()
                 # 检查是否需要切换流量文件
                 if self.current_tick >= self.current_traffic_max_tick:
                     pprint(state.metrics.to_dict())
+                    if self.profiler is not None:
+                        pprint(self.profiler.report(), sort_dicts=False)
+                        self.profiler.reset()
                     if not self.api_client.next_traffic_round():
                         break
                     # 重置并重新初始化
@@ -307,13 +419,13 @@ class ElevatorController(ABC):
         if len(self.elevators) != len(state.elevators):
             if not init:
                 raise ValueError(f"Elevator number mismatch: {len(self.elevators)} != {len(state.elevators)}")
-            self.elevators = [ProxyElevator(elevator_state.id, self.api_client) for elevator_state in state.elevators]
+            self.elevators = [self.proxies.elevator(elevator_state.id) for elevator_state in state.elevators]
 
         # 检查楼层数量是否发生变化，只有变化时才重新创建
         if len(self.floors) != len(state.floors):
             if not init:
                 raise ValueError(f"Floor number mismatch: {len(self.floors)} != {len(state.floors)}")
-            self.floors = [ProxyFloor(floor_state.floor, self.api_client) for floor_state in state.floors]
+            self.floors = [self.proxies.floor(floor_state.floor) for floor_state in state.floors]
 
     def _update_traffic_info(self) -> None:
         """更新当前流量文件信息"""
@@ -329,89 +441,85 @@ class ElevatorController(ABC):
             debug_log(f"Error updating traffic info: {e}")
             self.current_traffic_max_tick = 0
 
-    def _handle_single_event(self, event: SimulationEvent) -> None:
-        """处理单个事件"""
-        if event.type == EventType.UP_BUTTON_PRESSED:
-            floor_id = event.data["floor"]
-            passenger_id = event.data["passenger"]
-            if floor_id is not None:
-                floor_proxy = ProxyFloor(floor_id, self.api_client)
-                passenger_proxy = ProxyPassenger(passenger_id, self.api_client)
-                self.on_passenger_call(passenger_proxy, floor_proxy, "up")
-
-        elif event.type == EventType.DOWN_BUTTON_PRESSED:
-            floor_id = event.data["floor"]
-            passenger_id = event.data["passenger"]
-            if floor_id is not None:
-                floor_proxy = ProxyFloor(floor_id, self.api_client)
-                passenger_proxy = ProxyPassenger(passenger_id, self.api_client)
-                self.on_passenger_call(passenger_proxy, floor_proxy, "down")
-
-        elif event.type == EventType.STOPPED_AT_FLOOR:
-            elevator_id = event.data.get("elevator")
-            floor_id = event.data["floor"]
-            if elevator_id is not None and floor_id is not None:
-                elevator_proxy = ProxyElevator(elevator_id, self.api_client)
-                floor_proxy = ProxyFloor(floor_id, self.api_client)
-                self.on_elevator_stopped(elevator_proxy, floor_proxy)
-
-        elif event.type == EventType.IDLE:
-            elevator_id = event.data.get("elevator")
-            if elevator_id is not None:
-                elevator_proxy = ProxyElevator(elevator_id, self.api_client)
-                self.on_elevator_idle(elevator_proxy)
-
-        elif event.type == EventType.PASSING_FLOOR:
-            elevator_id = event.data.get("elevator")
-            floor_id = event.data["floor"]
-            direction = event.data.get("direction")
-            if elevator_id is not None and floor_id is not None and direction is not None:
-                elevator_proxy = ProxyElevator(elevator_id, self.api_client)
-                floor_proxy = ProxyFloor(floor_id, self.api_client)
-                self.on_elevator_passing_floor(elevator_proxy, floor_proxy, direction)
-
-        elif event.type == EventType.ELEVATOR_APPROACHING:
-            elevator_id = event.data.get("elevator")
-            floor_id = event.data["floor"]
-            direction = event.data.get("direction")
-            if elevator_id is not None and floor_id is not None and direction is not None:
-                elevator_proxy = ProxyElevator(elevator_id, self.api_client)
-                floor_proxy = ProxyFloor(floor_id, self.api_client)
-                self.on_elevator_approaching(elevator_proxy, floor_proxy, direction)
-
-        elif event.type == EventType.PASSENGER_BOARD:
-            elevator_id = event.data.get("elevator")
-            passenger_id = event.data.get("passenger")
-            if elevator_id is not None and passenger_id is not None:
-                elevator_proxy = ProxyElevator(elevator_id, self.api_client)
-                passenger_proxy = ProxyPassenger(passenger_id, self.api_client)
-                self.on_passenger_board(elevator_proxy, passenger_proxy)
-
-        elif event.type == EventType.PASSENGER_ALIGHT:
-            elevator_id = event.data.get("elevator")
-            passenger_id = event.data.get("passenger")
-            floor_id = event.data["floor"]
-            if elevator_id is not None and passenger_id is not None and floor_id is not None:
-                elevator_proxy = ProxyElevator(elevator_id, self.api_client)
-                passenger_proxy = ProxyPassenger(passenger_id, self.api_client)
-                floor_proxy = ProxyFloor(floor_id, self.api_client)
-                self.on_passenger_alight(elevator_proxy, passenger_proxy, floor_proxy)
-
-        elif event.type == EventType.ELEVATOR_MOVE:
-            elevator_id = event.data.get("elevator")
-            from_position = event.data.get("from_position")
-            to_position = event.data.get("to_position")
-            direction = event.data.get("direction")
-            status = event.data.get("status")
-            if (
-                elevator_id is not None
-                and from_position is not None
-                and to_position is not None
-                and direction is not None
-                and status is not None
-            ):
-                elevator_proxy = ProxyElevator(elevator_id, self.api_client)
-                self.on_elevator_move(elevator_proxy, from_position, to_position, direction, status)
+    def dispatch_events(self, events: List[SimulationEvent]) -> List[Any]:
+        """按发生顺序把事件路由到逐事件回调（on_passenger_call 等），供覆盖了 on_tick 的控制器调用，返回各回调的返回值"""
+        return [self._handle_single_event(event) for event in events]
+
+    def _handle_single_event(self, event: SimulationEvent) -> Any:
+        """处理单个事件，返回对应回调的返回值（异步控制器的回调可能返回协程）"""
+        handler = self._event_router.get(event.type)
+        if handler is None:
+            return None
+        return handler(event)
+
+    # ==================== 事件路由 ====================
+
+    def _route_passenger_call(self, event: SimulationEvent) -> Any:
+        floor_id = event.data["floor"]
+        passenger_id = event.data["passenger"]
+        if floor_id is None:
+            return None
+        direction = "up" if event.type == EventType.UP_BUTTON_PRESSED else "down"
+        return self.on_passenger_call(self.proxies.passenger(passenger_id), self.proxies.floor(floor_id), direction)
+
+    def _route_elevator_stopped(self, event: SimulationEvent) -> Any:
+        elevator_id = event.data.get("elevator")
+        floor_id = event.data["floor"]
+        if elevator_id is None or floor_id is None:
+            return None
+        return self.on_elevator_stopped(self.proxies.elevator(elevator_id), self.proxies.floor(floor_id))
+
+    def _route_elevator_idle(self, event: SimulationEvent) -> Any:
+        elevator_id = event.data.get("elevator")
+        if elevator_id is None:
+            return None
+        return self.on_elevator_idle(self.proxies.elevator(elevator_id))
+
+    def _route_passing_floor(self, event: SimulationEvent) -> Any:
+        elevator_id = event.data.get("elevator")
+        floor_id = event.data["floor"]
+        direction = event.data.get("direction")
+        if elevator_id is None or floor_id is None or direction is None:
+            return None
+        return self.on_elevator_passing_floor(
+            self.proxies.elevator(elevator_id), self.proxies.floor(floor_id), direction
+        )
+
+    def _route_elevator_approaching(self, event: SimulationEvent) -> Any:
+        elevator_id = event.data.get("elevator")
+        floor_id = event.data["floor"]
+        direction = event.data.get("direction")
+        if elevator_id is None or floor_id is None or direction is None:
+            return None
+        return self.on_elevator_approaching(self.proxies.elevator(elevator_id), self.proxies.floor(floor_id), direction)
+
+    def _route_passenger_board(self, event: SimulationEvent) -> Any:
+        elevator_id = event.data.get("elevator")
+        passenger_id = event.data.get("passenger")
+        if elevator_id is None or passenger_id is None:
+            return None
+        return self.on_passenger_board(self.proxies.elevator(elevator_id), self.proxies.passenger(passenger_id))
+
+    def _route_passenger_alight(self, event: SimulationEvent) -> Any:
+        elevator_id = event.data.get("elevator")
+        passenger_id = event.data.get("passenger")
+        floor_id = event.data["floor"]
+        if elevator_id is None or passenger_id is None or floor_id is None:
+            return None
+        return self.on_passenger_alight(
+            self.proxies.elevator(elevator_id), self.proxies.passenger(passenger_id), self.proxies.floor(floor_id)
+        )
+
+    def _route_elevator_move(self, event: SimulationEvent) -> Any:
+        data = event.data
+        elevator_id = data.get("elevator")
+        from_position = data.get("from_position")
+        to_position = data.get("to_position")
+        direction = data.get("direction")
+        status = data.get("status")
+        if elevator_id is None or from_position is None or to_position is None or direction is None or status is None:
+            return None
+        return self.on_elevator_move(self.proxies.elevator(elevator_id), from_position, to_position, direction, status)
 
     def _reset_and_reinit(self) -> None:
         """重置并重新初始化"""
@@ -422,6 +530,8 @@ class ElevatorController(ABC):
             # 获取新的初始状态
             state = self.api_client.get_state()
             self._update_wrappers(state)
+            # 新一轮流量的乘客ID从头开始，丢弃上一轮的乘客代理；电梯和楼层代理保持不变
+            self.proxies.clear_passengers()
 
             # 更新流量信息（切换到新流量文件后需要重新获取最大tick）
             self._update_traffic_info()
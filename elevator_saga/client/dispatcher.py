@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Cost-Matrix Dispatcher
+基于代价矩阵的呼叫分配：每个tick把电梯和待分配呼叫各读取一次，构造 电梯×呼叫 的NumPy代价矩阵，
+一次向量化计算完成贪心或匈牙利（最小代价匹配）分配，分配代价不随 电梯数×呼叫数 的代理读取增长
+"""
+from dataclasses import dataclass
+from typing import Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from elevator_saga.core.models import Direction, EventType, SimulationEvent
+
+# 方向编码：上行 1，下行 -1，停止 0
+_DIRECTION_SIGN = {Direction.UP: 1, Direction.DOWN: -1, Direction.STOPPED: 0}
+
+# 匈牙利算法中代替无穷大代价的有限值
+_INFEASIBLE = 1e12
+
+
+@dataclass
+class DispatchWeights:
+    """代价函数的权重（代价越小越好）"""
+
+    load_penalty: float = 0.3  # 基础代价 = 距离 × (1 + 载客率 × load_penalty)
+    idle_factor: float = 0.7  # 空闲电梯
+    on_the_way_factor: float = 0.4  # 同向且呼叫楼层在前方
+    behind_factor: float = 2.0  # 同向但已经过呼叫楼层
+    reverse_factor: float = 1.5  # 反向运行的空载电梯
+    reverse_max_distance: int = 2  # 反向电梯只考虑此距离以内的呼叫
+
+
+@dataclass
+class ElevatorArrays:
+    """电梯特征，每部电梯一行"""
+
+    floor: np.ndarray  # 当前楼层
+    direction: np.ndarray  # 上一tick的运行方向（1 / -1 / 0）
+    load: np.ndarray  # 车内乘客数
+    capacity: np.ndarray  # 最大载客量
+
+    @classmethod
+    def from_elevators(cls, elevators: Sequence[object]) -> "ElevatorArrays":
+        """从电梯代理对象（或 ElevatorState）构造，每部电梯只读取一次"""
+        count = len(elevators)
+        floor = np.empty(count, dtype=np.int64)
+        direction = np.empty(count, dtype=np.int64)
+        load = np.empty(count, dtype=np.int64)
+        capacity = np.empty(count, dtype=np.int64)
+        for index, elevator in enumerate(elevators):
+            floor[index] = elevator.current_floor  # type: ignore[attr-defined]
+            direction[index] = _DIRECTION_SIGN[elevator.last_tick_direction]  # type: ignore[attr-defined]
+            load[index] = len(elevator.passengers)  # type: ignore[attr-defined]
+            capacity[index] = elevator.max_capacity  # type: ignore[attr-defined]
+        return cls(floor, direction, load, capacity)
+
+
+@dataclass
+class CallArrays:
+    """呼叫特征，每个呼叫一列"""
+
+    passenger: np.ndarray  # 乘客ID
+    floor: np.ndarray  # 呼叫楼层
+    direction: np.ndarray  # 呼叫方向（1 / -1）
+
+    @classmethod
+    def from_events(cls, events: Iterable[SimulationEvent]) -> "CallArrays":
+        """从本tick的按钮事件构造，不需要读取任何代理"""
+        calls = [
+            (event.data["passenger"], event.data["floor"], 1 if event.type == EventType.UP_BUTTON_PRESSED else -1)
+            for event in events
+            if event.type in (EventType.UP_BUTTON_PRESSED, EventType.DOWN_BUTTON_PRESSED)
+        ]
+        return cls.from_tuples(calls)
+
+    @classmethod
+    def from_tuples(cls, calls: Sequence[Tuple[int, int, int]]) -> "CallArrays":
+        """从 (乘客ID, 楼层, 方向) 元组构造"""
+        if not calls:
+            empty = np.empty(0, dtype=np.int64)
+            return cls(empty, empty.copy(), empty.copy())
+        table = np.asarray(calls, dtype=np.int64).reshape(-1, 3)
+        return cls(table[:, 0], table[:, 1], table[:, 2])
+
+    def __len__(self) -> int:
+        return len(self.passenger)
+
+
+class CostMatrixDispatcher:
+    """
+    代价矩阵调度器
+
+    - cost_matrix: 电梯×呼叫 的代价，综合距离、方向是否顺路和载客率；不可分配的组合为 inf
+    - assign: greedy 为每个呼叫独立选择代价最小的电梯（同一电梯可接多个呼叫）；
+      hungarian 求一对一的最小总代价匹配（每部电梯本轮最多分配一个呼叫）
+    """
+
+    METHODS = ("greedy", "hungarian")
+
+    def __init__(self, method: str = "greedy", weights: Optional[DispatchWeights] = None):
+        if method not in self.METHODS:
+            raise ValueError(f"Unknown dispatch method: {method}, expected one of {self.METHODS}")
+        self.method = method
+        self.weights = weights if weights is not None else DispatchWeights()
+
+    def cost_matrix(self, elevators: ElevatorArrays, calls: CallArrays) -> np.ndarray:
+        """计算 电梯×呼叫 的代价矩阵"""
+        weights = self.weights
+        elevator_floor = elevators.floor[:, None]
+        elevator_direction = elevators.direction[:, None]
+        load = elevators.load[:, None]
+
+        distance = np.abs(elevator_floor - calls.floor[None, :])
+        load_factor = load / elevators.capacity[:, None]
+        base = distance * (1 + load_factor * weights.load_penalty)
+
+        idle = elevator_direction == 0
+        same_direction = elevator_direction == calls.direction[None, :]
+        ahead = np.where(elevator_direction > 0, elevator_floor <= calls.floor, elevator_floor >= calls.floor)
+        reverse_ok = (distance <= weights.reverse_max_distance) & (load == 0)
+
+        cost: np.ndarray = np.select(
+            [idle, same_direction & ahead, same_direction, reverse_ok],
+            [
+                base * weights.idle_factor,
+                base * weights.on_the_way_factor,
+                base * weights.behind_factor,
+                base * weights.reverse_factor,
+            ],
+            default=np.inf,
+        )
+        cost[elevators.load >= elevators.capacity] = np.inf
+        return cost
+
+    def assign(self, elevators: ElevatorArrays, calls: CallArrays) -> List[Tuple[int, int, float]]:
+        """
+        分配呼叫
+
+        Returns:
+            (电梯下标, 呼叫下标, 代价) 列表，按呼叫下标排序；没有可行电梯的呼叫不出现在结果中
+        """
+        if len(calls) == 0 or len(elevators.floor) == 0:
+            return []
+        return self.solve(self.cost_matrix(elevators, calls))
+
+    def solve(self, cost: np.ndarray) -> List[Tuple[int, int, float]]:
+        """按配置的方法求解任意代价矩阵（行为电梯，列为任务）"""
+        if cost.size == 0:
+            return []
+        if self.method == "greedy":
+            rows = np.argmin(cost, axis=0)
+            columns = np.arange(cost.shape[1])
+        else:
+            rows, columns = linear_assignment(cost)
+        costs = cost[rows, columns]
+        keep = np.isfinite(costs)
+        order = np.argsort(columns[keep], kind="stable")
+        return list(zip(rows[keep][order].tolist(), columns[keep][order].tolist(), costs[keep][order].tolist()))
+
+
+def sequential_greedy(cost: np.ndarray, rows: Optional[Iterable[int]] = None) -> List[Tuple[int, int, float]]:
+    """
+    按行顺序依次为每行选择剩余列中代价最小的一列（每列最多分配一次）
+
+    Args:
+        cost: 代价矩阵
+        rows: 参与分配的行及其顺序，默认全部行
+
+    Returns:
+        (行, 列, 代价) 列表
+    """
+    available = np.ones(cost.shape[1], dtype=bool)
+    result: List[Tuple[int, int, float]] = []
+    for row in range(cost.shape[0]) if rows is None else rows:
+        if not available.any():
+            break
+        masked = np.where(available, cost[row], np.inf)
+        column = int(np.argmin(masked))
+        if np.isfinite(masked[column]):
+            available[column] = False
+            result.append((row, column, float(masked[column])))
+    return result
+
+
+def linear_assignment(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    最小代价一对一匹配（匈牙利算法，势函数版本，内层按列向量化，O(n²m)）
+
+    inf 代价按极大的有限值参与计算，调用方应丢弃代价为 inf 的匹配
+
+    Returns:
+        (行下标数组, 列下标数组)，匹配数为 min(行数, 列数)
+    """
+    matrix = np.where(np.isfinite(cost), cost, _INFEASIBLE).astype(np.float64)
+    transposed = matrix.shape[0] > matrix.shape[1]
+    if transposed:
+        matrix = matrix.T
+    n, m = matrix.shape
+
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    match = np.zeros(m + 1, dtype=np.int64)  # match[j]: 列j匹配的行（从1开始，0表示未匹配）
+    way = np.zeros(m + 1, dtype=np.int64)
+    for i in range(1, n + 1):
+        match[0] = i
+        j0 = 0
+        min_v = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            reduced = matrix[i0 - 1] - u[i0] - v[1:]
+            free = ~used[1:]
+            improve = free & (reduced < min_v[1:])
+            min_v[1:][improve] = reduced[improve]
+            way[1:][improve] = j0
+            candidates = np.where(free, min_v[1:], np.inf)
+            j1 = int(np.argmin(candidates)) + 1
+            delta = candidates[j1 - 1]
+            used_columns = np.flatnonzero(used)
+            u[match[used_columns]] += delta
+            v[used_columns] -= delta
+            min_v[1:][free] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+
+    columns = np.flatnonzero(match[1:]) + 1
+    rows = match[columns] - 1
+    columns = columns - 1
+    if transposed:
+        rows, columns = columns, rows
+    order = np.argsort(rows)
+    return rows[order], columns[order]
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Exact ETA Oracle
+按模拟器的运动模型精确计算电梯到达某层所需的tick数：启动1单位、匀速2单位、减速1单位，每层10个单位。
+运动只取决于运行状态、相对目标的楼层差和层内位置，预先对全部相对状态推演一次生成查找表，查询时只需查表
+"""
+from typing import Any, Dict, List, Optional, Sequence, Tuple, cast
+
+import numpy as np
+
+from elevator_saga.core.models import ElevatorStatus, Position
+
+# 运行状态编码（查找表第一维）
+STATUS_INDEX: Dict[ElevatorStatus, int] = {
+    ElevatorStatus.STOPPED: 0,
+    ElevatorStatus.START_UP: 1,
+    ElevatorStatus.CONSTANT_SPEED: 2,
+    ElevatorStatus.START_DOWN: 3,
+}
+_STOPPED, _START_UP, _CONSTANT_SPEED, _START_DOWN = range(4)
+_SPEED = (0, 1, 2, 1)
+
+# 层内位置 floor_up_position 的取值范围为 -9..9
+_POSITION_OFFSET = 9
+_POSITION_SPAN = 19
+
+# 无法到站（模拟器中越过目标后停在层间、目标方向为停止的电梯不会再移动）
+UNREACHABLE = -1
+
+_State = Tuple[int, int, int]  # (运行状态, 当前楼层 - 目标楼层, 层内位置)
+
+
+def _retarget_status(status: int, distance: int) -> int:
+    """设置新目标时的加减速修正，与服务端 _set_elevator_target_floor 相同"""
+    if distance == 1:
+        return _START_DOWN if status == _CONSTANT_SPEED else status
+    return _CONSTANT_SPEED if status == _START_DOWN else status
+
+
+def _advance(state: _State) -> _State:
+    """推演一个tick（目标楼层为相对坐标0层，没有排队的下一目标），与服务端 _update_elevator_status + _move_elevators 相同"""
+    status, floor, position = state
+    # 目标方向只比较整数楼层，与 ElevatorState.target_floor_direction 相同
+    direction = -1 if floor > 0 else (1 if floor < 0 else 0)
+
+    if direction != 0:
+        if status == _STOPPED:
+            status = _START_UP
+        elif status == _START_UP:
+            status = _CONSTANT_SPEED
+
+    speed = _SPEED[status]
+    if speed == 0:
+        return status, floor, position
+
+    position += direction * speed
+    while position >= 10:
+        floor += 1
+        position -= 10
+    while position <= -10:
+        floor -= 1
+        position += 10
+
+    if status == _CONSTANT_SPEED and abs(floor * 10 + position) == 1:
+        status = _START_DOWN
+    if floor == 0 and position == 0:
+        # 到站停靠
+        status = _STOPPED
+    return status, floor, position
+
+
+class EtaTables:
+    """
+    运动模型查找表，下标均为 [运行状态, 当前楼层 - 目标楼层 + max_floor_delta, 层内位置 + 9]
+
+    - reach_ticks / reach_status / reach_position: 推演到整数楼层首次等于目标楼层（目标方向变为停止）
+      所需的tick数及那时的运行状态和层内位置。此时服务端会在下一tick开始时采用排队的下一目标
+    - ticks: 到站停靠所需的tick数，无法到达为 UNREACHABLE（越过目标后停在层间的电梯不会再移动）
+    """
+
+    def __init__(self, max_floor_delta: int):
+        self.max_floor_delta = max_floor_delta
+        shape = (len(STATUS_INDEX), 2 * max_floor_delta + 1, _POSITION_SPAN)
+        self.reach_ticks = np.full(shape, -1, dtype=np.int64)
+        self.reach_status = np.zeros(shape, dtype=np.int64)
+        self.reach_position = np.zeros(shape, dtype=np.int64)
+        for status in range(shape[0]):
+            for floor in range(-max_floor_delta, max_floor_delta + 1):
+                for position in range(-_POSITION_OFFSET, _POSITION_OFFSET + 1):
+                    self._fill_reach((status, floor, position))
+
+        # 到达目标楼层后：停靠状态且位于整层为已到站；仍在运行且位于整层会在下一tick停靠；停在层间则不会再移动
+        final_status, final_position = self.reach_status, self.reach_position
+        remaining = np.where(final_position != 0, UNREACHABLE, np.where(final_status == _STOPPED, 0, 1))
+        self.ticks = np.where(remaining == UNREACHABLE, UNREACHABLE, self.reach_ticks + remaining)
+
+    def index(self, state: _State) -> Tuple[int, int, int]:
+        return state[0], state[1] + self.max_floor_delta, state[2] + _POSITION_OFFSET
+
+    def _fill_reach(self, start: _State) -> None:
+        """沿确定的转移链推演到目标楼层，并为链上所有状态记录结果"""
+        start_index = self.index(start)
+        if self.reach_ticks[start_index] >= 0:
+            return
+        if start[1] == 0:
+            self.reach_ticks[start_index] = 0
+            self.reach_status[start_index] = start[0]
+            self.reach_position[start_index] = start[2]
+            return
+        path: List[_State] = []
+        state = start
+        while state[1] != 0 and self.reach_ticks[self.index(state)] < 0:
+            path.append(state)
+            state = _advance(state)
+        index = self.index(state)
+        if state[1] == 0:
+            ticks, status, position = 0, state[0], state[2]
+        else:
+            ticks, status, position = (
+                int(self.reach_ticks[index]),
+                int(self.reach_status[index]),
+                int(self.reach_position[index]),
+            )
+        for ticks_before, visited in enumerate(reversed(path), start=1):
+            visited_index = self.index(visited)
+            self.reach_ticks[visited_index] = ticks + ticks_before
+            self.reach_status[visited_index] = status
+            self.reach_position[visited_index] = position
+
+
+def _elevator_position(elevator: Any) -> Position:
+    """读取电梯位置（兼容尚未从字典转换的 ElevatorState）"""
+    position = elevator.position
+    if isinstance(position, dict):
+        return Position.from_dict(position)
+    return cast(Position, position)
+
+
+class EtaOracle:
+    """
+    电梯到达时间查询
+
+    - ticks_to_floor: 立即改为前往该层（go_to_floor(floor, immediate=True)）时的到站tick数
+    - ticks_to_target: 按当前目标继续运行的到站tick数
+    - ticks_via_target: 先完成当前目标再前往该层（go_to_floor(floor)）时的到站tick数
+    - eta_matrix: 全部电梯×各楼层的 ticks_to_floor，向量化查表
+
+    tick数从下一次步进开始计，第n次步进后停靠在该层返回n；已停在该层返回0；无法到达返回None（矩阵中为inf）
+    """
+
+    def __init__(self, num_floors: int = 1):
+        self.tables = EtaTables(max(num_floors - 1, 0))
+
+    def ensure_floors(self, num_floors: int) -> None:
+        """确保查找表覆盖指定的楼层数"""
+        if num_floors - 1 > self.tables.max_floor_delta:
+            self.tables = EtaTables(num_floors - 1)
+
+    def _ticks(self, status: int, floor_delta: int, floor_up_position: int) -> Optional[int]:
+        self.ensure_floors(abs(floor_delta) + 1)
+        ticks = int(self.tables.ticks[self.tables.index((status, floor_delta, floor_up_position))])
+        return None if ticks == UNREACHABLE else ticks
+
+    def _retarget_ticks(self, status: int, current_floor: int, floor_up_position: int, floor: int) -> Optional[int]:
+        """改为前往 floor（含加减速修正）后的到站tick数"""
+        distance = abs(floor * 10 - (current_floor * 10 + floor_up_position))
+        return self._ticks(_retarget_status(status, distance), current_floor - floor, floor_up_position)
+
+    def ticks_to_floor(self, elevator: Any, floor: int) -> Optional[int]:
+        """立即改为前往 floor 时的到站tick数"""
+        position = _elevator_position(elevator)
+        return self._retarget_ticks(
+            STATUS_INDEX[elevator.run_status], position.current_floor, position.floor_up_position, floor
+        )
+
+    def ticks_to_target(self, elevator: Any) -> Optional[int]:
+        """按当前目标继续运行的到站tick数"""
+        position = _elevator_position(elevator)
+        return self._ticks(
+            STATUS_INDEX[elevator.run_status],
+            position.current_floor - position.target_floor,
+            position.floor_up_position,
+        )
+
+    def ticks_via_target(self, elevator: Any, floor: int) -> Optional[int]:
+        """先完成当前目标、再前往 floor 的到站tick数（服务端在目标方向变为停止后采用排队的下一目标）"""
+        position = _elevator_position(elevator)
+        self.ensure_floors(abs(position.current_floor - position.target_floor) + 1)
+        tables = self.tables
+        index = tables.index(
+            (
+                STATUS_INDEX[elevator.run_status],
+                position.current_floor - position.target_floor,
+                position.floor_up_position,
+            )
+        )
+        onward = self._retarget_ticks(
+            int(tables.reach_status[index]), position.target_floor, int(tables.reach_position[index]), floor
+        )
+        return None if onward is None else int(tables.reach_ticks[index]) + onward
+
+    def eta_matrix(self, elevators: Sequence[Any], floors: Optional[Sequence[int]] = None) -> np.ndarray:
+        """
+        全部电梯立即前往各楼层的到站tick数
+
+        Args:
+            elevators: 电梯代理对象或 ElevatorState，每部只读取一次
+            floors: 目标楼层，默认 0..max_floor_delta
+
+        Returns:
+            形状为 (电梯数, 楼层数) 的浮点数组，无法到达为 inf
+        """
+        count = len(elevators)
+        status = np.empty(count, dtype=np.int64)
+        current = np.empty(count, dtype=np.int64)
+        offset = np.empty(count, dtype=np.int64)
+        for index, elevator in enumerate(elevators):
+            position = _elevator_position(elevator)
+            status[index] = STATUS_INDEX[elevator.run_status]
+            current[index] = position.current_floor
+            offset[index] = position.floor_up_position
+        targets = np.arange(self.tables.max_floor_delta + 1) if floors is None else np.asarray(floors, dtype=np.int64)
+        if count and len(targets):
+            self.ensure_floors(int(max(current.max(), targets.max()) - min(current.min(), targets.min())) + 1)
+        max_floor_delta = self.tables.max_floor_delta
+
+        floor_delta = current[:, None] - targets[None, :]
+        distance = np.abs(floor_delta * 10 + offset[:, None])
+        status = np.broadcast_to(status[:, None], distance.shape)
+        # 设置新目标时的加减速修正（与 _retarget_status 相同）
+        status = np.where((distance == 1) & (status == _CONSTANT_SPEED), _START_DOWN, status)
+        status = np.where((distance != 1) & (status == _START_DOWN), _CONSTANT_SPEED, status)
+
+        ticks = self.tables.ticks[status, floor_delta + max_floor_delta, offset[:, None] + _POSITION_OFFSET]
+        return np.where(ticks == UNREACHABLE, np.inf, ticks.astype(np.float64))
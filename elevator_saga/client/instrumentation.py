@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Controller Instrumentation
+控制器耗时统计：记录每个回调、步进和状态获取的耗时直方图，并把每个tick的耗时拆分为网络、服务端和控制器三部分
+"""
+import math
+from collections import defaultdict
+from time import perf_counter
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from elevator_saga.core.models import EventType
+
+T = TypeVar("T")
+
+# 事件类型对应的控制器回调名称，用作直方图的分类
+EVENT_CALLBACK_NAMES: Dict[EventType, str] = {
+    EventType.UP_BUTTON_PRESSED: "on_passenger_call",
+    EventType.DOWN_BUTTON_PRESSED: "on_passenger_call",
+    EventType.STOPPED_AT_FLOOR: "on_elevator_stopped",
+    EventType.IDLE: "on_elevator_idle",
+    EventType.PASSING_FLOOR: "on_elevator_passing_floor",
+    EventType.ELEVATOR_APPROACHING: "on_elevator_approaching",
+    EventType.PASSENGER_BOARD: "on_passenger_board",
+    EventType.PASSENGER_ALIGHT: "on_passenger_alight",
+    EventType.ELEVATOR_MOVE: "on_elevator_move",
+}
+
+# 每个tick的耗时拆分
+TICK_BREAKDOWN = ("network", "server", "controller")
+
+
+def call_untimed(category: str, func: Callable[..., T], *args: Any) -> T:
+    """未启用统计时使用的直接调用，与 ControllerProfiler.time_callback 签名相同"""
+    return func(*args)
+
+
+class LatencyHistogram:
+    """
+    耗时直方图
+
+    按微秒取以2为底的对数分桶，记录次数、总耗时和最大值；分位数取所在桶的上界，误差不超过2倍
+    """
+
+    def __init__(self) -> None:
+        self.buckets: List[int] = []
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        """记录一次耗时（秒）"""
+        micros = seconds * 1e6
+        index = math.frexp(micros)[1] if micros >= 1 else 0
+        if index >= len(self.buckets):
+            self.buckets.extend([0] * (index + 1 - len(self.buckets)))
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, fraction: float) -> float:
+        """估计分位数（秒），fraction 取值 0~1"""
+        if self.count == 0:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.buckets):
+            seen += bucket_count
+            if seen >= rank and bucket_count:
+                return min((1 << index) / 1e6, self.max)
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        """统计摘要，耗时单位为毫秒"""
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1e3,
+            "mean_ms": self.total / self.count * 1e3 if self.count else 0.0,
+            "p50_ms": self.percentile(0.5) * 1e3,
+            "p95_ms": self.percentile(0.95) * 1e3,
+            "p99_ms": self.percentile(0.99) * 1e3,
+            "max_ms": self.max * 1e3,
+        }
+
+
+class ControllerProfiler:
+    """
+    控制器耗时统计
+
+    - 回调耗时扣除其中发出的请求（例如 go_to_floor）的耗时后计为控制器时间
+    - 全部HTTP请求的耗时扣除服务端报告的步进处理时间后计为网络时间（包括状态序列化和解析）
+    - 每个tick结束时把三部分耗时分别记入 tick.network / tick.server / tick.controller 直方图
+    """
+
+    def __init__(self) -> None:
+        self.histograms: Dict[str, LatencyHistogram] = defaultdict(LatencyHistogram)
+        self.ticks = 0
+        self._request_time = 0.0  # 累计请求耗时，用于从回调中扣除嵌套的请求
+        self._tick_times = self._new_tick_times()
+
+    @staticmethod
+    def _new_tick_times() -> Dict[str, float]:
+        return {"request": 0.0, "server": 0.0, "controller": 0.0}
+
+    def record_request(self, seconds: float) -> None:
+        """记录一次请求的往返耗时，由API客户端调用"""
+        self._request_time += seconds
+        self._tick_times["request"] += seconds
+
+    def record_server_time(self, seconds: Optional[float]) -> None:
+        """记录服务端报告的步进处理时间"""
+        if seconds is not None:
+            self._tick_times["server"] += seconds
+
+    def time_call(self, category: str, func: Callable[..., T], *args: Any) -> T:
+        """调用客户端操作（步进、获取状态）并记录其耗时"""
+        start = perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self.histograms[category].add(perf_counter() - start)
+
+    def time_callback(self, category: str, func: Callable[..., T], *args: Any) -> T:
+        """调用控制器回调并记录其耗时，回调中发出的请求不计入控制器时间"""
+        request_time = self._request_time
+        start = perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed = perf_counter() - start
+            self.histograms[category].add(elapsed)
+            self._tick_times["controller"] += elapsed - (self._request_time - request_time)
+
+    def end_tick(self) -> None:
+        """结束一个tick，记录该tick的耗时拆分"""
+        times = self._tick_times
+        network = max(times["request"] - times["server"], 0.0)
+        self.histograms["tick.network"].add(network)
+        self.histograms["tick.server"].add(times["server"])
+        self.histograms["tick.controller"].add(times["controller"])
+        self.ticks += 1
+        self._tick_times = self._new_tick_times()
+
+    def report(self) -> Dict[str, Any]:
+        """
+        生成统计报告
+
+        Returns:
+            per_tick: 每个tick平均的网络/服务端/控制器耗时（毫秒）及占比
+            callbacks: 各回调和客户端操作的耗时直方图摘要
+        """
+        totals = {name: self.histograms[f"tick.{name}"].total for name in TICK_BREAKDOWN}
+        overall = sum(totals.values())
+        per_tick = {
+            name: {
+                "mean_ms": totals[name] / self.ticks * 1e3 if self.ticks else 0.0,
+                "p95_ms": self.histograms[f"tick.{name}"].percentile(0.95) * 1e3,
+                "share": totals[name] / overall if overall else 0.0,
+            }
+            for name in TICK_BREAKDOWN
+        }
+        callbacks = {
+            name: histogram.summary()
+            for name, histogram in sorted(self.histograms.items())
+            if not name.startswith("tick.")
+        }
+        return {"ticks": self.ticks, "per_tick": per_tick, "callbacks": callbacks}
+
+    def reset(self) -> None:
+        """清空统计（每轮流量结束报告后调用）"""
+        self.histograms.clear()
+        self.ticks = 0
+        self._tick_times = self._new_tick_times()
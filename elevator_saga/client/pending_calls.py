@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Pending Call Manager
+待分配呼叫管理：按 (楼层, 方向) 分桶保存等待中的乘客，等待时长由到达tick计算，不需要每个tick更新；
+为电梯查询 "距离 - 等待时长 × 权重" 最小的呼叫为 O(log n)，乘客上梯时的删除为 O(1)
+"""
+import heapq
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from elevator_saga.core.models import Direction
+
+# 线段树元素：(评分项, 加入序号, 乘客ID, 楼层)
+_Entry = Tuple[float, int, int, int]
+_EMPTY: _Entry = (float("inf"), 0, -1, -1)
+
+
+class _MinSegmentTree:
+    """按楼层的区间最小值线段树，评分项相同时先加入的优先"""
+
+    def __init__(self, size: int):
+        self.size = 1
+        while self.size < max(size, 1):
+            self.size *= 2
+        self.tree: List[_Entry] = [_EMPTY] * (2 * self.size)
+
+    def update(self, index: int, value: _Entry) -> None:
+        position = index + self.size
+        self.tree[position] = value
+        position //= 2
+        while position:
+            left, right = self.tree[2 * position], self.tree[2 * position + 1]
+            self.tree[position] = left if left <= right else right
+            position //= 2
+
+    def query(self, start: int, stop: int) -> _Entry:
+        """区间 [start, stop) 的最小值"""
+        best = _EMPTY
+        start += self.size
+        stop += self.size
+        while start < stop:
+            if start & 1:
+                if self.tree[start] < best:
+                    best = self.tree[start]
+                start += 1
+            if stop & 1:
+                stop -= 1
+                if self.tree[stop] < best:
+                    best = self.tree[stop]
+            start //= 2
+            stop //= 2
+        return best
+
+
+class PendingCalls:
+    """
+    待分配呼叫
+
+    评分 = |电梯楼层 - 呼叫楼层| - aging_weight × (当前tick - 到达tick)，越小越优先；
+    同一tick内各呼叫的等待时长同时增加，因此排序只取决于 |电梯楼层 - 呼叫楼层| + aging_weight × 到达tick，
+    分别在电梯上方和下方的楼层上用线段树求最小值即可。删除只从索引中移除，堆和线段树中的过期条目在查询时清理
+    """
+
+    def __init__(self, num_floors: int, aging_weight: float = 0.5):
+        self.num_floors = num_floors
+        self.aging_weight = aging_weight
+        # 乘客ID -> (楼层, 方向, 到达tick, 加入序号)，按加入顺序排列
+        self._calls: Dict[int, Tuple[int, Direction, int, int]] = {}
+        # (楼层, 方向) -> 最小堆 [(到达tick, 加入序号, 乘客ID)]
+        self._buckets: Dict[Tuple[int, Direction], List[Tuple[int, int, int]]] = {}
+        self._above = _MinSegmentTree(num_floors)  # 评分项 floor + aging_weight × 到达tick
+        self._below = _MinSegmentTree(num_floors)  # 评分项 -floor + aging_weight × 到达tick
+        self._sequence = 0
+
+    def clear(self) -> None:
+        """清空全部呼叫"""
+        self._calls.clear()
+        self._buckets.clear()
+        self._above = _MinSegmentTree(self.num_floors)
+        self._below = _MinSegmentTree(self.num_floors)
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def __bool__(self) -> bool:
+        return bool(self._calls)
+
+    def __contains__(self, passenger_id: object) -> bool:
+        return passenger_id in self._calls
+
+    def __iter__(self) -> Iterator[int]:
+        """按加入顺序遍历乘客ID"""
+        return iter(list(self._calls))
+
+    def add(self, passenger_id: int, floor: int, direction: Direction, arrive_tick: int) -> None:
+        """加入呼叫（已在队列中的乘客保持原来的到达tick）"""
+        if passenger_id in self._calls:
+            return
+        if not 0 <= floor < self.num_floors:
+            raise ValueError(f"Floor {floor} out of range 0..{self.num_floors - 1}")
+        if direction not in (Direction.UP, Direction.DOWN):
+            raise ValueError(f"Pending call direction must be up or down, got {direction}")
+        self._sequence += 1
+        self._calls[passenger_id] = (floor, direction, arrive_tick, self._sequence)
+        heapq.heappush(self._buckets.setdefault((floor, direction), []), (arrive_tick, self._sequence, passenger_id))
+        self._refresh_floor(floor)
+
+    def discard(self, passenger_id: int) -> bool:
+        """移除呼叫（例如乘客已上梯），O(1)；返回乘客是否在队列中"""
+        return self._calls.pop(passenger_id, None) is not None
+
+    def floor_of(self, passenger_id: int) -> int:
+        """呼叫所在楼层"""
+        return self._calls[passenger_id][0]
+
+    def waiting_ticks(self, passenger_id: int, tick: int) -> int:
+        """到当前tick为止的等待时长"""
+        return tick - self._calls[passenger_id][2]
+
+    def oldest_at(self, floor: int, direction: Direction) -> Optional[int]:
+        """指定楼层和方向上最早加入的乘客ID"""
+        heap = self._buckets.get((floor, direction))
+        if not heap:
+            return None
+        self._prune(heap)
+        return heap[0][2] if heap else None
+
+    def best_for(self, elevator_floor: int) -> Optional[int]:
+        """评分最小的乘客ID，没有呼叫时返回None"""
+        while self._calls:
+            above = self._above.query(elevator_floor, self.num_floors)
+            below = self._below.query(0, elevator_floor + 1)
+            score, sequence, passenger_id, floor = min(
+                (above[0] - elevator_floor,) + above[1:], (below[0] + elevator_floor,) + below[1:]
+            )
+            call = self._calls.get(passenger_id)
+            if call is not None and call[3] == sequence:
+                return passenger_id
+            # 过期条目：刷新该楼层后重新查询
+            self._refresh_floor(floor)
+        return None
+
+    def score(self, passenger_id: int, elevator_floor: int, tick: int) -> float:
+        """呼叫对指定电梯的评分"""
+        floor, _, arrive_tick, _ = self._calls[passenger_id]
+        return abs(elevator_floor - floor) - self.aging_weight * (tick - arrive_tick)
+
+    def _prune(self, heap: List[Tuple[int, int, int]]) -> None:
+        """弹出堆顶已被移除的条目"""
+        calls = self._calls
+        while heap:
+            call = calls.get(heap[0][2])
+            if call is not None and call[3] == heap[0][1]:
+                return
+            heapq.heappop(heap)
+
+    def _refresh_floor(self, floor: int) -> None:
+        """重新计算楼层的最优呼叫并更新线段树"""
+        best: Optional[Tuple[int, int, int]] = None
+        for direction in (Direction.UP, Direction.DOWN):
+            heap = self._buckets.get((floor, direction))
+            if heap:
+                self._prune(heap)
+                if heap and (best is None or heap[0] < best):
+                    best = heap[0]
+        if best is None:
+            self._above.update(floor, _EMPTY)
+            self._below.update(floor, _EMPTY)
+        else:
+            arrive_tick, sequence, passenger_id = best
+            aged = self.aging_weight * arrive_tick
+            self._above.update(floor, (floor + aged, sequence, passenger_id, floor))
+            self._below.update(floor, (-floor + aged, sequence, passenger_id, floor))
@@ -1,9 +1,40 @@
-from typing import Any
+import dataclasses
+from typing import Any, Dict, Optional
 
 from elevator_saga.client.api_client import ElevatorAPIClient
 from elevator_saga.core.models import ElevatorState, FloorState, PassengerInfo
 
 
+class _SnapshotAttribute:
+    """
+    快照属性描述符
+    从客户端当前tick的索引快照中取出代理对应的记录，并读取其同名字段或属性
+    """
+
+    __slots__ = ("name",)
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> Any:
+        if instance is None:
+            return self
+        return getattr(instance._record(), self.name)
+
+    def __set__(self, instance: Any, value: Any) -> None:
+        raise AttributeError(f"Cannot modify read-only attribute '{self.name}'")
+
+
+def _bind_snapshot_attributes(proxy_cls: type, model_cls: type) -> None:
+    """为代理类生成模型的全部数据字段和只读属性的描述符（代理类自身定义的名称除外）"""
+    names = [f.name for f in dataclasses.fields(model_cls)]
+    for klass in model_cls.__mro__:
+        names.extend(name for name, value in vars(klass).items() if isinstance(value, property))
+    for name in names:
+        if name not in vars(proxy_cls):
+            setattr(proxy_cls, name, _SnapshotAttribute(name))
+
+
 class ProxyFloor(FloorState):
     """
     楼层动态代理类
@@ -15,30 +46,15 @@ class ProxyFloor(FloorState):
     def __init__(self, floor_id: int, api_client: ElevatorAPIClient):
         self._floor_id = floor_id
         self._api_client = api_client
-        self._cached_instance = None
         self._init_ok = True
 
-    def _get_floor_state(self) -> FloorState:
-        """获取 FloorState 实例"""
-        state = self._api_client.get_state()
-        floor_data = next((f for f in state.floors if f.floor == self._floor_id), None)
+    def _record(self) -> FloorState:
+        """获取当前快照中的 FloorState 实例"""
+        floor_data = self._api_client.get_snapshot().floors.get(self._floor_id)
         if floor_data is None:
             raise ValueError(f"Floor {self._floor_id} not found in state")
         return floor_data
 
-    def __getattribute__(self, name: str) -> Any:
-        if not name.startswith("_") and self._init_ok and name not in self.__class__.__dict__:
-            try:
-                self_attr = object.__getattribute__(self, name)
-                if callable(self_attr):
-                    return object.__getattribute__(self, name)
-            except AttributeError:
-                pass
-            floor_state = self._get_floor_state()
-            return floor_state.__getattribute__(name)
-        else:
-            return object.__getattribute__(self, name)
-
     def __setattr__(self, name: str, value: Any) -> None:
         """禁止修改属性，保持只读特性"""
         if not self._init_ok:
@@ -46,6 +62,12 @@ class ProxyFloor(FloorState):
         else:
             raise AttributeError(f"Cannot modify read-only attribute '{name}'")
 
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, ProxyFloor) and other._floor_id == self._floor_id
+
+    def __hash__(self) -> int:
+        return hash((ProxyFloor, self._floor_id))
+
     def __repr__(self) -> str:
         return f"ProxyFloor(floor={self._floor_id})"
 
@@ -63,28 +85,13 @@ class ProxyElevator(ElevatorState):
         self._api_client = api_client
         self._init_ok = True
 
-    def _get_elevator_state(self) -> ElevatorState:
-        """获取 ElevatorState 实例"""
-        # 获取当前状态
-        state = self._api_client.get_state()
-        elevator_data = next((e for e in state.elevators if e.id == self._elevator_id), None)
+    def _record(self) -> ElevatorState:
+        """获取当前快照中的 ElevatorState 实例"""
+        elevator_data = self._api_client.get_snapshot().elevators.get(self._elevator_id)
         if elevator_data is None:
             raise ValueError(f"Elevator {self._elevator_id} not found in state")
         return elevator_data
 
-    def __getattribute__(self, name: str) -> Any:
-        if not name.startswith("_") and self._init_ok and name not in self.__class__.__dict__:
-            try:
-                self_attr = object.__getattribute__(self, name)
-                if callable(self_attr):
-                    return object.__getattribute__(self, name)
-            except AttributeError:
-                pass
-            elevator_state = self._get_elevator_state()
-            return elevator_state.__getattribute__(name)
-        else:
-            return object.__getattribute__(self, name)
-
     def go_to_floor(self, floor: int, immediate: bool = False) -> bool:
         """前往指定楼层"""
         return self._api_client.go_to_floor(self._elevator_id, floor, immediate)
@@ -96,6 +103,12 @@ class ProxyElevator(ElevatorState):
         else:
             raise AttributeError(f"Cannot modify read-only attribute '{name}'")
 
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, ProxyElevator) and other._elevator_id == self._elevator_id
+
+    def __hash__(self) -> int:
+        return hash((ProxyElevator, self._elevator_id))
+
     def __repr__(self) -> str:
         return f"ProxyElevator(id={self._elevator_id})"
 
@@ -113,27 +126,13 @@ class ProxyPassenger(PassengerInfo):
         self._api_client = api_client
         self._init_ok = True
 
-    def _get_passenger_info(self) -> PassengerInfo:
-        """获取 PassengerInfo 实例"""
-        state = self._api_client.get_state()
-        passenger_data = state.passengers.get(self._passenger_id)
+    def _record(self) -> PassengerInfo:
+        """获取当前快照中的 PassengerInfo 实例"""
+        passenger_data = self._api_client.get_snapshot().passengers.get(self._passenger_id)
         if passenger_data is None:
             raise ValueError(f"Passenger {self._passenger_id} not found in state")
         return passenger_data
 
-    def __getattribute__(self, name: str) -> Any:
-        if not name.startswith("_") and self._init_ok and name not in self.__class__.__dict__:
-            try:
-                self_attr = object.__getattribute__(self, name)
-                if callable(self_attr):
-                    return object.__getattribute__(self, name)
-            except AttributeError:
-                pass
-            psg_info = self._get_passenger_info()
-            return psg_info.__getattribute__(name)
-        else:
-            return object.__getattribute__(self, name)
-
     def __setattr__(self, name: str, value: Any) -> None:
         """禁止修改属性，保持只读特性"""
         if not self._init_ok:
@@ -141,5 +140,57 @@ class ProxyPassenger(PassengerInfo):
         else:
             raise AttributeError(f"Cannot modify read-only attribute '{name}'")
 
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, ProxyPassenger) and other._passenger_id == self._passenger_id
+
+    def __hash__(self) -> int:
+        return hash((ProxyPassenger, self._passenger_id))
+
     def __repr__(self) -> str:
         return f"ProxyPassenger(id={self._passenger_id})"
+
+
+class ProxyRegistry:
+    """
+    代理对象注册表（享元）
+    同一个ID始终返回同一个代理实例；代理按ID比较和哈希，可以直接放入集合或作为字典键
+    """
+
+    def __init__(self, api_client: ElevatorAPIClient):
+        self._api_client = api_client
+        self._elevators: Dict[int, ProxyElevator] = {}
+        self._floors: Dict[int, ProxyFloor] = {}
+        self._passengers: Dict[int, ProxyPassenger] = {}
+
+    def elevator(self, elevator_id: int) -> ProxyElevator:
+        proxy = self._elevators.get(elevator_id)
+        if proxy is None:
+            proxy = self._elevators[elevator_id] = ProxyElevator(elevator_id, self._api_client)
+        return proxy
+
+    def floor(self, floor_id: int) -> ProxyFloor:
+        proxy = self._floors.get(floor_id)
+        if proxy is None:
+            proxy = self._floors[floor_id] = ProxyFloor(floor_id, self._api_client)
+        return proxy
+
+    def passenger(self, passenger_id: int) -> ProxyPassenger:
+        proxy = self._passengers.get(passenger_id)
+        if proxy is None:
+            proxy = self._passengers[passenger_id] = ProxyPassenger(passenger_id, self._api_client)
+        return proxy
+
+    def clear_passengers(self) -> None:
+        """丢弃乘客代理（新一轮流量的乘客ID从头开始）"""
+        self._passengers.clear()
+
+    def clear(self) -> None:
+        """丢弃全部代理"""
+        self._elevators.clear()
+        self._floors.clear()
+        self._passengers.clear()
+
+
+_bind_snapshot_attributes(ProxyFloor, FloorState)
+_bind_snapshot_attributes(ProxyElevator, ElevatorState)
+_bind_snapshot_attributes(ProxyPassenger, PassengerInfo)
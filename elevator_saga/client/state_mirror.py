@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Event-Sourced State Mirror
+客户端本地状态镜像：以一次完整状态为基线，按步进返回的事件和本地发出的命令推演服务端状态，
+稳态下 get_state 无需访问网络；每次步进用服务端返回的校验和核对，不一致或到达对账间隔时重新拉取完整状态
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from elevator_saga.core.models import (
+    Direction,
+    ElevatorState,
+    ElevatorStatus,
+    EventType,
+    PassengerInfo,
+    Position,
+    SimulationEvent,
+    SimulationState,
+    StepResponse,
+    compute_performance_metrics,
+    compute_state_checksum,
+)
+from elevator_saga.utils.debug import debug_log
+
+# 默认对账间隔（tick），即使校验和一直一致也定期用完整状态替换镜像
+DEFAULT_RESYNC_INTERVAL = 500
+
+
+class StateMirror:
+    """
+    本地状态镜像
+
+    电梯的位置、方向和运行状态取自移动和停靠事件，乘客到达、上下梯同样以事件为准，本地只处理事件中没有的目标切换和减速；
+    go_to_floor 命令先记录下来，在下一次步进时按发送顺序生效（与服务端在步进前执行命令的时序一致）
+    """
+
+    def __init__(self, resync_interval: int = DEFAULT_RESYNC_INTERVAL):
+        if resync_interval <= 0:
+            raise ValueError(f"resync_interval must be positive, got {resync_interval}")
+        self.resync_interval = resync_interval
+        self.state: Optional[SimulationState] = None
+        self.max_duration_ticks = 0
+        self._synced_tick = 0
+        self._pending_commands: List[Tuple[int, int, bool]] = []
+        # 统计信息
+        self.ticks_applied = 0
+        self.resyncs = 0
+        self.mismatches = 0
+
+    @property
+    def synced(self) -> bool:
+        """镜像当前是否可用"""
+        return self.state is not None
+
+    def load(self, state: SimulationState) -> None:
+        """以完整状态作为新的基线；此前记录的命令已包含在该状态中，一并丢弃"""
+        for elevator in state.elevators:
+            # from_dict 不会转换嵌套模型，位置在首次访问时才转换；推演直接修改位置，这里统一转换
+            if isinstance(elevator.position, dict):
+                elevator.position = Position.from_dict(elevator.position)
+        self.state = state
+        self._synced_tick = state.tick
+        self._pending_commands.clear()
+        self.resyncs += 1
+
+    def invalidate(self) -> None:
+        """丢弃镜像，下次读取状态时重新拉取"""
+        self.state = None
+        self._pending_commands.clear()
+
+    def record_command(self, elevator_id: int, floor: int, immediate: bool) -> None:
+        """记录已被服务端接受的 go_to_floor 命令"""
+        if self.state is not None:
+            self._pending_commands.append((elevator_id, floor, immediate))
+
+    def apply_step(self, step_response: StepResponse) -> bool:
+        """
+        应用一次步进的事件
+
+        Returns:
+            镜像是否仍然可用；校验和不一致或到达对账间隔时返回False，并丢弃镜像
+        """
+        state = self.state
+        if state is None:
+            return False
+
+        for elevator_id, floor, immediate in self._pending_commands:
+            self._go_to_floor(state, elevator_id, floor, immediate)
+        self._pending_commands.clear()
+
+        events_by_tick: Dict[int, List[SimulationEvent]] = defaultdict(list)
+        for event in step_response.events:
+            events_by_tick[event.tick].append(event)
+        for tick in range(state.tick + 1, step_response.tick + 1):
+            self._apply_tick(state, tick, events_by_tick.get(tick, []))
+            self.ticks_applied += 1
+
+        if step_response.checksum is not None and step_response.checksum != compute_state_checksum(state):
+            self.mismatches += 1
+            debug_log(f"State mirror checksum mismatch at tick {state.tick}, resyncing")
+            self.invalidate()
+            return False
+        if state.tick - self._synced_tick >= self.resync_interval:
+            self.invalidate()
+            return False
+        return True
+
+    # ==================== 应用事件（没有事件的电梯在本地推演） ====================
+
+    def _apply_tick(self, state: SimulationState, tick: int, events: List[SimulationEvent]) -> None:
+        """应用一个tick的事件，顺序与服务端 _process_tick 相同"""
+        state.tick = tick
+        metrics_dirty = False
+
+        # 1. 电梯状态更新（停靠的电梯按下一目标出发，途中乘客上梯）；移动的电梯随后以移动事件中的状态为准
+        for elevator in state.elevators:
+            if elevator.target_floor_direction == Direction.STOPPED:
+                if elevator.next_target_floor is None:
+                    continue
+                self._set_target_floor(elevator, elevator.next_target_floor)
+                elevator.next_target_floor = None
+            if elevator.run_status == ElevatorStatus.STOPPED:
+                elevator.run_status = ElevatorStatus.START_UP
+            elif elevator.run_status == ElevatorStatus.START_UP:
+                elevator.run_status = ElevatorStatus.CONSTANT_SPEED
+
+        moved: Set[int] = set()
+        stops: Dict[int, int] = {}
+        for event in events:
+            data = event.data
+            if event.type == EventType.PASSENGER_BOARD:
+                elevator = state.elevators[data["elevator"]]
+                passenger = state.passengers[data["passenger"]]
+                floor = state.floors[data["floor"]]
+                queue = floor.up_queue if passenger.destination > passenger.origin else floor.down_queue
+                queue.remove(passenger.id)
+                passenger.pickup_tick = tick
+                passenger.elevator_id = elevator.id
+                elevator.passengers.append(passenger.id)
+            # 2. 新乘客到达
+            elif event.type in (EventType.UP_BUTTON_PRESSED, EventType.DOWN_BUTTON_PRESSED):
+                passenger = PassengerInfo(
+                    id=data["passenger"], origin=data["floor"], destination=data["destination"], arrive_tick=tick
+                )
+                state.passengers[passenger.id] = passenger
+                floor = state.floors[passenger.origin]
+                if event.type == EventType.UP_BUTTON_PRESSED:
+                    floor.up_queue.append(passenger.id)
+                else:
+                    floor.down_queue.append(passenger.id)
+                state.metrics.total_passengers = len(state.passengers)
+            # 3. 电梯移动：位置、方向和移动时的运行状态以事件为准
+            elif event.type == EventType.ELEVATOR_MOVE:
+                elevator = state.elevators[data["elevator"]]
+                elevator.run_status = ElevatorStatus(data["status"])
+                elevator.last_tick_direction = Direction(data["direction"])
+                elevator.position.floor_up_position_add(round((data["to_position"] - data["from_position"]) * 10))
+                self._decelerate(elevator)
+                moved.add(elevator.id)
+            elif event.type == EventType.STOPPED_AT_FLOOR:
+                stops[data["elevator"]] = data["floor"]
+            # 4. 到站下客
+            elif event.type == EventType.PASSENGER_ALIGHT:
+                elevator = state.elevators[data["elevator"]]
+                passenger = state.passengers[data["passenger"]]
+                passenger.dropoff_tick = tick
+                passenger.arrived = True
+                elevator.passengers.remove(passenger.id)
+                metrics_dirty = True
+
+        # 没有移动事件的运行中电梯在本地推演：服务端在移动前记录方向，移动后目标方向已变为停止所以不发移动事件；
+        # 到站的位置取自停靠事件（越过目标停在层间的少见情况由校验和发现并重新同步）
+        for elevator in state.elevators:
+            if elevator.id not in moved and elevator.run_status != ElevatorStatus.STOPPED:
+                elevator.last_tick_direction = elevator.target_floor_direction
+                self._decelerate(elevator)
+            floor = stops.get(elevator.id)
+            if floor is not None:
+                elevator.position.current_floor = floor
+                elevator.position.floor_up_position = 0
+                elevator.run_status = ElevatorStatus.STOPPED
+
+        # 刚到站的电梯切换到下一目标
+        for elevator in state.elevators:
+            if elevator.last_tick_direction == Direction.STOPPED or elevator.run_status != ElevatorStatus.STOPPED:
+                continue
+            if elevator.next_target_floor is not None:
+                self._set_target_floor(elevator, elevator.next_target_floor)
+                elevator.next_target_floor = None
+
+        # 到达最大时长时服务端强制完成剩余乘客（不产生事件）
+        if self.max_duration_ticks and tick >= self.max_duration_ticks:
+            for passenger in state.passengers.values():
+                if passenger.dropoff_tick == 0:
+                    passenger.dropoff_tick = tick
+                if passenger.pickup_tick == 0:
+                    passenger.pickup_tick = tick
+            metrics_dirty = True
+
+        if metrics_dirty:
+            state.metrics = compute_performance_metrics(state.passengers.values())
+
+    def _decelerate(self, elevator: ElevatorState) -> None:
+        """移动后距目标一个单位时从匀速切换到减速（服务端在发出移动事件之后才切换，事件中没有这一步）"""
+        if elevator.run_status == ElevatorStatus.CONSTANT_SPEED and self._distance_to_target(elevator) == 1:
+            elevator.run_status = ElevatorStatus.START_DOWN
+
+    def _go_to_floor(self, state: SimulationState, elevator_id: int, floor: int, immediate: bool) -> None:
+        """与服务端 elevator_go_to_floor 相同"""
+        if 0 <= elevator_id < len(state.elevators) and 0 <= floor < len(state.floors):
+            elevator = state.elevators[elevator_id]
+            if immediate:
+                self._set_target_floor(elevator, floor)
+            else:
+                elevator.next_target_floor = floor
+
+    def _set_target_floor(self, elevator: ElevatorState, floor: int) -> None:
+        """设置目标楼层并修正加减速状态，与服务端 _set_elevator_target_floor 相同"""
+        elevator.position.target_floor = floor
+        should_decelerate = self._distance_to_target(elevator) == 1
+        if not should_decelerate and elevator.run_status == ElevatorStatus.START_DOWN:
+            elevator.run_status = ElevatorStatus.CONSTANT_SPEED
+        elif should_decelerate and elevator.run_status == ElevatorStatus.CONSTANT_SPEED:
+            elevator.run_status = ElevatorStatus.START_DOWN
+
+    @staticmethod
+    def _distance_to_target(elevator: ElevatorState) -> int:
+        position = elevator.position
+        return abs(position.target_floor * 10 - (position.current_floor * 10 + position.floor_up_position))
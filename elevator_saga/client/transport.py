@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+HTTP Transports for Elevator API Client
+客户端的可插拔传输层：ElevatorAPIClient 通过 Transport 发送JSON请求，默认使用HTTP/1.1长连接池；
+与服务端同机运行时可以改用Unix域套接字，并通过共享内存直接读取状态
+"""
+import http.client
+import json
+import queue
+import select
+import socket
+import urllib.error
+import urllib.parse
+import urllib.request
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Tuple
+
+from elevator_saga.core.models import SimulationState
+from elevator_saga.core.shared_state import SharedStateReader
+from elevator_saga.utils.debug import debug_log
+
+# 默认超时（秒），与原先的 urlopen 调用保持一致
+DEFAULT_GET_TIMEOUT = 60.0
+DEFAULT_POST_TIMEOUT = 600.0
+DEFAULT_CONNECT_TIMEOUT = 5.0
+
+# 复用空闲连接时，服务端可能已经关闭了它；这些异常表示连接已失效。
+# 请求还没完整写出时可以换新连接重试一次；已经写出后服务端可能已执行了请求，只有幂等方法才重试
+_STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.CannotSendRequest,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    ConnectionAbortedError,
+    BrokenPipeError,
+)
+_IDEMPOTENT_METHODS = ("GET", "HEAD")
+
+
+class Transport(ABC):
+    """传输层接口：发送JSON请求并返回解析后的JSON响应，失败时抛出 RuntimeError"""
+
+    @abstractmethod
+    def request(
+        self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """发送请求
+
+        Args:
+            method: HTTP方法（GET/POST）
+            endpoint: 以 / 开头的路径
+            data: POST请求体，会被编码为JSON
+            timeout: 本次请求的超时（秒），None表示使用默认值
+        """
+
+    def read_state(self) -> Optional[SimulationState]:
+        """不经过 GET /api/state 直接读取当前状态；不支持时返回None"""
+        return None
+
+    def close(self) -> None:
+        """释放传输层持有的资源"""
+
+
+class UrllibTransport(Transport):
+    """每个请求使用 urllib.request.urlopen 新建连接（旧行为）"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip("/")
+
+    def request(
+        self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        url = f"{self.base_url}{endpoint}"
+        if method == "GET":
+            req = urllib.request.Request(url)
+            timeout = DEFAULT_GET_TIMEOUT if timeout is None else timeout
+        else:
+            body = json.dumps(data or {}).encode("utf-8")
+            req = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"}, method=method)
+            timeout = DEFAULT_POST_TIMEOUT if timeout is None else timeout
+
+        try:
+            with urllib.request.urlopen(req, timeout=timeout) as response:
+                response_data: Dict[str, Any] = json.loads(response.read().decode("utf-8"))
+                return response_data
+        except urllib.error.URLError as e:
+            raise RuntimeError(f"{method} {url} failed: {e}")
+
+
+class KeepAliveTransport(Transport):
+    """
+    基于 http.client 的HTTP/1.1长连接池
+
+    连接在 step、get_state、go_to_floor 等请求之间复用，只有首次请求或连接失效时才建立TCP连接。
+    取出空闲连接前先检查服务端是否已关闭它；复用的连接在请求写出前失效时换新连接重试一次，
+    写出后才失效（服务端可能已经执行）时只重试GET；超时不会重试，以免重复执行非幂等的POST
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        pool_size: int = 4,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+    ):
+        self.base_url = base_url.rstrip("/")
+        parts = urllib.parse.urlsplit(self.base_url)
+        if parts.scheme != "http":
+            raise ValueError(f"KeepAliveTransport only supports http:// URLs, got {base_url!r}")
+        self._host = parts.hostname or "127.0.0.1"
+        self._port = parts.port or 80
+        self._path_prefix = parts.path
+        self._connect_timeout = connect_timeout
+        self._idle: "queue.LifoQueue[http.client.HTTPConnection]" = queue.LifoQueue(maxsize=pool_size)
+        self.connections_opened = 0
+
+    def _create_connection(self) -> http.client.HTTPConnection:
+        return http.client.HTTPConnection(self._host, self._port, timeout=self._connect_timeout)
+
+    def _connect(self) -> http.client.HTTPConnection:
+        """建立新连接并关闭Nagle算法，避免小请求被延迟发送"""
+        conn = self._create_connection()
+        try:
+            conn.connect()
+        except OSError as e:
+            conn.close()
+            raise RuntimeError(f"Cannot connect to {self.base_url}: {e}")
+        if conn.sock.family in (socket.AF_INET, socket.AF_INET6):
+            conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.connections_opened += 1
+        return conn
+
+    def _acquire(self) -> Tuple[http.client.HTTPConnection, bool]:
+        """取出一个空闲连接，跳过已被服务端关闭的连接，没有时新建；返回 (连接, 是否为复用连接)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return self._connect(), False
+            if not _is_dropped(conn):
+                return conn, True
+            conn.close()
+
+    def _release(self, conn: http.client.HTTPConnection) -> None:
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def request(
+        self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        url = f"{self.base_url}{endpoint}"
+        if timeout is None:
+            timeout = DEFAULT_GET_TIMEOUT if method == "GET" else DEFAULT_POST_TIMEOUT
+        body = None if method == "GET" else json.dumps(data or {}).encode("utf-8")
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+
+        while True:
+            conn, reused = self._acquire()
+            sent = False
+            try:
+                conn.sock.settimeout(timeout)
+                conn.request(method, self._path_prefix + endpoint, body=body, headers=headers)
+                sent = True
+                response = conn.getresponse()
+                payload = response.read()
+            except _STALE_CONNECTION_ERRORS as e:
+                conn.close()
+                if reused and (not sent or method in _IDEMPOTENT_METHODS):
+                    debug_log(f"{method} {url}: stale keep-alive connection ({e!r}), reconnecting")
+                    continue
+                raise RuntimeError(f"{method} {url} failed: {e!r}")
+            except socket.timeout:
+                conn.close()
+                raise RuntimeError(f"{method} {url} timed out after {timeout}s")
+            except OSError as e:
+                conn.close()
+                raise RuntimeError(f"{method} {url} failed: {e}")
+            break
+
+        if response.will_close:
+            conn.close()
+        else:
+            self._release(conn)
+
+        if response.status >= 400:
+            raise RuntimeError(
+                f"{method} {url} failed: HTTP {response.status} {payload[:200].decode('utf-8', 'replace')}"
+            )
+        response_data: Dict[str, Any] = json.loads(payload.decode("utf-8"))
+        return response_data
+
+    def close(self) -> None:
+        """关闭池中所有空闲连接"""
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+def _is_dropped(conn: http.client.HTTPConnection) -> bool:
+    """空闲连接是否已不可用：空闲时socket可读说明服务端已关闭（或发来了意外的数据）"""
+    if conn.sock is None:
+        return True
+    try:
+        readable, _, _ = select.select([conn.sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """连接到Unix域套接字的 HTTPConnection"""
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+
+
+class UnixSocketTransport(KeepAliveTransport):
+    """
+    通过Unix域套接字访问同机服务端（服务端以 --unix-socket 启动）
+
+    与 KeepAliveTransport 使用相同的长连接池和重试逻辑，只是连接不经过TCP协议栈
+    """
+
+    def __init__(self, socket_path: str, pool_size: int = 4, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT):
+        super().__init__("http://localhost", pool_size, connect_timeout)
+        self.socket_path = socket_path
+        self.base_url = f"unix://{socket_path}"
+        self._path_prefix = ""
+
+    def _create_connection(self) -> http.client.HTTPConnection:
+        return UnixHTTPConnection(self.socket_path, timeout=self._connect_timeout)
+
+
+class SharedMemoryTransport(Transport):
+    """
+    共享内存状态通道（服务端以 --shared-memory 启动）
+
+    状态直接从服务端发布的共享内存数组构造，不经过HTTP和JSON；步进、命令等其他请求交给内层传输层
+    """
+
+    def __init__(self, inner: Transport, name: str):
+        self.inner = inner
+        self.reader = SharedStateReader(name)
+
+    def request(
+        self, method: str, endpoint: str, data: Optional[Dict[str, Any]] = None, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        return self.inner.request(method, endpoint, data, timeout)
+
+    def read_state(self) -> Optional[SimulationState]:
+        return self.reader.read_state()
+
+    def close(self) -> None:
+        self.inner.close()
+        self.reader.close()
+
+
+def create_transport(base_url: str) -> Transport:
+    """按URL选择传输层：unix:///path/to/socket 使用Unix域套接字，其余使用HTTP长连接池"""
+    if base_url.startswith("unix://"):
+        return UnixSocketTransport(base_url[len("unix://") :])
+    return KeepAliveTransport(base_url)
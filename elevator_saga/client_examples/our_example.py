@@ -11,8 +11,11 @@
 5. 动态pending管理 - 优先处理等待时间长的请求
 6. 预测性分散 - 空闲电梯移动到战略位置
 """
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+
 from elevator_saga.client.base_controller import ElevatorController
+from elevator_saga.client.dispatcher import CallArrays, CostMatrixDispatcher, ElevatorArrays
+from elevator_saga.client.pending_calls import PendingCalls
 from elevator_saga.client.proxy_models import ProxyElevator, ProxyFloor, ProxyPassenger
 from elevator_saga.core.models import Direction, SimulationEvent
 
@@ -20,13 +23,14 @@ from elevator_saga.core.models import Direction, SimulationEvent
 class TestElevatorBusController(ElevatorController):
     def __init__(self):
         super().__init__("http://127.0.0.1:8000", True)
-        self.pending_calls: List[ProxyPassenger] = []      # 等待分配的乘客
+        self.pending_calls = PendingCalls(1)                # 等待分配的呼叫（按楼层和方向分桶，等待时长由到达tick计算）
         self.max_floor = 0                                 # 最高楼层
         self.floors: List[ProxyFloor] = []                 # 所有楼层
         self.elevators: List[ProxyElevator] = []           # 所有电梯
         self.elevator_targets: Dict[int, List[int]] = {}   # 每个电梯的目标楼层列表
-        self.passenger_waiting_time: Dict[int, int] = {}   # 乘客等待时间（用于优先级）
         self.current_tick = 0                              # 当前tick
+        self.dispatcher = CostMatrixDispatcher("greedy")   # 呼叫分配（代价矩阵）
+        self.call_assignment: Dict[int, Tuple[int, float]] = {}  # 本tick新呼叫的分配结果：乘客ID -> (电梯下标, 代价)
 
     def on_init(self, elevators: List[ProxyElevator], floors: List[ProxyFloor]) -> None:
         """初始化：让电梯分散到不同楼层以提高覆盖范围"""
@@ -34,6 +38,7 @@ class TestElevatorBusController(ElevatorController):
         self.floors = floors
         self.elevators = elevators
         self.elevator_targets = {e.id: [] for e in elevators}
+        self.pending_calls = PendingCalls(len(floors))
         
         print(f"[初始化] {len(floors)}层楼, {len(elevators)}部电梯, 最高楼层F{self.max_floor}")
         
@@ -50,20 +55,14 @@ class TestElevatorBusController(ElevatorController):
     ) -> None:
         """每个tick开始时更新状态"""
         self.current_tick = tick
-        # 更新pending乘客的等待时间（过滤掉已经不存在的乘客）
-        valid_pending = []
-        for passenger in self.pending_calls:
-            try:
-                # 尝试访问乘客id，如果不存在会抛出异常
-                pid = passenger.id
-                if pid not in self.passenger_waiting_time:
-                    self.passenger_waiting_time[pid] = 0
-                self.passenger_waiting_time[pid] += 1
-                valid_pending.append(passenger)
-            except (ValueError, KeyError):
-                # 乘客已经不存在了，跳过
-                pass
-        self.pending_calls = valid_pending
+
+        # 本tick的新呼叫一次性构造代价矩阵完成分配，on_passenger_call 中按乘客取结果
+        # （代价只依赖tick开始时的电梯状态，与逐个呼叫分别评分的结果相同）
+        calls = CallArrays.from_events(events)
+        self.call_assignment = {}
+        if len(calls):
+            for elevator_index, call_index, cost in self.dispatcher.assign(ElevatorArrays.from_elevators(elevators), calls):
+                self.call_assignment[int(calls.passenger[call_index])] = (elevator_index, cost)
 
     def on_event_execute_end(
         self, tick: int, events: List[SimulationEvent], 
@@ -82,83 +81,18 @@ class TestElevatorBusController(ElevatorController):
         """
         print(f"[呼叫] 乘客{passenger.id} 在F{floor.floor}呼叫 {direction} → F{passenger.destination}")
         
-        best_elevator = None
-        best_score = float('inf')
-        
-        # 遍历所有电梯，计算分配评分
-        for elevator in self.elevators:
-            score = self._calculate_assignment_score(elevator, passenger, floor, direction)
-            if score < best_score:
-                best_score = score
-                best_elevator = elevator
+        # 分配结果在tick开始时由代价矩阵统一算出（评分综合距离、方向顺路和载客率，见 CostMatrixDispatcher）
+        assignment = self.call_assignment.get(passenger.id)
         
         # 如果找到合适的电梯（评分不是无穷大）
-        if best_score < float('inf'):
+        if assignment is not None:
+            elevator_index, best_score = assignment
+            best_elevator = self.elevators[elevator_index]
             print(f"  [分配] 分配E{best_elevator.id} 去接乘客{passenger.id} (评分:{best_score:.1f})")
             self._assign_passenger_to_elevator(best_elevator, passenger, floor)
         else:
             print(f"  [等待] 暂无合适电梯，加入pending队列")
-            if passenger not in self.pending_calls:
-                self.pending_calls.append(passenger)
-                self.passenger_waiting_time[passenger.id] = 0
-
-    def _calculate_assignment_score(
-        self, elevator: ProxyElevator, passenger: ProxyPassenger, 
-        floor: ProxyFloor, direction: str
-    ) -> float:
-        """
-        计算电梯分配评分（越小越好）
-        考虑因素：
-        1. 距离（基础分）
-        2. 方向一致性（同向顺路最优）
-        3. 载客量（负载均衡）
-        4. 是否在路径上
-        """
-        # 如果电梯已满载，不能分配
-        if len(elevator.passengers) >= elevator.max_capacity:
-            return float('inf')
-        
-        distance = abs(elevator.current_floor - floor.floor)
-        moving_dir = elevator.last_tick_direction
-        current_floor = elevator.current_floor
-        
-        # 负载因子（0-1），载客越多分数越高
-        load_factor = len(elevator.passengers) / elevator.max_capacity
-        
-        # 基础分数 = 距离 * (1 + 负载因子)
-        base_score = distance * (1 + load_factor * 0.3)
-        
-        # 情况1: 电梯空闲 - 最优选择
-        if moving_dir == Direction.STOPPED:
-            return base_score * 0.7  # 给予30%的优先权
-        
-        # 情况2: 同向且顺路 - 非常好
-        is_same_direction = (
-            (moving_dir == Direction.UP and direction == Direction.UP.value) or
-            (moving_dir == Direction.DOWN and direction == Direction.DOWN.value)
-        )
-        
-        if is_same_direction:
-            # 检查是否在路径上
-            is_on_the_way = False
-            if moving_dir == Direction.UP and current_floor <= floor.floor:
-                is_on_the_way = True
-            elif moving_dir == Direction.DOWN and current_floor >= floor.floor:
-                is_on_the_way = True
-            
-            if is_on_the_way:
-                # 顺路接客，优先级很高
-                return base_score * 0.4  # 给予60%的优先权
-            else:
-                # 同向但已经过了，需要掉头
-                return base_score * 2.0
-        
-        # 情况3: 反向运行 - 只有很近才考虑
-        if distance <= 2 and len(elevator.passengers) == 0:
-            return base_score * 1.5
-        
-        # 其他情况不分配
-        return float('inf')
+            self.pending_calls.add(passenger.id, floor.floor, Direction(direction), self.current_tick)
 
     def _assign_passenger_to_elevator(
         self, elevator: ProxyElevator, passenger: ProxyPassenger, floor: ProxyFloor
@@ -228,45 +162,21 @@ class TestElevatorBusController(ElevatorController):
 
     def _try_assign_pending_to_elevator(self, elevator: ProxyElevator) -> bool:
         """尝试将pending乘客分配给空闲电梯"""
-        if not self.pending_calls:
+        # 找到距离最近且等待时间最长的乘客（评分 = 距离 - 等待时间×0.5）
+        passenger_id = self.pending_calls.best_for(elevator.current_floor)
+        if passenger_id is None:
             return False
-        
-        # 找到距离最近且等待时间最长的乘客
-        best_passenger = None
-        best_score = float('inf')
-        
-        for passenger in self.pending_calls:
-            try:
-                distance = abs(elevator.current_floor - passenger.origin)
-                waiting_time = self.passenger_waiting_time.get(passenger.id, 0)
-                
-                # 评分 = 距离 - 等待时间惩罚（等待越久，优先级越高）
-                score = distance - waiting_time * 0.5
-                
-                if score < best_score:
-                    best_score = score
-                    best_passenger = passenger
-            except (ValueError, KeyError):
-                # 乘客已经不存在，跳过
-                continue
-        
-        if best_passenger:
-            try:
-                print(f"  [处理] 处理pending: 乘客{best_passenger.id} 在F{best_passenger.origin} (等待{self.passenger_waiting_time[best_passenger.id]}ticks)")
-                self.pending_calls.remove(best_passenger)
-                floor = self.floors[best_passenger.origin]
-                
-                # 判断方向
-                direction = Direction.UP.value if best_passenger.destination > best_passenger.origin else Direction.DOWN.value
-                self._assign_passenger_to_elevator(elevator, best_passenger, floor)
-                return True
-            except (ValueError, KeyError):
-                # 乘客在处理过程中消失了
-                if best_passenger in self.pending_calls:
-                    self.pending_calls.remove(best_passenger)
-                return False
-        
-        return False
+        self._assign_pending_passenger(elevator, passenger_id)
+        return True
+
+    def _assign_pending_passenger(self, elevator: ProxyElevator, passenger_id: int) -> None:
+        """把pending乘客分配给电梯"""
+        floor = self.floors[self.pending_calls.floor_of(passenger_id)]
+        waiting = self.pending_calls.waiting_ticks(passenger_id, self.current_tick)
+        print(f"  [处理] 处理pending: 乘客{passenger_id} 在F{floor.floor} (等待{waiting}ticks)")
+        self.pending_calls.discard(passenger_id)
+        passenger = self.proxies.passenger(passenger_id)
+        self._assign_passenger_to_elevator(elevator, passenger, floor)
 
     def _get_strategic_position(self, elevator: ProxyElevator) -> int:
         """
@@ -296,9 +206,6 @@ class TestElevatorBusController(ElevatorController):
         """乘客上梯时，确保目标楼层在列表中"""
         print(f"[上梯] 乘客{passenger.id} 上E{elevator.id} → F{passenger.destination}")
         
-        # 清除该乘客的等待时间记录
-        if passenger.id in self.passenger_waiting_time:
-            del self.passenger_waiting_time[passenger.id]
         
         # 确保目标楼层在列表中
         self._add_stop_smart(elevator, passenger.destination)
@@ -327,33 +234,24 @@ class TestElevatorBusController(ElevatorController):
         if len(elevator.passengers) >= elevator.max_capacity:
             return
         
-        # 查找顺路的乘客
-        for passenger in list(self.pending_calls):
-            if passenger.origin == floor.floor:
-                # 判断是否同向
-                is_same_direction = False
-                if direction == Direction.UP.value and passenger.destination > passenger.origin:
-                    is_same_direction = True
-                elif direction == Direction.DOWN.value and passenger.destination < passenger.origin:
-                    is_same_direction = True
-                
-                if is_same_direction:
-                    print(f"[顺路] E{elevator.id} 顺路接乘客{passenger.id} 在F{floor.floor} (方向:{direction})")
-                    self.pending_calls.remove(passenger)
-                    
-                    # 确保在这层停靠
-                    if floor.floor not in self.elevator_targets[elevator.id]:
-                        self._add_stop_smart(elevator, floor.floor)
-                    
-                    # 添加乘客目的地
-                    self._add_stop_smart(elevator, passenger.destination)
-                    
-                    # 如果当前目标不是这层，重新发送指令
-                    if elevator.target_floor != floor.floor:
-                        elevator.go_to_floor(floor.floor)
-                    
-                    # 只接一个顺路乘客，避免过度延迟
-                    break
+        # 查找这层同向等待最久的乘客（只接一个顺路乘客，避免过度延迟）
+        passenger_id = self.pending_calls.oldest_at(floor.floor, Direction(direction))
+        if passenger_id is None:
+            return
+        print(f"[顺路] E{elevator.id} 顺路接乘客{passenger_id} 在F{floor.floor} (方向:{direction})")
+        self.pending_calls.discard(passenger_id)
+        passenger = self.proxies.passenger(passenger_id)
+        
+        # 确保在这层停靠
+        if floor.floor not in self.elevator_targets[elevator.id]:
+            self._add_stop_smart(elevator, floor.floor)
+        
+        # 添加乘客目的地
+        self._add_stop_smart(elevator, passenger.destination)
+        
+        # 如果当前目标不是这层，重新发送指令
+        if elevator.target_floor != floor.floor:
+            elevator.go_to_floor(floor.floor)
 
     def _process_pending_calls(self) -> None:
         """
@@ -363,19 +261,15 @@ class TestElevatorBusController(ElevatorController):
         if not self.pending_calls:
             return
         
-        # 找出目标列表较短的电梯（即将空闲）
-        for elevator in self.elevators:
-            if not self.pending_calls:
+        # 目标列表较短（即将空闲）的电梯按顺序各取一个评分最小的pending乘客
+        candidates = [elevator for elevator in self.elevators
+                      if len(self.elevator_targets[elevator.id]) <= 2]
+        for elevator in candidates:
+            if not self._try_assign_pending_to_elevator(elevator):
                 break
-            
-            # 如果电梯目标列表很短（即将空闲）
-            if len(self.elevator_targets[elevator.id]) <= 2:
-                # 尝试分配pending乘客
-                if self._try_assign_pending_to_elevator(elevator):
-                    # 发送指令
-                    if elevator.target_floor is None or elevator.target_floor == elevator.current_floor:
-                        self._send_next_target(elevator)
-
+            # 发送指令
+            if elevator.target_floor is None or elevator.target_floor == elevator.current_floor:
+                self._send_next_target(elevator)
 
 if __name__ == "__main__":
     algorithm = TestElevatorBusController()
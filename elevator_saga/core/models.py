@@ -3,12 +3,16 @@
 Elevator Saga Data Models
 统一的数据模型定义，用于客户端和服务器的类型一致性和序列化
 """
+
 import json
 import uuid
-from dataclasses import asdict, dataclass, field
+import zlib
+from dataclasses import asdict, dataclass, field, fields
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar, Union
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, MutableMapping, Optional, Tuple, Type, TypeVar, Union
+
+import numpy as np
 
 # 类型变量
 T = TypeVar("T", bound="SerializableModel")
@@ -44,6 +48,16 @@ class ElevatorStatus(Enum):  # OK
     STOPPED = "stopped"  # 停止状态
 
 
+# 热点属性（乘客状态、电梯方向）直接使用的枚举成员：通过枚举类访问成员要经过描述符，比读取模块全局变量慢数倍
+_WAITING = PassengerStatus.WAITING
+_IN_ELEVATOR = PassengerStatus.IN_ELEVATOR
+_COMPLETED = PassengerStatus.COMPLETED
+_UP = Direction.UP
+_DOWN = Direction.DOWN
+_STOPPED = Direction.STOPPED
+_ELEVATOR_STOPPED = ElevatorStatus.STOPPED
+
+
 class EventType(Enum):
     """事件类型枚举"""
 
@@ -59,7 +73,14 @@ class EventType(Enum):
 
 
 class SerializableModel:
-    """可序列化模型基类"""
+    """
+    可序列化模型基类
+
+    基类不占用实例字典，数量大的模型（乘客、电梯、楼层、事件、流量条目等）声明为 slots 数据类，
+    每个实例只保存字段本身，内存占用更小、属性读取更快；其他模型仍有实例字典
+    """
+
+    __slots__ = ()
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
@@ -80,10 +101,11 @@ class SerializableModel:
 
         filtered_data = {k: v for k, v in data.items() if k in valid_params}
         instance = cls(**filtered_data)
-        for k, v in cls.__dict__.items():
-            if issubclass(v.__class__, Enum):  # 要求不能为None
-                value = getattr(instance, k)
-                setattr(instance, k, v.__class__(value))
+        # 默认值为枚举的字段（slots 数据类的默认值不保存为类属性，从字段定义读取）
+        for f in fields(cls):  # type: ignore[arg-type]
+            if isinstance(f.default, Enum):  # 要求不能为None
+                value = getattr(instance, f.name)
+                setattr(instance, f.name, f.default.__class__(value))
         return instance
 
     @classmethod
@@ -104,7 +126,7 @@ class SerializableModel:
         return str(obj)
 
 
-@dataclass
+@dataclass(slots=True)
 class Position(SerializableModel):
     """位置信息"""
 
@@ -132,7 +154,7 @@ class Position(SerializableModel):
         return self.current_floor
 
 
-@dataclass
+@dataclass(slots=True)
 class ElevatorIndicators(SerializableModel):
     """电梯指示灯状态"""
 
@@ -152,7 +174,7 @@ class ElevatorIndicators(SerializableModel):
             self.down = False
 
 
-@dataclass
+@dataclass(slots=True)
 class PassengerInfo(SerializableModel):
     """乘客信息"""
 
@@ -169,11 +191,11 @@ class PassengerInfo(SerializableModel):
     def status(self) -> PassengerStatus:
         """乘客状态"""
         if self.arrived:
-            return PassengerStatus.COMPLETED
+            return _COMPLETED
         elif self.pickup_tick > 0:
-            return PassengerStatus.IN_ELEVATOR
+            return _IN_ELEVATOR
         else:
-            return PassengerStatus.WAITING
+            return _WAITING
 
     @property
     def floor_wait_time(self) -> int:
@@ -196,7 +218,7 @@ class PassengerInfo(SerializableModel):
             return Direction.STOPPED
 
 
-@dataclass
+@dataclass(slots=True)
 class ElevatorState(SerializableModel):
     """电梯状态"""
 
@@ -244,16 +266,16 @@ class ElevatorState(SerializableModel):
         """目标方向"""
         next_floor = self.target_floor
         if next_floor > self.current_floor:
-            return Direction.UP
+            return _UP
         elif next_floor < self.current_floor:
-            return Direction.DOWN
+            return _DOWN
         else:
-            return Direction.STOPPED
+            return _STOPPED
 
     @property
     def is_idle(self) -> bool:
         """是否空闲"""
-        return self.run_status == ElevatorStatus.STOPPED
+        return self.run_status is _ELEVATOR_STOPPED
 
     @property
     def is_full(self) -> bool:
@@ -275,7 +297,7 @@ class ElevatorState(SerializableModel):
         self.next_target_floor = None
 
 
-@dataclass
+@dataclass(slots=True)
 class FloorState(SerializableModel):
     """楼层状态"""
 
@@ -313,7 +335,7 @@ class FloorState(SerializableModel):
         return False
 
 
-@dataclass
+@dataclass(slots=True)
 class SimulationEvent(SerializableModel):
     """模拟事件"""
 
@@ -354,6 +376,221 @@ class PerformanceMetrics(SerializableModel):
     #     return self.total_energy_consumption / self.completed_passengers
 
 
+# 乘客表的列（与 PassengerInfo 的字段同名），elevator_id 为 -1 表示 None
+PASSENGER_COLUMNS: Tuple[Tuple[str, str], ...] = (
+    ("origin", "<i4"),
+    ("destination", "<i4"),
+    ("arrive_tick", "<i4"),
+    ("pickup_tick", "<i4"),
+    ("dropoff_tick", "<i4"),
+    ("elevator_id", "<i4"),
+    ("arrived", "?"),
+)
+
+
+class PassengerRecord(PassengerInfo):
+    """
+    乘客表中一行的视图
+
+    字段的读写直接作用于 PassengerTable 的列，模拟器可以像修改 PassengerInfo 一样修改乘客；
+    视图在每次查询时创建，只保存表和行号
+    """
+
+    __slots__ = ("_table", "_row")
+
+    def __init__(self, table: "PassengerTable", row: int):
+        self._table = table
+        self._row = row
+
+    @property
+    def id(self) -> int:
+        return self._row + 1
+
+    @id.setter
+    def id(self, value: int) -> None:
+        raise AttributeError("Passenger id is the row of the passenger table and cannot be changed")
+
+    @property
+    def elevator_id(self) -> Optional[int]:
+        value = self._table._columns["elevator_id"].item(self._row)
+        return None if value < 0 else value
+
+    @elevator_id.setter
+    def elevator_id(self, value: Optional[int]) -> None:
+        self._table._columns["elevator_id"][self._row] = -1 if value is None else value
+
+
+def _column_property(name: str) -> property:
+    def get(self: PassengerRecord) -> Any:
+        return self._table._columns[name].item(self._row)
+
+    def set(self: PassengerRecord, value: Any) -> None:
+        self._table._columns[name][self._row] = value
+
+    return property(get, set)
+
+
+for _name, _ in PASSENGER_COLUMNS:
+    if _name != "elevator_id":
+        setattr(PassengerRecord, _name, _column_property(_name))
+
+
+class PassengerTable(MutableMapping[int, PassengerInfo]):
+    """
+    列存储的乘客表，按乘客ID访问（兼容原先的 Dict[int, PassengerInfo]）
+
+    乘客ID由流量按顺序从1开始分配，第 i 行为 ID=i+1 的乘客，每个字段一个NumPy数组，容量不足时按倍数扩展；
+    查询返回可写的 PassengerRecord 视图，按状态筛选、性能指标和强制完成直接在列上计算，不再逐个访问乘客对象
+    """
+
+    def __init__(self, capacity: int = 256):
+        self._size = 0
+        self._columns: Dict[str, np.ndarray] = {name: np.zeros(capacity, dtype) for name, dtype in PASSENGER_COLUMNS}
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(1, self._size + 1))
+
+    def __contains__(self, passenger_id: object) -> bool:
+        return isinstance(passenger_id, int) and 1 <= passenger_id <= self._size
+
+    def __getitem__(self, passenger_id: int) -> PassengerInfo:
+        if passenger_id not in self:
+            raise KeyError(passenger_id)
+        return PassengerRecord(self, passenger_id - 1)
+
+    def __setitem__(self, passenger_id: int, passenger: PassengerInfo) -> None:
+        """写入乘客；新乘客的ID必须是下一个ID（当前乘客数 + 1）"""
+        if passenger_id == self._size + 1:
+            if self._size == len(self._columns["origin"]):
+                self._grow()
+            self._size += 1
+        elif passenger_id not in self:
+            raise KeyError(
+                f"Passenger ids must be assigned sequentially, expected {self._size + 1}, got {passenger_id}"
+            )
+        row = passenger_id - 1
+        for name, _ in PASSENGER_COLUMNS:
+            value = getattr(passenger, name)
+            self._columns[name][row] = -1 if value is None else value
+
+    def __delitem__(self, passenger_id: int) -> None:
+        """删除乘客；ID即行号，只能删除最后一个乘客（其他ID按不存在处理，pop(k, default) 返回默认值）"""
+        if passenger_id not in self or passenger_id != self._size:
+            raise KeyError(passenger_id)
+        self._size -= 1
+        for column in self._columns.values():
+            column[self._size] = 0
+
+    def pop(self, passenger_id: int, *default: Any) -> Any:
+        """删除并返回乘客（行被清零，返回的是独立的 PassengerInfo）；不能删除的ID返回默认值，没有默认值时抛出 KeyError"""
+        if passenger_id not in self or passenger_id != self._size:
+            if default:
+                return default[0]
+            raise KeyError(passenger_id)
+        record = self[passenger_id]
+        passenger = PassengerInfo(id=passenger_id, **{name: getattr(record, name) for name, _ in PASSENGER_COLUMNS})
+        del self[passenger_id]
+        return passenger
+
+    def popitem(self) -> Tuple[int, PassengerInfo]:
+        """删除并返回最后一个乘客"""
+        if not self._size:
+            raise KeyError("popitem(): passenger table is empty")
+        passenger_id = self._size
+        return passenger_id, self.pop(passenger_id)
+
+    def clear(self) -> None:
+        for column in self._columns.values():
+            column[: self._size] = 0
+        self._size = 0
+
+    def _grow(self) -> None:
+        for name, column in self._columns.items():
+            grown = np.zeros(max(len(column) * 2, 1), column.dtype)
+            grown[: len(column)] = column
+            self._columns[name] = grown
+
+    def column(self, name: str) -> np.ndarray:
+        """某个字段的列（长度为乘客数的视图，修改会写回表中）"""
+        return self._columns[name][: self._size]
+
+    def status_mask(self, status: PassengerStatus) -> np.ndarray:
+        """处于某状态的乘客（与 PassengerInfo.status 的判断相同）"""
+        arrived = self.column("arrived")
+        if status == PassengerStatus.COMPLETED:
+            completed: np.ndarray = arrived.copy()
+            return completed
+        picked_up = self.column("pickup_tick") > 0
+        if status == PassengerStatus.IN_ELEVATOR:
+            return ~arrived & picked_up
+        if status == PassengerStatus.WAITING:
+            return ~arrived & ~picked_up
+        return np.zeros(self._size, bool)
+
+    def with_status(self, status: PassengerStatus) -> List[PassengerInfo]:
+        return [PassengerRecord(self, row) for row in np.flatnonzero(self.status_mask(status)).tolist()]
+
+    def complete_remaining(self, tick: int) -> None:
+        """把尚未上梯和下梯的乘客的上梯、下梯tick设为 tick（模拟到达最大时长时）"""
+        for name in ("pickup_tick", "dropoff_tick"):
+            column = self.column(name)
+            column[column == 0] = tick
+
+    def metrics(self) -> "PerformanceMetrics":
+        """性能指标（与 compute_performance_metrics 逐个乘客计算的结果相同）"""
+        completed = self.column("arrived")
+        count = int(np.count_nonzero(completed))
+        if not count:
+            return PerformanceMetrics(
+                completed_passengers=0,
+                total_passengers=self._size,
+                average_floor_wait_time=0,
+                p95_floor_wait_time=0,
+                average_arrival_wait_time=0,
+                p95_arrival_wait_time=0,
+            )
+        arrive = self.column("arrive_tick")[completed].astype(np.int64)
+        floor_wait = self.column("pickup_tick")[completed] - arrive
+        arrival_wait = self.column("dropoff_tick")[completed] - arrive
+        # 等待时间都是整数，整数求和再相除与逐个累加浮点数的结果完全相同
+        return PerformanceMetrics(
+            completed_passengers=count,
+            total_passengers=self._size,
+            average_floor_wait_time=int(floor_wait.sum()) / count,
+            p95_floor_wait_time=_average_excluding_top_percent(floor_wait, 5),
+            average_arrival_wait_time=int(arrival_wait.sum()) / count,
+            p95_arrival_wait_time=_average_excluding_top_percent(arrival_wait, 5),
+        )
+
+    def to_dict(self) -> Dict[int, Dict[str, Any]]:
+        """{ID: 乘客字典}，字段和顺序与 PassengerInfo.to_dict 相同"""
+        columns = [self.column(name).tolist() for name, _ in PASSENGER_COLUMNS]
+        result = {}
+        for row, (origin, destination, arrive, pickup, dropoff, elevator, arrived) in enumerate(zip(*columns)):
+            result[row + 1] = {
+                "id": row + 1,
+                "origin": origin,
+                "destination": destination,
+                "arrive_tick": arrive,
+                "pickup_tick": pickup,
+                "dropoff_tick": dropoff,
+                "arrived": arrived,
+                "elevator_id": None if elevator < 0 else elevator,
+            }
+        return result
+
+
+def _average_excluding_top_percent(data: np.ndarray, exclude_percent: int) -> float:
+    """排除掉最长的指定百分比后的平均值（整数等待时间）"""
+    keep_count = int(len(data) * (100 - exclude_percent) / 100)
+    if keep_count == 0:
+        return 0.0
+    return int(np.sort(data)[:keep_count].sum()) / keep_count
+
+
 @dataclass
 class SimulationState(SerializableModel):
     """模拟状态"""
@@ -361,7 +598,8 @@ class SimulationState(SerializableModel):
     tick: int
     elevators: List[ElevatorState]
     floors: List[FloorState]
-    passengers: Dict[int, PassengerInfo] = field(default_factory=dict)
+    # 服务端为列存储的 PassengerTable，客户端由响应构造的状态仍为普通字典
+    passengers: MutableMapping[int, PassengerInfo] = field(default_factory=PassengerTable)
     metrics: PerformanceMetrics = field(default_factory=PerformanceMetrics)
     events: List[SimulationEvent] = field(default_factory=list)
 
@@ -381,8 +619,17 @@ class SimulationState(SerializableModel):
 
     def get_passengers_by_status(self, status: PassengerStatus) -> List[PassengerInfo]:
         """根据状态获取乘客"""
+        if isinstance(self.passengers, PassengerTable):
+            return self.passengers.with_status(status)
         return [p for p in self.passengers.values() if p.status == status]
 
+    def performance_metrics(self) -> "PerformanceMetrics":
+        """根据当前乘客计算性能指标（乘客表直接在列上计算）"""
+        passengers = self.passengers
+        if isinstance(passengers, PassengerTable):
+            return passengers.metrics()
+        return compute_performance_metrics(passengers.values())
+
     def add_event(self, event_type: EventType, data: Dict[str, Any]) -> None:
         """添加事件"""
         event = SimulationEvent(tick=self.tick, type=event_type, data=data)
@@ -424,6 +671,8 @@ class StepResponse(SerializableModel):
     success: bool
     tick: int
     events: List[SimulationEvent] = field(default_factory=list)
+    checksum: Optional[int] = None  # 步进后状态的校验和，见 compute_state_checksum
+    server_time: Optional[float] = None  # 服务端处理本次步进的耗时（秒）
     request_id: Optional[str] = None
     error_message: Optional[str] = None
     timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
@@ -476,7 +725,7 @@ class GoToFloorCommand(SerializableModel):
 # ==================== 流量和配置数据模型 ====================
 
 
-@dataclass
+@dataclass(slots=True)
 class TrafficEntry(SerializableModel):
     """流量条目"""
 
@@ -541,3 +790,93 @@ def create_simple_traffic_pattern(name: str, passengers: List[Tuple[int, int, in
     return TrafficPattern(
         name=name, description=f"Simple traffic pattern with {len(passengers)} passengers", entries=entries
     )
+
+
+# ==================== 状态校验与统计 ====================
+
+
+# 校验和覆盖的乘客字段（由事件推演，性能指标由其计算）
+_CHECKSUM_PASSENGER_FIELDS = ("arrived", "arrive_tick", "pickup_tick", "dropoff_tick", "elevator_id")
+
+
+def _passenger_digest(passengers: Mapping[int, PassengerInfo]) -> Tuple[int, ...]:
+    """乘客数和各字段按乘客ID加权的和（None 计为 -1），乘客表直接在列上计算"""
+    if isinstance(passengers, PassengerTable):
+        ids = np.arange(1, len(passengers) + 1, dtype=np.int64)
+        sums = [int(ids @ passengers.column(name).astype(np.int64)) for name in _CHECKSUM_PASSENGER_FIELDS]
+        return (len(passengers), *sums)
+    sums = [0] * len(_CHECKSUM_PASSENGER_FIELDS)
+    for p in passengers.values():
+        elevator = -1 if p.elevator_id is None else p.elevator_id
+        values = (p.arrived, p.arrive_tick, p.pickup_tick, p.dropoff_tick, elevator)
+        for i, value in enumerate(values):
+            sums[i] += p.id * int(value)
+    return (len(passengers), *sums)
+
+
+def compute_state_checksum(state: SimulationState) -> int:
+    """
+    计算模拟状态的校验和（CRC32）
+
+    覆盖tick、电梯位置/目标/运行状态/轿厢乘客、楼层等待队列和乘客摘要（乘客数以及完成、到达、上梯、下梯和所乘电梯字段），
+    服务端随每次步进返回，客户端的本地状态镜像据此判断是否与服务端一致
+    """
+    elevators = [
+        (
+            e.position.current_floor,
+            e.position.floor_up_position,
+            e.position.target_floor,
+            e.next_target_floor,
+            e.run_status.value,
+            e.last_tick_direction.value,
+            e.passengers,
+        )
+        for e in state.elevators
+    ]
+    floors = [(f.up_queue, f.down_queue) for f in state.floors]
+    payload = repr((state.tick, elevators, floors, _passenger_digest(state.passengers)))
+    return zlib.crc32(payload.encode("utf-8"))
+
+
+def compute_performance_metrics(passengers: Union[PassengerTable, Iterable[PassengerInfo]]) -> PerformanceMetrics:
+    """根据乘客信息计算性能指标，传入 PassengerTable 时直接在列上计算"""
+    if isinstance(passengers, PassengerTable):
+        return passengers.metrics()
+    passenger_list = list(passengers)
+    completed = [p for p in passenger_list if p.status == PassengerStatus.COMPLETED]
+
+    total_passengers = len(passenger_list)
+    if not completed:
+        return PerformanceMetrics(
+            completed_passengers=0,
+            total_passengers=total_passengers,
+            average_floor_wait_time=0,
+            p95_floor_wait_time=0,
+            average_arrival_wait_time=0,
+            p95_arrival_wait_time=0,
+        )
+
+    floor_wait_times = [float(p.floor_wait_time) for p in completed]
+    arrival_wait_times = [float(p.arrival_wait_time) for p in completed]
+
+    def average_excluding_top_percent(data: List[float], exclude_percent: int) -> float:
+        """计算排除掉最长的指定百分比后的平均值"""
+        if not data:
+            return 0.0
+        sorted_data = sorted(data)
+        # 计算要保留的数据数量（排除掉最长的 exclude_percent）
+        keep_count = int(len(sorted_data) * (100 - exclude_percent) / 100)
+        if keep_count == 0:
+            return 0.0
+        # 只保留前 keep_count 个数据，排除最长的部分
+        kept_data = sorted_data[:keep_count]
+        return sum(kept_data) / len(kept_data)
+
+    return PerformanceMetrics(
+        completed_passengers=len(completed),
+        total_passengers=total_passengers,
+        average_floor_wait_time=sum(floor_wait_times) / len(floor_wait_times) if floor_wait_times else 0,
+        p95_floor_wait_time=average_excluding_top_percent(floor_wait_times, 5),
+        average_arrival_wait_time=sum(arrival_wait_times) / len(arrival_wait_times) if arrival_wait_times else 0,
+        p95_arrival_wait_time=average_excluding_top_percent(arrival_wait_times, 5),
+    )
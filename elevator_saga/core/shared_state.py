@@ -0,0 +1,469 @@
+#!/usr/bin/env python3
+"""
+Shared-Memory State Channel
+服务端把每个tick的电梯、楼层和乘客状态写入 multiprocessing.shared_memory 中的定长数组，
+同机运行的客户端直接映射读取，不经过HTTP和JSON
+
+布局（按8字节对齐依次排列）：
+    header                 1 x HEADER_DTYPE
+    elevators              E x ELEVATOR_DTYPE
+    elevator_passengers    E x slots int32（轿厢内乘客ID，slots 为电梯容量）
+    floors                 F x FLOOR_DTYPE（up/down 队列在 queue 中的起点和长度）
+    queue                  queue_capacity int32（所有楼层等待队列首尾相接）
+    passengers             passenger_capacity x PASSENGER_DTYPE（第 i 行为 ID=i+1 的乘客）
+
+写入使用顺序锁（seqlock）：写前 seq 加一变为奇数，写完再加一变为偶数；
+读者复制数据前后 seq 相同且为偶数时数据一致，否则重试。容量不足时写入方以更大的容量重建同名内存段，
+并在旧内存段上标记 superseded，读者发现后重新映射
+"""
+import time
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+
+from elevator_saga.core.models import (
+    Direction,
+    ElevatorState,
+    ElevatorStatus,
+    FloorState,
+    PassengerInfo,
+    PassengerTable,
+    Position,
+    SimulationState,
+    compute_performance_metrics,
+)
+
+HEADER_DTYPE = np.dtype(
+    [
+        ("seq", "<u8"),
+        ("superseded", "<u8"),
+        ("tick", "<i8"),
+        ("elevators", "<i4"),
+        ("floors", "<i4"),
+        ("slots", "<i4"),
+        ("queue_capacity", "<i4"),
+        ("passenger_capacity", "<i4"),
+        ("passengers", "<i4"),
+    ]
+)
+ELEVATOR_DTYPE = np.dtype(
+    [
+        ("current_floor", "<i4"),
+        ("floor_up_position", "<i4"),
+        ("target_floor", "<i4"),
+        ("next_target_floor", "<i4"),  # -1 表示 None
+        ("run_status", "i1"),
+        ("last_tick_direction", "i1"),
+        ("passenger_count", "<i4"),
+        ("max_capacity", "<i4"),
+    ]
+)
+FLOOR_DTYPE = np.dtype([("up_start", "<i4"), ("up_count", "<i4"), ("down_start", "<i4"), ("down_count", "<i4")])
+PASSENGER_DTYPE = np.dtype(
+    [
+        ("present", "i1"),
+        ("arrived", "i1"),
+        ("origin", "<i4"),
+        ("destination", "<i4"),
+        ("arrive_tick", "<i4"),
+        ("pickup_tick", "<i4"),
+        ("dropoff_tick", "<i4"),
+        ("elevator_id", "<i4"),  # -1 表示 None
+    ]
+)
+
+# 与 PassengerTable 的列同名的字段（present 以外），整表发布时按列复制
+_PASSENGER_TABLE_FIELDS = (
+    "arrived",
+    "origin",
+    "destination",
+    "arrive_tick",
+    "pickup_tick",
+    "dropoff_tick",
+    "elevator_id",
+)
+
+# 枚举在共享内存中按定义顺序编码为小整数
+RUN_STATUS_CODES: Dict[ElevatorStatus, int] = {status: i for i, status in enumerate(ElevatorStatus)}
+DIRECTION_CODES: Dict[Direction, int] = {direction: i for i, direction in enumerate(Direction)}
+_RUN_STATUSES = list(ElevatorStatus)
+_DIRECTIONS = list(Direction)
+
+DEFAULT_QUEUE_CAPACITY = 4096
+DEFAULT_PASSENGER_CAPACITY = 4096
+
+# 读者在写入进行中时的最大重试次数
+_MAX_READ_ATTEMPTS = 10000
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+class _Layout:
+    """按给定容量计算各数组在内存段中的偏移，并在缓冲区上创建视图"""
+
+    def __init__(self, elevators: int, floors: int, slots: int, queue_capacity: int, passenger_capacity: int):
+        self.elevators = elevators
+        self.floors = floors
+        self.slots = slots
+        self.queue_capacity = queue_capacity
+        self.passenger_capacity = passenger_capacity
+        sizes = [
+            ("header", HEADER_DTYPE.itemsize),
+            ("elevators", elevators * ELEVATOR_DTYPE.itemsize),
+            ("elevator_passengers", elevators * slots * 4),
+            ("floors", floors * FLOOR_DTYPE.itemsize),
+            ("queue", queue_capacity * 4),
+            ("passengers", passenger_capacity * PASSENGER_DTYPE.itemsize),
+        ]
+        self.offsets: Dict[str, int] = {}
+        offset = 0
+        for name, size in sizes:
+            self.offsets[name] = offset
+            offset = _align(offset + size)
+        self.size = max(offset, 8)
+
+    @classmethod
+    def from_header(cls, header: np.ndarray) -> "_Layout":
+        return cls(
+            int(header["elevators"]),
+            int(header["floors"]),
+            int(header["slots"]),
+            int(header["queue_capacity"]),
+            int(header["passenger_capacity"]),
+        )
+
+    def views(self, buf: memoryview) -> "SharedStateViews":
+        o = self.offsets
+        return SharedStateViews(
+            header=np.ndarray((), HEADER_DTYPE, buf, o["header"]),
+            elevators=np.ndarray((self.elevators,), ELEVATOR_DTYPE, buf, o["elevators"]),
+            elevator_passengers=np.ndarray((self.elevators, self.slots), np.int32, buf, o["elevator_passengers"]),
+            floors=np.ndarray((self.floors,), FLOOR_DTYPE, buf, o["floors"]),
+            queue=np.ndarray((self.queue_capacity,), np.int32, buf, o["queue"]),
+            passengers=np.ndarray((self.passenger_capacity,), PASSENGER_DTYPE, buf, o["passengers"]),
+        )
+
+
+class SharedStateViews:
+    """内存段上各数组的视图（零拷贝；直接读取时可能看到写入中的数据）"""
+
+    def __init__(
+        self,
+        header: np.ndarray,
+        elevators: np.ndarray,
+        elevator_passengers: np.ndarray,
+        floors: np.ndarray,
+        queue: np.ndarray,
+        passengers: np.ndarray,
+    ):
+        self.header = header
+        self.elevators = elevators
+        self.elevator_passengers = elevator_passengers
+        self.floors = floors
+        self.queue = queue
+        self.passengers = passengers
+
+    def copy(self) -> "SharedStateViews":
+        """复制出一份独立的数组（乘客表只复制已发布的行）"""
+        count = int(self.header["passengers"])
+        return SharedStateViews(
+            header=self.header.copy(),
+            elevators=self.elevators.copy(),
+            elevator_passengers=self.elevator_passengers.copy(),
+            floors=self.floors.copy(),
+            queue=self.queue.copy(),
+            passengers=self.passengers[:count].copy(),
+        )
+
+
+def attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """映射已有的共享内存段；不交给 resource_tracker 管理，避免读者退出时删除服务端的内存段"""
+    shm = shared_memory.SharedMemory(name=name, create=False)
+    try:
+        resource_tracker.unregister(shm._name, "shared_memory")  # type: ignore[attr-defined]
+    except Exception:
+        pass
+    return shm
+
+
+def _max_passenger_id(passengers: Mapping[int, PassengerInfo]) -> int:
+    """最大乘客ID（乘客表的ID从1连续分配，即乘客数）"""
+    if isinstance(passengers, PassengerTable):
+        return len(passengers)
+    return max(passengers, default=0)
+
+
+class SharedStateWriter:
+    """共享内存状态的写入方（服务端）"""
+
+    def __init__(
+        self,
+        name: str,
+        queue_capacity: int = DEFAULT_QUEUE_CAPACITY,
+        passenger_capacity: int = DEFAULT_PASSENGER_CAPACITY,
+    ):
+        self.name = name
+        self._queue_capacity = queue_capacity
+        self._passenger_capacity = passenger_capacity
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._layout: Optional[_Layout] = None
+        self._views: Optional[SharedStateViews] = None
+        self._seq = 0
+        self._passenger_count = 0
+        self.publishes = 0
+
+    def publish(self, state: SimulationState, passenger_ids: Optional[Iterable[int]] = None) -> None:
+        """
+        发布状态
+
+        Args:
+            state: 当前模拟状态
+            passenger_ids: 本次有变化的乘客ID；None表示重写整个乘客表
+        """
+        elevators, floors = state.elevators, state.floors
+        slots = max((e.max_capacity for e in elevators), default=0)
+        slots = max([slots] + [len(e.passengers) for e in elevators])
+        queue_len = sum(len(f.up_queue) + len(f.down_queue) for f in floors)
+        # 乘客表的行数为最大乘客ID；增量发布时只需要看变化的ID
+        if passenger_ids is None:
+            passenger_count = _max_passenger_id(state.passengers)
+        else:
+            passenger_ids = list(passenger_ids)
+            passenger_count = max([self._passenger_count] + passenger_ids)
+
+        layout = self._layout
+        if (
+            layout is None
+            or (layout.elevators, layout.floors) != (len(elevators), len(floors))
+            or layout.slots < slots
+            or layout.queue_capacity < queue_len
+            or layout.passenger_capacity < passenger_count
+        ):
+            while self._queue_capacity < queue_len:
+                self._queue_capacity *= 2
+            while self._passenger_capacity < passenger_count:
+                self._passenger_capacity *= 2
+            self._recreate(_Layout(len(elevators), len(floors), slots, self._queue_capacity, self._passenger_capacity))
+            if passenger_ids is not None:
+                passenger_count = _max_passenger_id(state.passengers)
+                passenger_ids = None
+        views = self._views
+        assert views is not None
+
+        header = views.header
+        self._seq += 1
+        header["seq"] = self._seq
+        try:
+            header["tick"] = state.tick
+            self._write_elevators(views, elevators)
+            self._write_floors(views, floors)
+            self._write_passengers(views, state.passengers, passenger_ids)
+            header["passengers"] = self._passenger_count = passenger_count
+        finally:
+            self._seq += 1
+            header["seq"] = self._seq
+        self.publishes += 1
+
+    @staticmethod
+    def _write_elevators(views: SharedStateViews, elevators: List[ElevatorState]) -> None:
+        rows = views.elevators
+        for i, e in enumerate(elevators):
+            position = e.position
+            rows[i] = (
+                position.current_floor,
+                position.floor_up_position,
+                position.target_floor,
+                -1 if e.next_target_floor is None else e.next_target_floor,
+                RUN_STATUS_CODES[e.run_status],
+                DIRECTION_CODES[e.last_tick_direction],
+                len(e.passengers),
+                e.max_capacity,
+            )
+            views.elevator_passengers[i, : len(e.passengers)] = e.passengers
+
+    @staticmethod
+    def _write_floors(views: SharedStateViews, floors: List[FloorState]) -> None:
+        rows, queue = views.floors, views.queue
+        offset = 0
+        for i, f in enumerate(floors):
+            up, down = len(f.up_queue), len(f.down_queue)
+            rows[i] = (offset, up, offset + up, down)
+            queue[offset : offset + up] = f.up_queue
+            queue[offset + up : offset + up + down] = f.down_queue
+            offset += up + down
+
+    @staticmethod
+    def _write_passengers(
+        views: SharedStateViews, passengers: Mapping[int, PassengerInfo], passenger_ids: Optional[Iterable[int]]
+    ) -> None:
+        rows = views.passengers
+        if passenger_ids is None and isinstance(passengers, PassengerTable):
+            # 乘客表的列与共享内存的字段一一对应，整列复制
+            count = len(passengers)
+            rows[:count]["present"] = 1
+            for name in _PASSENGER_TABLE_FIELDS:
+                rows[:count][name] = passengers.column(name)
+            return
+        if passenger_ids is None:
+            rows[: _max_passenger_id(passengers)] = np.zeros(1, PASSENGER_DTYPE)
+            passenger_ids = passengers.keys()
+        for passenger_id in passenger_ids:
+            p = passengers.get(passenger_id)
+            if p is None:
+                continue
+            rows[passenger_id - 1] = (
+                1,
+                p.arrived,
+                p.origin,
+                p.destination,
+                p.arrive_tick,
+                p.pickup_tick,
+                p.dropoff_tick,
+                -1 if p.elevator_id is None else p.elevator_id,
+            )
+
+    def _recreate(self, layout: _Layout) -> None:
+        """以新的容量重建同名内存段"""
+        self._release(superseded=True)
+        try:
+            shm = shared_memory.SharedMemory(name=self.name, create=True, size=layout.size)
+        except FileExistsError:
+            # 上次运行异常退出后遗留的内存段
+            stale = attach_shared_memory(self.name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=self.name, create=True, size=layout.size)
+        assert shm.buf is not None
+        self._shm, self._layout, self._views = shm, layout, layout.views(shm.buf)
+        header = self._views.header
+        header["seq"] = self._seq
+        header["superseded"] = 0
+        header["elevators"] = layout.elevators
+        header["floors"] = layout.floors
+        header["slots"] = layout.slots
+        header["queue_capacity"] = layout.queue_capacity
+        header["passenger_capacity"] = layout.passenger_capacity
+        header["passengers"] = 0
+
+    def _release(self, superseded: bool) -> None:
+        if self._shm is None:
+            return
+        if superseded and self._views is not None:
+            self._views.header["superseded"] = 1
+        self._views = None
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+        self._layout = None
+
+    def close(self) -> None:
+        """删除内存段"""
+        self._release(superseded=True)
+
+
+class SharedStateReader:
+    """共享内存状态的读取方（客户端）"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._views: Optional[SharedStateViews] = None
+        self.retries = 0
+        self._attach()
+
+    def _attach(self) -> None:
+        self._detach()
+        try:
+            shm = attach_shared_memory(self.name)
+        except FileNotFoundError:
+            raise RuntimeError(f"Shared memory segment {self.name!r} does not exist; is the server publishing it?")
+        assert shm.buf is not None
+        header = np.ndarray((), HEADER_DTYPE, shm.buf, 0)
+        self._shm, self._views = shm, _Layout.from_header(header).views(shm.buf)
+
+    def _detach(self) -> None:
+        self._views = None
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+    @property
+    def views(self) -> SharedStateViews:
+        """零拷贝视图，读取时不做一致性检查"""
+        if self._views is None or self._views.header["superseded"]:
+            self._attach()
+        assert self._views is not None
+        return self._views
+
+    def read_arrays(self) -> SharedStateViews:
+        """读取一份一致的数组副本"""
+        for _ in range(_MAX_READ_ATTEMPTS):
+            try:
+                views = self.views
+            except RuntimeError:
+                # 写入方正在重建内存段
+                time.sleep(0.001)
+                continue
+            header = views.header
+            seq = int(header["seq"])
+            if seq % 2 == 0 and not header["superseded"]:
+                snapshot = views.copy()
+                if int(header["seq"]) == seq and not header["superseded"]:
+                    return snapshot
+            self.retries += 1
+            time.sleep(0)
+        raise RuntimeError(f"Could not read a consistent state from shared memory {self.name!r}")
+
+    def read_state(self) -> SimulationState:
+        """读取并构造完整的 SimulationState（与 GET /api/state 的内容一致）"""
+        arrays = self.read_arrays()
+        elevators: List[ElevatorState] = []
+        for i, row in enumerate(arrays.elevators.tolist()):
+            current_floor, floor_up_position, target_floor, next_target, run_status, last_dir, count, capacity = row
+            elevators.append(
+                ElevatorState(
+                    id=i,
+                    position=Position(current_floor, target_floor, floor_up_position),
+                    next_target_floor=None if next_target < 0 else next_target,
+                    passengers=arrays.elevator_passengers[i, :count].tolist(),
+                    max_capacity=capacity,
+                    run_status=_RUN_STATUSES[run_status],
+                    last_tick_direction=_DIRECTIONS[last_dir],
+                )
+            )
+        queue = arrays.queue
+        floors = [
+            FloorState(
+                floor=i,
+                up_queue=queue[up_start : up_start + up_count].tolist(),
+                down_queue=queue[down_start : down_start + down_count].tolist(),
+            )
+            for i, (up_start, up_count, down_start, down_count) in enumerate(arrays.floors.tolist())
+        ]
+        passengers: Dict[int, PassengerInfo] = {}
+        for index, row in enumerate(arrays.passengers.tolist()):
+            present, arrived, origin, destination, arrive_tick, pickup_tick, dropoff_tick, elevator_id = row
+            if present:
+                passengers[index + 1] = PassengerInfo(
+                    id=index + 1,
+                    origin=origin,
+                    destination=destination,
+                    arrive_tick=arrive_tick,
+                    pickup_tick=pickup_tick,
+                    dropoff_tick=dropoff_tick,
+                    arrived=bool(arrived),
+                    elevator_id=None if elevator_id < 0 else elevator_id,
+                )
+        return SimulationState(
+            tick=int(arrays.header["tick"]),
+            elevators=elevators,
+            floors=floors,
+            passengers=passengers,
+            metrics=compute_performance_metrics(passengers.values()),
+        )
+
+    def close(self) -> None:
+        self._detach()
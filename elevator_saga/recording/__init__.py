@@ -0,0 +1,3 @@
+"""
+Simulation recording and replay
+"""
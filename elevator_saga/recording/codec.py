@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Keyframe + Delta Codec
+关键帧 + 增量编码：每隔 keyframe_interval 帧保存一个完整关键帧，其余帧只保存相对上一帧变化的字段
+（例如只有 floor_up_position 变化的电梯只记录这一个字段），读取时从最近的关键帧开始依次应用增量还原任意帧
+"""
+
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+# 默认关键帧间隔（帧数），随机访问最多需要应用这么多个增量
+DEFAULT_KEYFRAME_INTERVAL = 100
+
+# 每帧重新产生的日志字段（不是状态），按行编码而不是与上一帧比较
+DEFAULT_LOG_KEYS = ("events",)
+
+# 编码后记录的键
+KEYFRAME = "key"  # 完整帧
+SCHEMAS = "schemas"  # 行结构定义 [路径列表, 类型字段位置, 类型]：关键帧中为完整列表，增量中为新增的 [编号, 定义]
+REPLACE = "set"  # 整体替换的顶层字段
+ITEMS = "items"  # 字典列表：[[下标, 字段序号, 值, 字段序号, 值, ...], ...]
+KEYED = "keyed"  # 以ID为键的字典：{"upd": {ID: [字段序号, 值, ...]}, "add": {ID: 完整条目}, "del": [ID]}
+FIELDS = "fields"  # 普通字典：[字段序号, 值, ...]
+ROWS = "rows"  # 日志字段：[[结构编号, 值, ...], ...]
+REMOVED = "del"  # 删除的顶层字段
+
+# 字段序号均为该字典在上一帧中的键顺序，解码时从上一帧得到，不需要另外保存
+
+# 行的类型字段（如事件的 type）取值相同的行共用结构定义，行内不再重复保存
+ROW_TAG = "type"
+
+_Path = Tuple[str, ...]
+_MISSING = object()
+
+
+def _same_keys(old: Dict[str, Any], new: Dict[str, Any]) -> bool:
+    return len(old) == len(new) and all(key in old for key in new)
+
+
+def _field_changes(old: Dict[str, Any], new: Dict[str, Any]) -> List[Any]:
+    """变化的字段，展开为 [字段序号, 值, ...]"""
+    changes: List[Any] = []
+    for position, (key, value) in enumerate(old.items()):
+        new_value = new[key]
+        if new_value != value:
+            changes.append(position)
+            changes.append(new_value)
+    return changes
+
+
+def _apply_changes(old: Dict[str, Any], changes: List[Any]) -> Dict[str, Any]:
+    keys = list(old)
+    item = dict(old)
+    for offset in range(0, len(changes), 2):
+        item[keys[changes[offset]]] = changes[offset + 1]
+    return item
+
+
+def _diff_items(old: List[Any], new: List[Any]) -> Optional[List[List[Any]]]:
+    """字典列表的逐项字段差异，结构不同（长度或字段集合变化）时返回 None"""
+    if len(old) != len(new):
+        return None
+    changes: List[List[Any]] = []
+    for index, (old_item, new_item) in enumerate(zip(old, new)):
+        if old_item == new_item:
+            continue
+        if not (isinstance(old_item, dict) and isinstance(new_item, dict) and _same_keys(old_item, new_item)):
+            return None
+        changes.append([index] + _field_changes(old_item, new_item))
+    return changes
+
+
+def _diff_keyed(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """值为字典的字典：新增、删除和变化的字段"""
+    updated: Dict[str, Any] = {}
+    added: Dict[str, Any] = {}
+    for key, value in new.items():
+        old_value = old.get(key)
+        if old_value is None or not _same_keys(old_value, value):
+            added[key] = value
+        elif old_value != value:
+            updated[key] = _field_changes(old_value, value)
+    removed = [key for key in old if key not in new]
+    patch: Dict[str, Any] = {}
+    if updated:
+        patch["upd"] = updated
+    if added:
+        patch["add"] = added
+    if removed:
+        patch["del"] = removed
+    return patch
+
+
+def _is_dict_list(value: Any) -> bool:
+    return isinstance(value, list) and all(isinstance(item, dict) for item in value)
+
+
+def _is_keyed(value: Any) -> bool:
+    return isinstance(value, dict) and all(isinstance(item, dict) for item in value.values())
+
+
+def _flatten(value: Dict[str, Any], prefix: _Path, paths: List[_Path], values: List[Any]) -> None:
+    """把嵌套字典展开为 (路径, 值)，空字典视为值"""
+    for key, item in value.items():
+        if isinstance(item, dict) and item:
+            _flatten(item, prefix + (key,), paths, values)
+        else:
+            paths.append(prefix + (key,))
+            values.append(item)
+
+
+def _unflatten(paths: Sequence[Sequence[str]], values: Sequence[Any]) -> Dict[str, Any]:
+    result: Dict[str, Any] = {}
+    for path, value in zip(paths, values):
+        target = result
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = value
+    return result
+
+
+class FrameEncoder:
+    """
+    按顺序编码一个场景的帧，每 keyframe_interval 帧输出一个关键帧
+
+    增量按字段类型选择编码：字典列表（电梯、楼层）记录变化条目的变化字段，以ID为键的字典（乘客）
+    记录新增、删除和变化字段，普通字典（指标）记录变化字段，log_keys 中的日志字段（事件）按行结构编码
+    """
+
+    def __init__(self, keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL, log_keys: Sequence[str] = DEFAULT_LOG_KEYS):
+        if keyframe_interval < 1:
+            raise ValueError(f"keyframe_interval must be positive, got {keyframe_interval}")
+        self.keyframe_interval = keyframe_interval
+        self.log_keys = frozenset(log_keys)
+        self.frames = 0
+        self._previous: Optional[Dict[str, Any]] = None
+        self._schemas: Dict[Tuple[Any, ...], int] = {}
+        self._schema_defs: List[List[Any]] = []
+
+    def encode(self, frame: Dict[str, Any]) -> Dict[str, Any]:
+        """编码下一帧，返回关键帧记录或增量记录"""
+        previous = self._previous
+        self._previous = frame
+        self.frames += 1
+        if previous is None or (self.frames - 1) % self.keyframe_interval == 0:
+            return {KEYFRAME: frame, SCHEMAS: list(self._schema_defs)}
+        return self._encode_delta(previous, frame)
+
+    def snapshot(self) -> Optional[Dict[str, Any]]:
+        """
+        最近编码的一帧作为关键帧记录（含全部行结构），没有编码过帧时返回None
+
+        供中途加入的读取方从当前状态开始解码，之后的增量仍相对于该帧
+        """
+        if self._previous is None:
+            return None
+        return {KEYFRAME: self._previous, SCHEMAS: list(self._schema_defs)}
+
+    def _encode_delta(self, previous: Dict[str, Any], frame: Dict[str, Any]) -> Dict[str, Any]:
+        record: Dict[str, Any] = {}
+        replaced: Dict[str, Any] = {}
+        items: Dict[str, Any] = {}
+        keyed: Dict[str, Any] = {}
+        fields: Dict[str, Any] = {}
+        rows: Dict[str, Any] = {}
+        new_schemas: List[List[Any]] = []
+        for key, value in frame.items():
+            old = previous.get(key, _MISSING)
+            if key in self.log_keys and _is_dict_list(value):
+                if value or old:
+                    rows[key] = [self._encode_row(item, new_schemas) for item in value]
+                continue
+            if old is _MISSING:
+                replaced[key] = value
+                continue
+            if old == value:
+                continue
+            if _is_dict_list(old) and _is_dict_list(value):
+                changes = _diff_items(old, value)
+                if changes is not None:
+                    items[key] = changes
+                    continue
+            elif _is_keyed(old) and _is_keyed(value):
+                keyed[key] = _diff_keyed(old, value)
+                continue
+            elif isinstance(old, dict) and isinstance(value, dict) and _same_keys(old, value):
+                fields[key] = _field_changes(old, value)
+                continue
+            replaced[key] = value
+        removed = [key for key in previous if key not in frame]
+        for name, part in (
+            (SCHEMAS, new_schemas),
+            (REPLACE, replaced),
+            (ITEMS, items),
+            (KEYED, keyed),
+            (FIELDS, fields),
+            (ROWS, rows),
+            (REMOVED, removed),
+        ):
+            if part:
+                record[name] = part
+        return record
+
+    def _encode_row(self, item: Dict[str, Any], new_schemas: List[List[Any]]) -> List[Any]:
+        paths: List[_Path] = []
+        values: List[Any] = []
+        _flatten(item, (), paths, values)
+        tag_index, tag = -1, None
+        if isinstance(item.get(ROW_TAG), str):
+            tag_index = paths.index((ROW_TAG,))
+            tag = values.pop(tag_index)
+        key = (tuple(paths), tag_index, tag)
+        schema = self._schemas.get(key)
+        if schema is None:
+            schema = self._schemas[key] = len(self._schema_defs)
+            definition = [list(map(list, paths)), tag_index, tag]
+            self._schema_defs.append(definition)
+            new_schemas.append([schema, definition])
+        return [schema] + values
+
+
+class FrameDecoder:
+    """按顺序解码记录，返回的帧与后续帧共享未变化的部分，调用方不应修改"""
+
+    def __init__(self) -> None:
+        self.frame: Optional[Dict[str, Any]] = None
+        self._schemas: List[List[Any]] = []
+
+    def decode(self, record: Dict[str, Any]) -> Dict[str, Any]:
+        if KEYFRAME in record:
+            self.frame = record[KEYFRAME]
+            self._schemas = list(record.get(SCHEMAS, ()))
+            return self.frame
+        if self.frame is None:
+            raise ValueError("Delta record without a preceding keyframe")
+        for schema, definition in record.get(SCHEMAS, ()):
+            if schema != len(self._schemas):
+                raise ValueError(f"Unexpected row schema {schema}")
+            self._schemas.append(definition)
+
+        frame = dict(self.frame)
+        for key in record.get(REMOVED, ()):
+            frame.pop(key, None)
+        frame.update(record.get(REPLACE, {}))
+        for key, changes in record.get(ITEMS, {}).items():
+            values = list(frame[key])
+            for change in changes:
+                values[change[0]] = _apply_changes(values[change[0]], change[1:])
+            frame[key] = values
+        for key, patch in record.get(KEYED, {}).items():
+            entries = dict(frame[key])
+            for entry_key in patch.get("del", ()):
+                entries.pop(entry_key, None)
+            for entry_key, entry_changes in patch.get("upd", {}).items():
+                entries[entry_key] = _apply_changes(entries[entry_key], entry_changes)
+            entries.update(patch.get("add", {}))
+            frame[key] = entries
+        for key, changes in record.get(FIELDS, {}).items():
+            frame[key] = _apply_changes(frame[key], changes)
+        # 日志字段没有记录时与上一帧相同（均为空）
+        for key, key_rows in record.get(ROWS, {}).items():
+            frame[key] = [self._decode_row(row) for row in key_rows]
+        self.frame = frame
+        return frame
+
+    def _decode_row(self, row: List[Any]) -> Dict[str, Any]:
+        paths, tag_index, tag = self._schemas[row[0]]
+        values = row[1:]
+        if tag_index >= 0:
+            values.insert(tag_index, tag)
+        return _unflatten(paths, values)
+
+
+def is_keyframe(record: Dict[str, Any]) -> bool:
+    return KEYFRAME in record
+
+
+class FrameSequence:
+    """
+    已编码记录的随机访问
+
+    查询第 n 帧时从不晚于 n 的最近关键帧开始解码，最多应用 keyframe_interval - 1 个增量；
+    顺序访问时复用上一次的解码位置，每帧只应用一个增量
+    """
+
+    def __init__(self, records: Sequence[Dict[str, Any]]):
+        self.records = records
+        self.keyframes = [index for index, record in enumerate(records) if KEYFRAME in record]
+        if records and (not self.keyframes or self.keyframes[0] != 0):
+            raise ValueError("Encoded frames must start with a keyframe")
+        self._decoder = FrameDecoder()
+        self._position = -1
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        if index < 0:
+            index += len(self.records)
+        if not 0 <= index < len(self.records):
+            raise IndexError(f"Frame {index} out of range")
+        keyframe = self.keyframes[bisect_right(self.keyframes, index) - 1]
+        start = self._position + 1 if keyframe <= self._position <= index else keyframe
+        for position in range(start, index + 1):
+            self._decoder.decode(self.records[position])
+        self._position = index
+        return self._decoder.frame  # type: ignore[return-value]
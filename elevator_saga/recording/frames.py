@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Recording Frames
+把模拟状态转换为录制帧（index.html 读取的格式），服务端录制器和实时推送共用；
+帧中的电梯和楼层只按ID引用乘客，乘客信息保存在每个场景一份的乘客生命周期表中（见 passengers.py）
+"""
+from typing import Any, Dict, Iterable
+
+from elevator_saga.core.models import (
+    ElevatorState,
+    FloorState,
+    PerformanceMetrics,
+    SimulationEvent,
+    SimulationState,
+)
+
+
+def _value(item: Any) -> Any:
+    """枚举取值，其他类型转为字符串"""
+    return item.value if hasattr(item, "value") else str(item)
+
+
+def serialize_elevator(elevator: ElevatorState) -> Dict[str, Any]:
+    """电梯（含可视化使用的派生字段）"""
+    passengers = list(elevator.passengers)
+    return {
+        "id": elevator.id,
+        "current_floor": elevator.current_floor,
+        "current_floor_float": elevator.current_floor_float,
+        "target_floor": elevator.target_floor if elevator.target_floor is not None else elevator.current_floor,
+        "passengers": passengers,
+        "passenger_count": len(passengers),
+        "max_capacity": elevator.max_capacity,
+        "load_factor": len(passengers) / elevator.max_capacity if elevator.max_capacity > 0 else 0,
+        "run_status": _value(elevator.run_status),
+        "direction": _value(elevator.target_floor_direction),
+        "last_direction": _value(elevator.last_tick_direction),
+        "is_idle": elevator.is_idle,
+        "is_full": len(passengers) >= elevator.max_capacity,
+        "pressed_floors": elevator.pressed_floors,
+        "floor_up_position": elevator.position.floor_up_position,
+    }
+
+
+def serialize_floor(floor: FloorState) -> Dict[str, Any]:
+    """楼层"""
+    return {
+        "floor": floor.floor,
+        "up_queue": list(floor.up_queue),
+        "down_queue": list(floor.down_queue),
+        "up_queue_count": len(floor.up_queue),
+        "down_queue_count": len(floor.down_queue),
+        "total_waiting": len(floor.up_queue) + len(floor.down_queue),
+    }
+
+
+def serialize_metrics(metrics: PerformanceMetrics) -> Dict[str, Any]:
+    """性能指标"""
+    return {
+        "completed_passengers": metrics.completed_passengers,
+        "total_passengers": metrics.total_passengers,
+        "completion_rate": metrics.completion_rate,
+        "average_floor_wait_time": metrics.average_floor_wait_time,
+        "p95_floor_wait_time": metrics.p95_floor_wait_time,
+        "average_arrival_wait_time": metrics.average_arrival_wait_time,
+        "p95_arrival_wait_time": metrics.p95_arrival_wait_time,
+    }
+
+
+def serialize_event(event: SimulationEvent) -> Dict[str, Any]:
+    """事件"""
+    return {"tick": event.tick, "type": _value(event.type), "data": dict(event.data)}
+
+
+def build_frame(
+    tick: int,
+    elevators: Iterable[ElevatorState],
+    floors: Iterable[FloorState],
+    metrics: PerformanceMetrics,
+    events: Iterable[SimulationEvent],
+) -> Dict[str, Any]:
+    """
+    构造一帧
+
+    帧中的列表和字典都是新建的副本，之后修改模拟状态不会影响已构造的帧（录制写入在后台线程进行）
+    """
+    return {
+        "tick": tick,
+        "elevators": [serialize_elevator(elevator) for elevator in elevators],
+        "floors": [serialize_floor(floor) for floor in floors],
+        "metrics": serialize_metrics(metrics),
+        "events": [serialize_event(event) for event in events],
+    }
+
+
+def build_state_frame(state: SimulationState, events: Iterable[SimulationEvent]) -> Dict[str, Any]:
+    """由模拟状态和本tick的事件构造一帧（指标按当前乘客重新计算）"""
+    return build_frame(state.tick, state.elevators, state.floors, state.performance_metrics(), events)
+
+
+def building_info(state: SimulationState) -> Dict[str, Any]:
+    """建筑信息（楼层数、电梯数、载客量）"""
+    return {
+        "floors": len(state.floors),
+        "elevators": len(state.elevators),
+        "max_capacity": state.elevators[0].max_capacity if state.elevators else 0,
+    }
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Frame Index
+帧索引：记录场景帧文件中每隔 interval 帧的一个可独立解码的帧（增量编码时即关键帧）的字节偏移，
+读取任意帧区间时直接定位到不晚于起点的最近索引点，最多解码 interval - 1 个多余的帧，与录制长度无关
+"""
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from elevator_saga.recording.codec import FrameDecoder
+
+# 不使用增量编码（每帧都是完整帧）时的索引间隔
+DEFAULT_INDEX_INTERVAL = 100
+
+INDEX_SUFFIX = ".index.json"
+
+
+class FrameIndex:
+    """
+    场景的帧索引
+
+    offsets[k] 为第 k × interval 帧所在行的字节偏移；frames 和 size 为已索引的帧数和文件字节数
+    """
+
+    def __init__(self, interval: int, offsets: Optional[List[int]] = None, frames: int = 0, size: int = 0):
+        if interval < 1:
+            raise ValueError(f"Index interval must be positive, got {interval}")
+        self.interval = interval
+        self.offsets: List[int] = offsets if offsets is not None else []
+        self.frames = frames
+        self.size = size
+
+    def add(self, length: int) -> None:
+        """追加一帧（该帧所在行的字节数，含换行符）"""
+        if self.frames % self.interval == 0:
+            self.offsets.append(self.size)
+        self.frames += 1
+        self.size += length
+
+    def seek(self, frame: int) -> Tuple[int, int]:
+        """不晚于 frame 的最近索引点，返回 (帧序号, 字节偏移)"""
+        if not 0 <= frame < self.frames:
+            raise IndexError(f"Frame {frame} out of range 0..{self.frames - 1}")
+        point = frame // self.interval
+        return point * self.interval, self.offsets[point]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"interval": self.interval, "frames": self.frames, "size": self.size, "offsets": self.offsets}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FrameIndex":
+        return cls(data["interval"], list(data["offsets"]), data["frames"], data["size"])
+
+
+def index_interval(scenario: Dict[str, Any]) -> int:
+    """场景的索引间隔：增量编码时为关键帧间隔，保证每个索引点都是关键帧"""
+    if scenario.get("encoding", "plain") == "delta":
+        return int(scenario["keyframe_interval"])
+    return DEFAULT_INDEX_INTERVAL
+
+
+def index_file_name(frame_file: str) -> str:
+    return Path(frame_file).stem + INDEX_SUFFIX
+
+
+def build_index(path: Union[str, Path], interval: int) -> FrameIndex:
+    """扫描帧文件重建索引（用于没有索引的旧录制或未结束的场景），忽略写了一半的最后一行"""
+    return extend_index(path, FrameIndex(interval))
+
+
+def extend_index(path: Union[str, Path], index: FrameIndex) -> FrameIndex:
+    """从 index.size 处继续扫描仍在写入的帧文件，只读取新增的完整行"""
+    with open(path, "rb") as f:
+        f.seek(index.size)
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            index.add(len(line))
+    return index
+
+
+def load_index(directory: Union[str, Path], scenario: Dict[str, Any]) -> FrameIndex:
+    """读取场景（manifest 中的一项）的索引，没有索引文件时扫描帧文件重建"""
+    directory = Path(directory)
+    index_file = scenario.get("index")
+    if index_file and (directory / index_file).exists():
+        with open(directory / index_file, encoding="utf-8") as f:
+            return FrameIndex.from_dict(json.load(f))
+    return build_index(directory / scenario["file"], index_interval(scenario))
+
+
+def read_frame_range(
+    directory: Union[str, Path],
+    scenario: Dict[str, Any],
+    start: int,
+    count: int,
+    index: Optional[FrameIndex] = None,
+) -> List[Dict[str, Any]]:
+    """
+    读取并解码场景的第 start 帧起的至多 count 帧
+
+    Args:
+        directory: 录制目录
+        scenario: manifest 中的场景
+        start: 起始帧序号
+        count: 帧数，超出场景末尾时截断
+        index: 已加载的索引，默认调用 load_index
+    """
+    if count < 0:
+        raise ValueError(f"count must not be negative, got {count}")
+    index = index if index is not None else load_index(directory, scenario)
+    if count == 0 or start >= index.frames:
+        return []
+    first, offset = index.seek(start)
+    stop = min(start + count, index.frames)
+    delta = scenario.get("encoding", "plain") == "delta"
+    decoder = FrameDecoder()
+    frames: List[Dict[str, Any]] = []
+    with open(Path(directory) / scenario["file"], "rb") as f:
+        f.seek(offset)
+        for position in range(first, stop):
+            line = f.readline()
+            if not line.endswith(b"\n"):
+                break
+            if not delta and position < start:
+                continue
+            record = json.loads(line)
+            frame = decoder.decode(record) if delta else record
+            if position >= start:
+                frames.append(frame)
+    return frames
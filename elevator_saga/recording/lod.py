@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Level-of-Detail Tracks
+场景的粗粒度轨道：每隔 frame_interval 帧保存一个精简帧（不含乘客详情和事件），另按 series_interval 帧
+预先汇总完成人数、平均等待时间等指标的时间序列；可视化可以先用粗轨道绘制概览和快进，只在当前位置附近读取完整帧
+"""
+from pathlib import Path
+from typing import Any, Dict, List
+
+# 时间序列的采样间隔（帧数）
+DEFAULT_SERIES_INTERVAL = 10
+
+# 粗轨道帧间隔为索引间隔（关键帧间隔）的倍数
+DEFAULT_LOD_STRIDE = 1
+
+# 时间序列包含的指标
+SERIES_METRICS = (
+    "completed_passengers",
+    "total_passengers",
+    "completion_rate",
+    "average_floor_wait_time",
+    "average_arrival_wait_time",
+)
+
+# 粗轨道帧中清空的字段（保持帧结构，可视化可以直接渲染）
+LOD_EMPTY_FIELDS: Dict[str, Any] = {"passengers": {}, "events": []}
+
+LOD_SUFFIX = ".lod.json"
+
+
+def _sample(series: Dict[str, List[Any]], position: int, frame: Dict[str, Any]) -> None:
+    metrics = frame.get("metrics", {})
+    series["frame"].append(position)
+    series["tick"].append(frame.get("tick"))
+    for key in SERIES_METRICS:
+        series[key].append(metrics.get(key))
+
+
+class LodBuilder:
+    """按顺序接收场景的全部帧，生成粗轨道和指标时间序列"""
+
+    def __init__(self, frame_interval: int, series_interval: int = DEFAULT_SERIES_INTERVAL):
+        if frame_interval < 1 or series_interval < 1:
+            raise ValueError(f"LOD intervals must be positive, got {frame_interval} and {series_interval}")
+        self.frame_interval = frame_interval
+        self.series_interval = series_interval
+        self.frames = 0
+        self.lod_frames: List[Dict[str, Any]] = []
+        self.series: Dict[str, List[Any]] = {"frame": [], "tick": [], **{key: [] for key in SERIES_METRICS}}
+        self._last: Dict[str, Any] = {}
+
+    def add(self, frame: Dict[str, Any]) -> None:
+        position = self.frames
+        self.frames += 1
+        self._last = frame
+        if position % self.frame_interval == 0:
+            self.lod_frames.append({key: LOD_EMPTY_FIELDS.get(key, value) for key, value in frame.items()})
+        if position % self.series_interval == 0:
+            _sample(self.series, position, frame)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """粗轨道，时间序列总是包含最后一帧"""
+        series = {key: list(values) for key, values in self.series.items()}
+        if self.frames and (self.frames - 1) % self.series_interval:
+            _sample(series, self.frames - 1, self._last)
+        return {
+            "frame_interval": self.frame_interval,
+            "series_interval": self.series_interval,
+            "total_frames": self.frames,
+            "frames": self.lod_frames,
+            "series": series,
+        }
+
+
+def lod_file_name(frame_file: str) -> str:
+    return Path(frame_file).stem + LOD_SUFFIX
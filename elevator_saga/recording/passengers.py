@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Passenger Lifecycle Table
+乘客生命周期表：场景中每个乘客一行（ID、起点、终点、到达、上梯、下梯tick和所乘电梯），帧中只按ID引用乘客；
+表由帧中的呼叫、上梯和下梯事件生成，录制大小与乘客数加tick数成正比，而不是两者的乘积
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from elevator_saga.core.models import PassengerInfo
+
+# 表的列，未发生的上梯、下梯和电梯为 None
+PASSENGER_COLUMNS = ("id", "origin", "destination", "arrive", "pickup", "dropoff", "elevator")
+
+PASSENGERS_SUFFIX = ".passengers.json"
+
+_ARRIVAL_EVENTS = ("up_button_pressed", "down_button_pressed")
+
+
+class PassengerTableBuilder:
+    """按顺序接收场景的帧，根据事件维护乘客生命周期表"""
+
+    def __init__(self) -> None:
+        self.rows: Dict[int, List[Any]] = {}
+
+    def add(self, frame: Dict[str, Any]) -> None:
+        for event in frame.get("events", ()):
+            data = event["data"]
+            passenger = data.get("passenger")
+            if passenger is None:
+                continue
+            if event["type"] in _ARRIVAL_EVENTS:
+                self.rows[passenger] = [passenger, data["floor"], data["destination"], event["tick"], None, None, None]
+                continue
+            row = self.rows.get(passenger)
+            if row is None:
+                continue
+            if event["type"] == "passenger_board":
+                row[4] = event["tick"]
+                row[6] = data["elevator"]
+            elif event["type"] == "passenger_alight":
+                row[5] = event["tick"]
+
+    def merge(self, rows: Iterable[List[Any]]) -> None:
+        """
+        并入由模拟状态构造的行（见 passenger_rows）：新乘客整行加入，已有乘客只补充尚为 None 的列
+
+        录制或实时推送从场景中途开始时，之前到达的乘客没有对应的事件；到达最大时长被强制完成的乘客也没有下梯事件
+        """
+        for row in rows:
+            existing = self.rows.get(row[0])
+            if existing is None:
+                self.rows[row[0]] = list(row)
+                continue
+            for column, value in enumerate(row):
+                if existing[column] is None:
+                    existing[column] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"columns": list(PASSENGER_COLUMNS), "rows": [list(row) for row in self.rows.values()]}
+
+
+def passenger_rows(passengers: Iterable[PassengerInfo]) -> List[List[Any]]:
+    """由模拟状态中的乘客构造表的行（上梯、下梯tick为0表示尚未发生）"""
+    return [
+        [
+            p.id,
+            p.origin,
+            p.destination,
+            p.arrive_tick,
+            p.pickup_tick or None,
+            p.dropoff_tick or None,
+            p.elevator_id,
+        ]
+        for p in passengers
+    ]
+
+
+def passenger_records(table: Dict[str, Any]) -> Dict[int, Dict[str, Any]]:
+    """把表的行按列名展开，返回 {ID: 字典}（分析工具按需与帧中的ID关联）"""
+    columns = table["columns"]
+    return {row[0]: dict(zip(columns, row)) for row in table["rows"]}
+
+
+def passengers_file_name(frame_file: str) -> str:
+    return Path(frame_file).stem + PASSENGERS_SUFFIX
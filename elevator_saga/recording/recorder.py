@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Simulation Recorder
+服务端录制器：由 ElevatorSimulation 在每个tick处理结束时直接从内存中的状态构造帧，
+交给 RecordingWriter 在后台线程编码写入，不需要额外的状态请求
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from elevator_saga.core.models import SimulationEvent, SimulationState
+from elevator_saga.recording.codec import DEFAULT_KEYFRAME_INTERVAL
+from elevator_saga.recording.frames import build_state_frame, building_info, serialize_metrics
+from elevator_saga.recording.passengers import passenger_rows
+from elevator_saga.recording.writer import RecordingWriter
+
+
+class SimulationRecorder:
+    """
+    按场景录制模拟过程
+
+    begin_scenario 记录初始帧，record_tick 记录每个tick处理后的状态和本tick的事件，
+    end_scenario 写入最终指标；不在场景中时 record_tick 不做任何事
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        metadata: Optional[Dict[str, Any]] = None,
+        keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+    ):
+        self.writer = RecordingWriter(directory, metadata=metadata, keyframe_interval=keyframe_interval)
+        self.scenario: Optional[str] = None
+
+    @property
+    def directory(self) -> Path:
+        return self.writer.directory
+
+    def begin_scenario(self, name: str, state: SimulationState, max_tick: int) -> None:
+        """开始新场景（结束未结束的场景）并记录当前状态为第一帧；已到达的乘客直接写入乘客表"""
+        self.end_scenario(state)
+        self.scenario = name
+        self.writer.begin_scenario(
+            name,
+            passengers=passenger_rows(state.passengers.values()),
+            max_tick=max_tick,
+            building_info=building_info(state),
+        )
+        self.record_tick(state, [])
+
+    def record_tick(self, state: SimulationState, events: List[SimulationEvent]) -> None:
+        """由状态构造并记录一帧"""
+        if self.scenario is not None:
+            self.record_frame(build_state_frame(state, events))
+
+    def record_frame(self, frame: Dict[str, Any]) -> None:
+        """记录已构造的帧（由 build_state_frame 构造，与实时推送共用）"""
+        if self.scenario is not None:
+            self.writer.write_frame(frame)
+
+    def end_scenario(self, state: SimulationState) -> None:
+        """结束当前场景，记录最终指标，并用最终状态补全乘客表（强制完成的乘客没有下梯事件）"""
+        if self.scenario is None:
+            return
+        self.scenario = None
+        self.writer.end_scenario(
+            passengers=passenger_rows(state.passengers.values()),
+            final_metrics=serialize_metrics(state.performance_metrics()),
+        )
+
+    def close(self, state: Optional[SimulationState] = None) -> None:
+        """结束当前场景并等待全部写入完成"""
+        if state is not None:
+            self.end_scenario(state)
+        self.writer.close()
+
+    def status(self) -> Dict[str, Any]:
+        """录制状态"""
+        return {
+            "recording": True,
+            "directory": str(self.directory.resolve()),
+            "scenario": self.scenario,
+            "scenarios": len(self.writer.manifest["scenarios"]),
+            "pending_writes": self.writer.pending,
+        }
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Replay Store
+回放数据访问：列出录制目录下的录制，读取 manifest、粗粒度轨道和乘客生命周期表，按帧区间读取并解码场景帧；
+索引按场景缓存，仍在写入的场景只扫描新增的部分，回放服务（replay_server.py）在此之上提供HTTP接口
+"""
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Tuple, Union
+
+from elevator_saga.recording.index import (
+    FrameIndex,
+    extend_index,
+    load_index,
+    read_frame_range,
+)
+from elevator_saga.recording.writer import (
+    MANIFEST_NAME,
+    RECORDING_NAME_PATTERN,
+    load_lod,
+    load_passengers,
+    read_manifest,
+)
+
+# 单次请求最多返回的帧数
+MAX_RANGE_FRAMES = 1000
+
+
+class ReplayStore:
+    """
+    录制目录 root 下各录制的只读访问
+
+    录制名称不合法、区间参数不合法时抛出 ValueError；录制或场景不存在时抛出 LookupError
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        self.root = Path(root)
+        self._indexes: Dict[Tuple[str, int], FrameIndex] = {}
+        self._lods: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self._passengers: Dict[Tuple[str, int], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def recordings(self) -> List[Dict[str, Any]]:
+        """全部录制的摘要，最近修改的在前"""
+        if not self.root.is_dir():
+            return []
+        manifests = sorted(self.root.glob(f"*/{MANIFEST_NAME}"), key=lambda path: path.stat().st_mtime_ns, reverse=True)
+        result = []
+        for path in manifests:
+            manifest = read_manifest(path.parent)
+            result.append(
+                {
+                    "name": path.parent.name,
+                    "metadata": manifest["metadata"],
+                    "scenarios": [scenario["scenario_name"] for scenario in manifest["scenarios"]],
+                }
+            )
+        return result
+
+    def manifest(self, name: str) -> Dict[str, Any]:
+        return read_manifest(self._directory(name))
+
+    def index(self, name: str, scenario_index: int) -> FrameIndex:
+        """场景的帧索引；帧文件变长时（场景仍在录制）从上次的位置继续扫描"""
+        directory, scenario = self._scenario(name, scenario_index)
+        path = directory / scenario["file"]
+        size = path.stat().st_size
+        key = (name, scenario_index)
+        with self._lock:
+            index = self._indexes.get(key)
+            if index is None or index.size > size:
+                index = self._indexes[key] = load_index(directory, scenario)
+            if index.size < size:
+                extend_index(path, index)
+            return index
+
+    def lod(self, name: str, scenario_index: int) -> Dict[str, Any]:
+        """场景的粗粒度轨道；没有粗轨道文件时由全部帧生成，已结束的场景只生成一次"""
+        directory, scenario = self._scenario(name, scenario_index)
+        key = (name, scenario_index)
+        lod = self._lods.get(key)
+        if lod is None:
+            lod = load_lod(directory, scenario)
+            if scenario.get("complete"):
+                self._lods[key] = lod
+        return lod
+
+    def passengers(self, name: str, scenario_index: int) -> Dict[str, Any]:
+        """场景的乘客生命周期表；仍在录制的场景由已写入的帧生成，已结束的场景只读取一次"""
+        directory, scenario = self._scenario(name, scenario_index)
+        key = (name, scenario_index)
+        table = self._passengers.get(key)
+        if table is None:
+            table = load_passengers(directory, scenario)
+            if scenario.get("complete"):
+                self._passengers[key] = table
+        return table
+
+    def frames(self, name: str, scenario_index: int, start: int, count: int) -> Dict[str, Any]:
+        """读取第 start 帧起的至多 count 帧（不超过 MAX_RANGE_FRAMES）"""
+        if start < 0 or count < 0:
+            raise ValueError(f"Invalid frame range start={start} count={count}")
+        index = self.index(name, scenario_index)
+        directory, scenario = self._scenario(name, scenario_index)
+        frames = read_frame_range(directory, scenario, start, min(count, MAX_RANGE_FRAMES), index=index)
+        return {"start": start, "total_frames": index.frames, "frames": frames}
+
+    def _directory(self, name: str) -> Path:
+        if not RECORDING_NAME_PATTERN.fullmatch(name):
+            raise ValueError(f"Invalid recording name: {name!r}")
+        directory = self.root / name
+        if not (directory / MANIFEST_NAME).exists():
+            raise LookupError(f"Recording not found: {name}")
+        return directory
+
+    def _scenario(self, name: str, scenario_index: int) -> Tuple[Path, Dict[str, Any]]:
+        directory = self._directory(name)
+        scenarios = read_manifest(directory)["scenarios"]
+        if not 0 <= scenario_index < len(scenarios):
+            raise LookupError(f"Scenario {scenario_index} not found in recording {name}")
+        return directory, scenarios[scenario_index]
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Streaming Recording Writer
+流式录制：每个场景一个按行追加的帧文件（JSON Lines），另有 manifest.json 记录场景列表和摘要；
+帧按关键帧 + 增量编码（见 codec.py），场景结束时写入帧索引（见 index.py）、粗粒度轨道（见 lod.py）
+和乘客生命周期表（见 passengers.py）；
+编码、序列化和磁盘写入都在后台线程完成，
+tick循环只把帧放入队列，不会因I/O阻塞，进程中断时已写入的帧仍然可读
+"""
+
+import json
+import os
+import queue
+import re
+import threading
+import time
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Union
+
+from elevator_saga.recording.codec import (
+    DEFAULT_KEYFRAME_INTERVAL,
+    KEYFRAME,
+    FrameDecoder,
+    FrameEncoder,
+    FrameSequence,
+)
+from elevator_saga.recording.index import FrameIndex, index_file_name, index_interval
+from elevator_saga.recording.lod import DEFAULT_LOD_STRIDE, LodBuilder, lod_file_name
+from elevator_saga.recording.passengers import PassengerTableBuilder, passengers_file_name
+
+RECORDING_VERSION = "2.0"
+MANIFEST_NAME = "manifest.json"
+
+# 每写入多少帧刷新一次文件缓冲区，限制进程崩溃时丢失的帧数
+DEFAULT_FLUSH_EVERY = 100
+
+# 录制名称（录制目录名）只能包含字母、数字、下划线、连字符和点，且不能以点开头
+RECORDING_NAME_PATTERN = re.compile(r"[0-9A-Za-z_-][0-9A-Za-z_.-]*")
+
+_STOP = object()
+
+
+def _scenario_file_name(index: int, name: str) -> str:
+    safe_name = re.sub(r"[^0-9A-Za-z_-]+", "_", name) or "scenario"
+    return f"scenario_{index:03d}_{safe_name}.jsonl"
+
+
+def write_json_atomic(path: Path, data: Any, indent: Optional[int] = 2) -> None:
+    """先写临时文件再替换，读取方不会看到写了一半的文件"""
+    temp_path = path.with_name(path.name + ".tmp")
+    with open(temp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+    os.replace(temp_path, path)
+
+
+class RecordingWriter:
+    """
+    流式录制写入器
+
+    用法：begin_scenario -> 每tick write_frame -> end_scenario，重复各场景，最后 close。
+    除 close 外的方法只把任务放入队列后立即返回，后台线程按顺序执行；
+    后台线程出错后，下一次调用会抛出 RuntimeError
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        metadata: Optional[Dict[str, Any]] = None,
+        flush_every: int = DEFAULT_FLUSH_EVERY,
+        keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+        lod_stride: int = DEFAULT_LOD_STRIDE,
+    ):
+        """
+        Args:
+            directory: 录制目录，不存在时创建
+            metadata: 写入 manifest 的附加信息
+            flush_every: 每写入多少帧刷新一次文件
+            keyframe_interval: 关键帧间隔，0 表示每帧都保存完整帧
+            lod_stride: 粗轨道每隔多少个关键帧（索引点）保存一帧，0 表示不生成粗轨道
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self.keyframe_interval = keyframe_interval
+        self.lod_stride = lod_stride
+        self.manifest: Dict[str, Any] = {
+            "version": RECORDING_VERSION,
+            "metadata": dict(metadata or {}, recorded_at=time.strftime("%Y-%m-%d %H:%M:%S")),
+            "scenarios": [],
+        }
+        self.frames_written = 0
+        self._file: Optional[IO[bytes]] = None
+        self._scenario: Optional[Dict[str, Any]] = None
+        self._encoder: Optional[FrameEncoder] = None
+        self._index: Optional[FrameIndex] = None
+        self._lod: Optional[LodBuilder] = None
+        self._passengers: Optional[PassengerTableBuilder] = None
+        self._unflushed = 0
+        self._error: Optional[BaseException] = None
+        self._closed = False
+        self._queue: "queue.Queue[Any]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="recording-writer", daemon=True)
+        self._thread.start()
+        self._submit(self._write_manifest)
+
+    # ==================== 前台接口（只入队） ====================
+
+    def begin_scenario(self, name: str, passengers: Optional[List[List[Any]]] = None, **info: Any) -> None:
+        """
+        开始新场景，info 为写入 manifest 的附加信息（如 max_tick、building_info）
+
+        passengers 为场景中已有乘客的行（见 passenger_rows），从场景中途开始录制时用于补全乘客表
+        """
+        self._submit(self._begin_scenario, name, info, passengers)
+
+    def write_frame(self, frame: Dict[str, Any]) -> None:
+        """追加一帧；帧放入队列后不应再被修改"""
+        self._submit(self._write_frame, frame)
+
+    def end_scenario(self, passengers: Optional[List[List[Any]]] = None, **summary: Any) -> None:
+        """结束当前场景，summary 写入 manifest（如 final_metrics）；passengers 为最终状态的乘客行，补充没有事件的下梯tick"""
+        self._submit(self._end_scenario, summary, passengers)
+
+    def close(self) -> None:
+        """等待队列中的写入全部完成并关闭文件"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._raise_if_failed()
+
+    def __enter__(self) -> "RecordingWriter":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    @property
+    def pending(self) -> int:
+        """尚未写入磁盘的任务数"""
+        return self._queue.qsize()
+
+    def _submit(self, func: Callable[..., None], *args: Any) -> None:
+        self._raise_if_failed()
+        if self._closed:
+            raise RuntimeError("Recording writer is closed")
+        self._queue.put((func, args))
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f"Recording writer failed: {self._error}") from self._error
+
+    # ==================== 后台线程 ====================
+
+    def _run(self) -> None:
+        while True:
+            task = self._queue.get()
+            if task is _STOP:
+                break
+            if self._error is not None:
+                continue
+            func, args = task
+            try:
+                func(*args)
+            except BaseException as e:  # 记录后由前台调用抛出
+                self._error = e
+        try:
+            if self._scenario is not None:
+                self._end_scenario({})
+        except BaseException as e:
+            if self._error is None:
+                self._error = e
+
+    def _begin_scenario(self, name: str, info: Dict[str, Any], passengers: Optional[List[List[Any]]] = None) -> None:
+        if self._scenario is not None:
+            self._end_scenario({})
+        index = len(self.manifest["scenarios"]) + 1
+        self._scenario = {
+            "scenario_name": name,
+            "file": _scenario_file_name(index, name),
+            "total_frames": 0,
+            "complete": False,
+            "encoding": "delta" if self.keyframe_interval > 0 else "plain",
+            "keyframe_interval": self.keyframe_interval,
+            **info,
+        }
+        self._encoder = FrameEncoder(self.keyframe_interval) if self.keyframe_interval > 0 else None
+        self._index = FrameIndex(index_interval(self._scenario))
+        self._lod = LodBuilder(self._index.interval * self.lod_stride) if self.lod_stride > 0 else None
+        self._passengers = PassengerTableBuilder()
+        if passengers:
+            self._passengers.merge(passengers)
+        self.manifest["scenarios"].append(self._scenario)
+        # 以二进制写入，索引中的字节偏移与文件内容一致（不受平台换行符转换影响）
+        self._file = open(self.directory / self._scenario["file"], "wb")
+        self._unflushed = 0
+        self._write_manifest()
+
+    def _write_frame(self, frame: Dict[str, Any]) -> None:
+        if self._file is None or self._scenario is None or self._index is None:
+            raise RuntimeError("write_frame called before begin_scenario")
+        record = frame if self._encoder is None else self._encoder.encode(frame)
+        line = (json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+        self._file.write(line)
+        self._index.add(len(line))
+        if self._lod is not None:
+            self._lod.add(frame)
+        if self._passengers is not None:
+            self._passengers.add(frame)
+        self._scenario["total_frames"] += 1
+        self.frames_written += 1
+        self._unflushed += 1
+        if self._unflushed >= self.flush_every:
+            self._file.flush()
+            self._unflushed = 0
+
+    def _end_scenario(self, summary: Dict[str, Any], passengers: Optional[List[List[Any]]] = None) -> None:
+        if self._scenario is None:
+            return
+        if passengers and self._passengers is not None:
+            self._passengers.merge(passengers)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._index is not None:
+            self._scenario["index"] = index_file_name(self._scenario["file"])
+            write_json_atomic(self.directory / self._scenario["index"], self._index.to_dict(), indent=None)
+            self._index = None
+        if self._lod is not None:
+            self._scenario["lod"] = lod_file_name(self._scenario["file"])
+            write_json_atomic(self.directory / self._scenario["lod"], self._lod.to_dict(), indent=None)
+            self._lod = None
+        if self._passengers is not None:
+            self._scenario["passengers"] = passengers_file_name(self._scenario["file"])
+            write_json_atomic(self.directory / self._scenario["passengers"], self._passengers.to_dict(), indent=None)
+            self._passengers = None
+        self._scenario.update(summary)
+        self._scenario["complete"] = True
+        self._scenario = None
+        self._encoder = None
+        self._write_manifest()
+
+    def _write_manifest(self) -> None:
+        self.manifest["metadata"]["total_frames"] = self.frames_written
+        write_json_atomic(self.directory / MANIFEST_NAME, self.manifest)
+
+
+# ==================== 读取 ====================
+
+
+def read_manifest(directory: Union[str, Path]) -> Dict[str, Any]:
+    """读取录制目录的 manifest"""
+    with open(Path(directory) / MANIFEST_NAME, encoding="utf-8") as f:
+        manifest: Dict[str, Any] = json.load(f)
+    return manifest
+
+
+def iter_records(directory: Union[str, Path], scenario: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """逐行读取场景（manifest 中的一项）的原始记录，忽略进程中断时写了一半的最后一行"""
+    with open(Path(directory) / scenario["file"], encoding="utf-8") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            yield json.loads(line)
+
+
+def iter_frames(directory: Union[str, Path], scenario: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """逐帧读取并解码场景"""
+    if scenario.get("encoding", "plain") == "plain":
+        yield from iter_records(directory, scenario)
+        return
+    decoder = FrameDecoder()
+    for record in iter_records(directory, scenario):
+        yield decoder.decode(record)
+
+
+def load_frames(directory: Union[str, Path], scenario: Dict[str, Any]) -> FrameSequence:
+    """读取场景的全部记录（编码后的大小），返回可按下标随机访问的帧序列"""
+    records = list(iter_records(directory, scenario))
+    if scenario.get("encoding", "plain") == "plain":
+        records = [{KEYFRAME: frame} for frame in records]
+    return FrameSequence(records)
+
+
+def load_lod(directory: Union[str, Path], scenario: Dict[str, Any]) -> Dict[str, Any]:
+    """读取场景的粗轨道（见 lod.py），没有粗轨道文件时（旧录制或未结束的场景）读取全部帧生成"""
+    directory = Path(directory)
+    lod_file = scenario.get("lod")
+    if lod_file and (directory / lod_file).exists():
+        with open(directory / lod_file, encoding="utf-8") as f:
+            lod: Dict[str, Any] = json.load(f)
+        return lod
+    builder = LodBuilder(index_interval(scenario) * DEFAULT_LOD_STRIDE)
+    for frame in iter_frames(directory, scenario):
+        builder.add(frame)
+    return builder.to_dict()
+
+
+def load_passengers(directory: Union[str, Path], scenario: Dict[str, Any]) -> Dict[str, Any]:
+    """读取场景的乘客生命周期表（见 passengers.py），没有表文件时（未结束的场景）读取全部帧生成"""
+    directory = Path(directory)
+    passengers_file = scenario.get("passengers")
+    if passengers_file and (directory / passengers_file).exists():
+        with open(directory / passengers_file, encoding="utf-8") as f:
+            table: Dict[str, Any] = json.load(f)
+        return table
+    builder = PassengerTableBuilder()
+    for frame in iter_frames(directory, scenario):
+        builder.add(frame)
+    return builder.to_dict()
+
+
+def export_combined(directory: Union[str, Path], output: Union[str, Path]) -> int:
+    """
+    把录制目录导出为 index.html 读取的单文件格式（simulation_data.json）
+
+    逐帧流式写出，内存占用与总帧数无关
+
+    Returns:
+        导出的总帧数
+    """
+    directory = Path(directory)
+    manifest = read_manifest(directory)
+    scenarios: List[Dict[str, Any]] = manifest["scenarios"]
+    total_frames = 0
+    with open(output, "w", encoding="utf-8") as out:
+        metadata = dict(manifest["metadata"])
+        out.write(
+            '{"version":%s,"total_scenarios":%d,"metadata":%s,"scenarios":['
+            % (json.dumps(manifest["version"]), len(scenarios), json.dumps(metadata, ensure_ascii=False))
+        )
+        for scenario_index, scenario in enumerate(scenarios):
+            if scenario_index:
+                out.write(",")
+            header = {
+                key: value
+                for key, value in scenario.items()
+                if key not in ("file", "complete", "encoding", "keyframe_interval", "index", "lod", "passengers")
+            }
+            header["passenger_table"] = load_passengers(directory, scenario)
+            # 帧数以实际可读的帧为准
+            frames = 0
+            out.write('{"frames":[')
+            for frame in iter_frames(directory, scenario):
+                if frames:
+                    out.write(",")
+                out.write(json.dumps(frame, ensure_ascii=False, separators=(",", ":")))
+                frames += 1
+            header["total_frames"] = frames
+            out.write("],")
+            out.write(json.dumps(header, ensure_ascii=False)[1:])
+            total_frames += frames
+        out.write("]}")
+    return total_frames
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Keep-Alive Request Handler
+为werkzeug开发服务器启用HTTP/1.1长连接，使客户端可以在多个tick之间复用同一个TCP连接
+"""
+import socket
+import traceback
+from typing import IO, Any, Callable, List, Optional, cast
+
+from werkzeug.serving import WSGIRequestHandler
+from werkzeug.wsgi import LimitedStream
+
+# 空闲长连接的超时（秒），超时后服务端关闭连接，释放处理线程
+IDLE_CONNECTION_TIMEOUT = 300
+
+
+class KeepAliveRequestHandler(WSGIRequestHandler):
+    """
+    支持长连接的请求处理器
+
+    werkzeug 的 run_wsgi 在每个响应后都会写入 Connection: close 并读空socket，无法保持连接。
+    这里对带 Content-Length 的请求自行执行WSGI应用：请求体包装为 LimitedStream，响应后只排空本请求剩余的字节；
+    响应带 Content-Length 时保持连接，否则（例如流式响应）按 Connection: close 写出后关闭。
+    分块传输的请求仍交给werkzeug原有逻辑处理
+    """
+
+    protocol_version = "HTTP/1.1"
+    timeout = IDLE_CONNECTION_TIMEOUT
+
+    _headers_sent = False
+
+    def setup(self) -> None:
+        super().setup()
+        # 响应头和响应体分两次写出，关闭Nagle算法以免与客户端的延迟ACK叠加产生数十毫秒的停顿
+        if self.connection.family in (socket.AF_INET, socket.AF_INET6):
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def run_wsgi(self) -> None:
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            super().run_wsgi()
+            return
+
+        try:
+            content_length = int(self.headers.get("Content-Length") or 0)
+        except ValueError:
+            self.close_connection = True
+            self.send_error(400, "Invalid Content-Length")
+            return
+
+        self._headers_sent = False
+        self.environ = environ = self.make_environ()
+        request_body = LimitedStream(cast(IO[bytes], self.rfile), content_length)
+        environ["wsgi.input"] = request_body
+
+        response_start: List[Any] = []
+
+        def start_response(status: str, headers: List[Any], exc_info: Optional[Any] = None) -> Callable[[bytes], Any]:
+            if exc_info is not None and response_start:
+                raise exc_info[1].with_traceback(exc_info[2])
+            response_start[:] = [status, headers]
+            return self.wfile.write
+
+        try:
+            application_iter = self.server.app(environ, start_response)
+            try:
+                self._write_response(response_start, application_iter)
+            finally:
+                if hasattr(application_iter, "close"):
+                    application_iter.close()
+            request_body.exhaust()
+        except (ConnectionError, socket.timeout) as e:
+            self.close_connection = True
+            self.connection_dropped(e, environ)
+        except Exception:
+            self.close_connection = True
+            if self.server.passthrough_errors:
+                raise
+            self.log_error("Error on request:\n%s", traceback.format_exc())
+            if not self._headers_sent:
+                self.send_error(500)
+
+    def _write_response(self, response_start: List[Any], application_iter: Any) -> None:
+        """写出状态行、响应头和响应体"""
+        chunks = iter(application_iter)
+        # WSGI允许在产出第一个数据块时才调用start_response
+        first_chunk = next(chunks, b"")
+        status, headers = response_start
+        code, _, reason = status.partition(" ")
+
+        self.send_response(int(code), reason)
+        has_length = False
+        for key, value in headers:
+            if key.lower() == "connection":
+                continue
+            has_length = has_length or key.lower() == "content-length"
+            self.send_header(key, value)
+        if not has_length or self.close_connection:
+            self.close_connection = True
+            self.send_header("Connection", "close")
+        self.end_headers()
+        self._headers_sent = True
+
+        if self.command == "HEAD":
+            return
+        if first_chunk:
+            self.wfile.write(first_chunk)
+        for chunk in chunks:
+            if chunk:
+                self.wfile.write(chunk)
+                if not has_length:
+                    self.wfile.flush()
+        self.wfile.flush()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Live Frame Broadcaster
+实时推送：模拟器每个tick把帧放入队列后立即返回，后台线程对每帧只做一次增量编码和JSON序列化，
+所有订阅者（Server-Sent Events 连接）共享同一份编码结果，订阅者再多也不会增加tick循环的开销；
+读取太慢、错过了积压消息的订阅者从最新状态的完整帧重新开始
+"""
+import json
+import queue
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Iterator, List, Optional, Tuple
+
+from elevator_saga.recording.codec import FrameEncoder
+from elevator_saga.recording.passengers import PassengerTableBuilder
+
+# 为订阅者保留的最近消息数，落后更多的订阅者从完整帧重新开始
+LIVE_BACKLOG = 256
+
+# 等待编码的帧数上限，编码跟不上tick时丢弃新帧（之后的增量相对于最后编码的帧，仍然正确；被丢弃帧的事件并入下一帧）
+LIVE_QUEUE_SIZE = 256
+
+# 没有新消息时发送心跳的间隔（秒），用于及时发现已断开的连接
+HEARTBEAT_SECONDS = 15.0
+
+
+def _event(name: str, data: Any) -> bytes:
+    """一条 Server-Sent Events 消息"""
+    return f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False, separators=(',', ':'))}\n\n".encode("utf-8")
+
+
+class LiveBroadcaster:
+    """
+    每tick帧的实时广播
+
+    消息类型：scenario（场景信息，切换流量文件时发送）、passengers（乘客生命周期表，见 passengers.py）
+    和 frame（关键帧或增量记录，格式见 codec.py）。订阅开始时先收到当前场景、到目前为止的乘客表和最近一帧的完整帧，
+    之后由帧中的事件更新乘客表；只在有订阅者时 active 为真，模拟器据此决定是否构造帧
+    """
+
+    def __init__(self, backlog: int = LIVE_BACKLOG, queue_size: int = LIVE_QUEUE_SIZE):
+        self.subscribers = 0
+        self.dropped_frames = 0
+        self.published_tick: Optional[int] = None  # 最后一个入队的帧的tick，场景开始时为 None
+        self._queue: "queue.Queue[Tuple[str, Any]]" = queue.Queue(maxsize=queue_size)
+        self._condition = threading.Condition()
+        self._messages: Deque[Tuple[int, bytes]] = deque(maxlen=backlog)
+        self._sequence = 0
+        self._encoder = FrameEncoder()
+        self._passengers = PassengerTableBuilder()
+        self._scenario: Optional[Dict[str, Any]] = None
+        self._dropped_events: List[Dict[str, Any]] = []  # 被丢弃帧的事件，等待并入下一个入队的帧
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def active(self) -> bool:
+        return self.subscribers > 0
+
+    # ==================== 模拟器调用（只入队） ====================
+
+    def begin_scenario(self, info: Dict[str, Any]) -> None:
+        """开始新场景，之后的第一帧为完整帧"""
+        self._scenario = info
+        self._dropped_events = []
+        self.published_tick = None
+        if self._thread is not None:
+            self._queue.put(("scenario", info))
+
+    def seed_passengers(self, rows: List[List[Any]]) -> None:
+        """并入由模拟状态构造的乘客行（见 passenger_rows），并把更新后的乘客表发送给所有订阅者"""
+        self.start()
+        self._queue.put(("passengers", rows))
+
+    def publish(self, frame: Dict[str, Any]) -> None:
+        """发布一帧（放入队列后不应再被修改）；队列已满时丢弃该帧，其事件并入下一帧，乘客表和订阅者不会漏掉事件"""
+        self.start()
+        if self._dropped_events:
+            frame = {**frame, "events": self._dropped_events + list(frame.get("events", ()))}
+        try:
+            self._queue.put_nowait(("frame", frame))
+        except queue.Full:
+            self.dropped_frames += 1
+            self._dropped_events = list(frame.get("events", ()))
+        else:
+            self._dropped_events = []
+            self.published_tick = frame["tick"]
+
+    # ==================== 订阅 ====================
+
+    def subscribe(self) -> Iterator[bytes]:
+        """订阅消息流（生成器在开始迭代时注册订阅者，关闭时注销）；写出时不持有锁，慢速连接不阻塞编码线程和其他订阅者"""
+        self.start()
+        with self._condition:
+            self.subscribers += 1
+            last = self._sequence
+            chunk = b"retry: 1000\n\n" + self._snapshot()
+        try:
+            while True:
+                yield chunk
+                with self._condition:
+                    if not self._condition.wait_for(lambda: self._sequence > last, timeout=HEARTBEAT_SECONDS):
+                        chunk = b": heartbeat\n\n"
+                    elif last + 1 < self._messages[0][0]:
+                        # 错过了已被丢弃的消息，从当前状态重新开始
+                        chunk = self._snapshot()
+                    else:
+                        chunk = b"".join(message for sequence, message in self._messages if sequence > last)
+                    last = self._sequence
+        finally:
+            with self._condition:
+                self.subscribers -= 1
+
+    def _snapshot(self) -> bytes:
+        """当前场景、乘客表和最近一帧的完整帧（调用方需持有锁）"""
+        parts = []
+        if self._scenario is not None:
+            parts.append(_event("scenario", self._scenario))
+        parts.append(_event("passengers", self._passengers.to_dict()))
+        snapshot = self._encoder.snapshot()
+        if snapshot is not None:
+            parts.append(_event("frame", snapshot))
+        return b"".join(parts)
+
+    # ==================== 后台线程 ====================
+
+    def start(self) -> None:
+        """启动编码线程（首次发布或订阅时自动调用）"""
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._run, name="live-broadcaster", daemon=True)
+                thread.start()
+                self._thread = thread
+
+    def _run(self) -> None:
+        while True:
+            kind, payload = self._queue.get()
+            with self._condition:
+                if kind == "scenario":
+                    self._encoder = FrameEncoder()
+                    self._passengers = PassengerTableBuilder()
+                    message = _event("scenario", payload)
+                elif kind == "passengers":
+                    self._passengers.merge(payload)
+                    message = _event("passengers", self._passengers.to_dict())
+                else:
+                    self._passengers.add(payload)
+                    message = _event("frame", self._encoder.encode(payload))
+                self._sequence += 1
+                self._messages.append((self._sequence, message))
+                self._condition.notify_all()
@@ -3,16 +3,20 @@
 Elevator simulation server - tick-based discrete event simulation
 Provides HTTP API for controlling elevators and advancing simulation time
 """
+
 import argparse
+import atexit
 import json
 import os.path
 import threading
+import time
 from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Any, Dict, List, cast
+from typing import Any, Dict, Iterable, List, Optional, Tuple, cast
 
 from flask import Flask, Response, request
+from werkzeug.serving import is_running_from_reloader, make_server
 
 from elevator_saga.core.models import (
     Direction,
@@ -21,14 +25,25 @@ from elevator_saga.core.models import (
     EventType,
     FloorState,
     PassengerInfo,
-    PassengerStatus,
+    PassengerTable,
     PerformanceMetrics,
     SerializableModel,
     SimulationEvent,
     SimulationState,
     TrafficEntry,
+    compute_state_checksum,
     create_empty_simulation_state,
 )
+from elevator_saga.core.shared_state import SharedStateWriter
+from elevator_saga.recording.codec import DEFAULT_KEYFRAME_INTERVAL
+from elevator_saga.recording.frames import build_state_frame, building_info
+from elevator_saga.recording.passengers import passenger_rows
+from elevator_saga.recording.recorder import SimulationRecorder
+from elevator_saga.recording.writer import RECORDING_NAME_PATTERN
+from elevator_saga.server.keepalive import KeepAliveRequestHandler
+from elevator_saga.server.live import LiveBroadcaster
+from elevator_saga.traffic.cache import ScenarioCache
+from elevator_saga.traffic.loader import TrafficStream, find_traffic_files, open_traffic_stream
 
 # Global debug flag for server
 _SERVER_DEBUG_MODE = False
@@ -107,12 +122,12 @@ class SimulationStateResponse(SerializableModel):
     tick: int
     elevators: List[ElevatorState]
     floors: List[FloorState]
-    passengers: Dict[int, PassengerInfo]
+    passengers: Dict[int, Dict[str, Any]]  # 由 PassengerTable.to_dict 直接生成
     metrics: PerformanceMetrics
 
 
 class ElevatorSimulation:
-    traffic_queue: List[TrafficEntry]  # type: ignore
+    traffic_queue: TrafficStream
     next_passenger_id: int
     max_duration_ticks: int
 
@@ -124,6 +139,18 @@ class ElevatorSimulation:
         self.current_traffic_index = 0
         self.traffic_files: List[Path] = []
         self.state: SimulationState = create_empty_simulation_state(2, 1, 1)
+        self.traffic_queue = TrafficStream([])
+        self.next_passenger_id = 1
+        self.max_duration_ticks = 0
+        # 编译后的场景按内容哈希缓存，循环评测时不再重复解析同一个文件
+        self.scenario_cache = ScenarioCache()
+        # 共享内存状态通道，启用后每次状态变化都发布给同机客户端
+        self.shared_state: Optional[SharedStateWriter] = None
+        # 服务端录制器，启用后每个tick处理结束时直接从内存状态记录一帧
+        self.recorder: Optional[SimulationRecorder] = None
+        self.recordings_dir = Path("recordings")
+        # 实时推送，有可视化订阅时每个tick的帧交给后台线程编码后分发
+        self.live = LiveBroadcaster()
         self._load_traffic_files()
 
     @property
@@ -142,18 +169,14 @@ class ElevatorSimulation:
         return self.state.floors
 
     @property
-    def passengers(self) -> Dict[int, PassengerInfo]:
-        """乘客字典"""
-        return self.state.passengers
+    def passengers(self) -> PassengerTable:
+        """乘客表（按ID访问，与字典相同）"""
+        return cast(PassengerTable, self.state.passengers)
 
     def _load_traffic_files(self) -> None:
-        """扫描traffic目录，加载所有json文件列表"""
-        # 查找所有json文件
-        for file_path in self.traffic_dir.glob("*.json"):
-            if file_path.is_file():
-                self.traffic_files.append(file_path)
-        # 按文件名排序
-        self.traffic_files.sort()
+        """扫描traffic目录，加载所有流量文件列表"""
+        # 查找所有流量文件（同一场景的多种格式只取一种），按文件名排序
+        self.traffic_files.extend(find_traffic_files(self.traffic_dir))
         server_debug_log(f"Found {len(self.traffic_files)} traffic files: {[f.name for f in self.traffic_files]}")
         # 如果有文件，加载第一个
         if self.traffic_files:
@@ -171,27 +194,29 @@ class ElevatorSimulation:
 
         traffic_file = self.traffic_files[self.current_traffic_index]
         server_debug_log(f"Loading traffic from {traffic_file.name}")
+        if self.recorder is not None:
+            with self.lock:
+                self.recorder.end_scenario(self.state)
         try:
-            with open(traffic_file, "r", encoding="utf-8") as f:
-                file_data = json.load(f)
-            building_config = file_data["building"]
+            building_config, traffic_stream = open_traffic_stream(traffic_file, cache=self.scenario_cache)
             server_debug_log(f"Building config: {building_config}")
             self.state = create_empty_simulation_state(
                 building_config["elevators"], building_config["floors"], building_config["elevator_capacity"]
             )
             self.reset()
             self.max_duration_ticks = building_config["duration"]
-            traffic_data: list[Dict[str, Any]] = file_data["traffic"]
-            traffic_data.sort(key=lambda t: cast(int, t["tick"]))
-            for entry in traffic_data:
-                traffic_entry = TrafficEntry(
-                    id=self.next_passenger_id,
-                    origin=entry["origin"],
-                    destination=entry["destination"],
-                    tick=entry["tick"],
-                )
-                self.traffic_queue.append(traffic_entry)
-                self.next_passenger_id += 1
+            # 到达条目在_process_arrivals中按需从流中读取，乘客ID按tick顺序从1开始分配
+            self.traffic_queue = traffic_stream
+            if self.recorder is not None:
+                with self.lock:
+                    self._begin_recorded_scenario()
+            self.live.begin_scenario(
+                {
+                    "scenario_name": traffic_file.stem,
+                    "max_tick": self.max_duration_ticks,
+                    "building_info": building_info(self.state),
+                }
+            )
 
         except Exception as e:
             server_debug_log(f"Error loading traffic file {traffic_file}: {e}")
@@ -214,28 +239,111 @@ class ElevatorSimulation:
         return True
 
     def load_traffic(self, traffic_file: str) -> None:
-        """Load passenger traffic from JSON file using unified data models"""
+        """
+        Load passenger traffic from JSON file using unified data models
+
+        The passenger table needs dense ids in arrival order, so ids are assigned when passengers arrive,
+        continuing from next_passenger_id; an "id" given in the entries is ignored.
+        """
         with open(traffic_file, "r") as f:
             traffic_data = json.load(f)
 
         server_debug_log(f"Loading traffic from {traffic_file}, {len(traffic_data)} entries")
 
-        self.traffic_queue: List[TrafficEntry] = []  # type: ignore[reportRedeclaration]
-        for entry in traffic_data:
-            # Create TrafficEntry from JSON data
-            traffic_entry = TrafficEntry(
-                id=entry.get("id", self.next_passenger_id),
+        # Sort by arrival time; entry ids are the ones _process_arrivals will hand out
+        traffic_data.sort(key=lambda entry: entry["tick"])
+        traffic_entries = [
+            TrafficEntry(
+                id=self.next_passenger_id + i,
                 origin=entry["origin"],
                 destination=entry["destination"],
                 tick=entry["tick"],
             )
-            self.traffic_queue.append(traffic_entry)
-            self.next_passenger_id = max(self.next_passenger_id, traffic_entry.id + 1)
-
-        # Sort by arrival time
-        self.traffic_queue.sort(key=lambda p: p.tick)
+            for i, entry in enumerate(traffic_data)
+        ]
+        self.traffic_queue.close()
+        self.traffic_queue = TrafficStream(traffic_entries)
         server_debug_log(f"Traffic loaded and sorted, next passenger ID: {self.next_passenger_id}")
 
+    def enable_shared_state(self, name: str) -> None:
+        """启用共享内存状态通道，并立即发布当前状态"""
+        with self.lock:
+            self.shared_state = SharedStateWriter(name)
+            self._publish_shared_state()
+
+    def _publish_shared_state(self, passenger_ids: Optional[Iterable[int]] = None) -> None:
+        """发布状态到共享内存（调用方需持有锁）；passenger_ids为None时重写整个乘客表"""
+        if self.shared_state is not None:
+            self.shared_state.publish(self.state, passenger_ids)
+
+    def start_recording(
+        self,
+        name: Optional[str] = None,
+        keyframe_interval: int = DEFAULT_KEYFRAME_INTERVAL,
+        metadata: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """
+        开始录制到 recordings_dir/name（正在录制时先结束之前的录制），已加载流量时立即从当前状态开始记录
+
+        Args:
+            name: 录制名称，只能包含字母、数字、下划线、连字符和点，默认按时间生成
+            keyframe_interval: 关键帧间隔，0 表示每帧都保存完整帧
+            metadata: 写入 manifest 的附加信息
+        """
+        name = name or time.strftime("run_%Y%m%d_%H%M%S")
+        if not RECORDING_NAME_PATTERN.fullmatch(name):
+            raise ValueError(f"Invalid recording name: {name!r}")
+        self.stop_recording()
+        recorder = SimulationRecorder(
+            self.recordings_dir / name, metadata=metadata, keyframe_interval=keyframe_interval
+        )
+        with self.lock:
+            self.recorder = recorder
+            if self.max_duration_ticks > 0:
+                self._begin_recorded_scenario()
+            return recorder.status()
+
+    def stop_recording(self) -> Dict[str, Any]:
+        """结束录制并等待写入完成，返回录制目录和场景数"""
+        with self.lock:
+            recorder = self.recorder
+            if recorder is None:
+                return {"recording": False}
+            self.recorder = None
+            recorder.end_scenario(self.state)
+        # 等待后台写入时不持有锁，不阻塞模拟
+        recorder.close()
+        return {
+            "recording": False,
+            "directory": str(recorder.directory.resolve()),
+            "scenarios": len(recorder.writer.manifest["scenarios"]),
+            "frames": recorder.writer.frames_written,
+        }
+
+    def recording_status(self) -> Dict[str, Any]:
+        """当前录制状态"""
+        recorder = self.recorder
+        return recorder.status() if recorder is not None else {"recording": False}
+
+    def _begin_recorded_scenario(self) -> None:
+        """以当前流量文件开始录制新场景（调用方需持有锁）"""
+        if self.recorder is not None and self.traffic_files:
+            name = self.traffic_files[self.current_traffic_index].stem
+            self.recorder.begin_scenario(name, self.state, self.max_duration_ticks)
+
+    def publish_live_frame(self) -> None:
+        """
+        新订阅者连接时调用：没有订阅者期间不构造帧，实时推送落后于当前状态时把当前状态作为一帧推送，不必等待下一个tick；
+        已是最新帧时不重复推送（否则每次连接都会给所有订阅者多发一帧），新订阅者从 subscribe 发送的完整帧开始
+        """
+        with self.lock:
+            if self.live.published_tick != self.tick:
+                # 没有构造帧期间到达的乘客没有进入实时推送的乘客表
+                rows = passenger_rows(self.passengers.values())
+                if rows:
+                    self.live.seed_passengers(rows)
+                self.live.publish(build_state_frame(self.state, []))
+
     def _emit_event(self, event_type: EventType, data: Dict[str, Any]) -> None:
         """Emit an event to be sent to clients using unified data models"""
         self.state.add_event(event_type, data)
@@ -243,22 +351,44 @@ class ElevatorSimulation:
 
     def step(self, num_ticks: int = 1) -> List[SimulationEvent]:
         with self.lock:
-            new_events: List[SimulationEvent] = []
-            for _ in range(num_ticks):
-                self.state.tick += 1
-                # server_debug_log(f"Processing tick {self.tick}")  # currently one tick per step
-                tick_events = self._process_tick()
-                new_events.extend(tick_events)
-                # server_debug_log(f"Tick {self.tick} completed - Generated {len(tick_events)} events")  # currently one tick per step
-
-                # 如果到达最大时长，强制完成剩余乘客
-                if self.tick >= self.max_duration_ticks:
-                    completed_count = self.force_complete_remaining_passengers()
-                    if completed_count > 0:
-                        server_debug_log(f"模拟结束，强制完成了 {completed_count} 个乘客")
-
-            server_debug_log(f"Step completed - Final tick: {self.tick}, Total events: {len(new_events)}")
-            return new_events
+            return self._step(num_ticks)
+
+    def step_with_checksum(self, num_ticks: int = 1) -> Tuple[int, List[SimulationEvent], int]:
+        """步进并在同一次加锁内计算校验和，返回 (tick, 事件, 校验和)；其他请求无法在步进和校验和之间修改状态"""
+        with self.lock:
+            events = self._step(num_ticks)
+            return self.tick, events, compute_state_checksum(self.state)
+
+    def _step(self, num_ticks: int) -> List[SimulationEvent]:
+        """步进（调用方需持有锁）"""
+        new_events: List[SimulationEvent] = []
+        force_completed = False
+        for _ in range(num_ticks):
+            self.state.tick += 1
+            # server_debug_log(f"Processing tick {self.tick}")  # currently one tick per step
+            tick_events = self._process_tick()
+            new_events.extend(tick_events)
+            # server_debug_log(f"Tick {self.tick} completed - Generated {len(tick_events)} events")  # currently one tick per step
+
+            # 如果到达最大时长，强制完成剩余乘客
+            if self.tick >= self.max_duration_ticks:
+                force_completed = True
+                completed_count = self.force_complete_remaining_passengers()
+                if completed_count > 0:
+                    server_debug_log(f"模拟结束，强制完成了 {completed_count} 个乘客")
+
+        if force_completed and self.live.active:
+            # 强制完成没有下梯事件，用最终状态补全实时推送的乘客表
+            self.live.seed_passengers(passenger_rows(self.passengers.values()))
+        if self.shared_state is not None:
+            # 只有事件涉及的乘客发生了变化；强制完成会修改所有乘客
+            if force_completed:
+                self._publish_shared_state()
+            else:
+                self._publish_shared_state({e.data["passenger"] for e in new_events if "passenger" in e.data})
+
+        server_debug_log(f"Step completed - Final tick: {self.tick}, Total events: {len(new_events)}")
+        return new_events
 
     def _process_tick(self) -> List[SimulationEvent]:
         """
@@ -277,8 +407,17 @@ class ElevatorSimulation:
         # 3. Process elevator stops and passenger alighting
         self._process_elevator_stops()
 
+        tick_events = self.state.events[events_start:]
+        if self.recorder is not None or self.live.active:
+            # 同一帧由录制器和实时推送共用，编码都在各自的后台线程中进行
+            frame = build_state_frame(self.state, tick_events)
+            if self.recorder is not None:
+                self.recorder.record_frame(frame)
+            if self.live.active:
+                self.live.publish(frame)
+
         # Return events generated this tick
-        return self.state.events[events_start:]
+        return tick_events
 
     def _process_passenger_in(self, elevator: ElevatorState) -> None:
         current_floor = elevator.current_floor
@@ -338,23 +477,32 @@ class ElevatorSimulation:
 
     def _process_arrivals(self) -> None:  # OK
         """Process new passenger arrivals"""
-        while self.traffic_queue and self.traffic_queue[0].tick <= self.tick:
-            traffic_entry = self.traffic_queue.pop(0)
+        for traffic_entry in self.traffic_queue.pop_due(self.tick):
+            # 乘客表要求按到达顺序的连续ID，ID在到达时分配，不依赖流量条目中的ID
             passenger = PassengerInfo(
-                id=traffic_entry.id,
+                id=self.next_passenger_id,
                 origin=traffic_entry.origin,
                 destination=traffic_entry.destination,
                 arrive_tick=self.tick,
             )
-            assert traffic_entry.origin != traffic_entry.destination, f"乘客{passenger.id}目的地和起始地{traffic_entry.origin}重复"
+            assert (
+                traffic_entry.origin != traffic_entry.destination
+            ), f"乘客{passenger.id}目的地和起始地{traffic_entry.origin}重复"
             self.passengers[passenger.id] = passenger
+            self.next_passenger_id += 1
             server_debug_log(f"乘客 {passenger.id:4}： 创建 | {passenger}")
             if passenger.destination > passenger.origin:
                 self.floors[passenger.origin].up_queue.append(passenger.id)
-                self._emit_event(EventType.UP_BUTTON_PRESSED, {"floor": passenger.origin, "passenger": passenger.id})
+                self._emit_event(
+                    EventType.UP_BUTTON_PRESSED,
+                    {"floor": passenger.origin, "passenger": passenger.id, "destination": passenger.destination},
+                )
             else:
                 self.floors[passenger.origin].down_queue.append(passenger.id)
-                self._emit_event(EventType.DOWN_BUTTON_PRESSED, {"floor": passenger.origin, "passenger": passenger.id})
+                self._emit_event(
+                    EventType.DOWN_BUTTON_PRESSED,
+                    {"floor": passenger.origin, "passenger": passenger.id, "destination": passenger.destination},
+                )
 
     def _move_elevators(self) -> None:
         """
@@ -525,13 +673,16 @@ class ElevatorSimulation:
         """
         设置电梯去向，是生命周期开始，分配目的地
         """
-        if 0 <= elevator_id < len(self.elevators) and 0 <= floor < len(self.floors):
-            elevator = self.elevators[elevator_id]
-            if immediate:
-                self._set_elevator_target_floor(elevator, floor)
-            else:
-                elevator.next_target_floor = floor
-                server_debug_log(f"电梯 E{elevator_id} 下一目的地设定为 F{floor}")
+        # 修改和发布在同一次加锁内完成，多线程服务下命令不会落在并发的步进中间
+        with self.lock:
+            if 0 <= elevator_id < len(self.elevators) and 0 <= floor < len(self.floors):
+                elevator = self.elevators[elevator_id]
+                if immediate:
+                    self._set_elevator_target_floor(elevator, floor)
+                else:
+                    elevator.next_target_floor = floor
+                    server_debug_log(f"电梯 E{elevator_id} 下一目的地设定为 F{floor}")
+                self._publish_shared_state(())
 
     def get_state(self) -> SimulationStateResponse:
         """Get complete simulation state"""
@@ -543,50 +694,18 @@ class ElevatorSimulation:
                 tick=self.tick,
                 elevators=self.elevators,
                 floors=self.floors,
-                passengers=self.passengers,
+                passengers=self.passengers.to_dict(),
                 metrics=metrics,
             )
 
     def _calculate_metrics(self) -> PerformanceMetrics:
         """Calculate performance metrics"""
-        # 直接从state中筛选已完成的乘客
-        completed = [p for p in self.state.passengers.values() if p.status == PassengerStatus.COMPLETED]
-
-        total_passengers = len(self.state.passengers)
-        if not completed:
-            return PerformanceMetrics(
-                completed_passengers=0,
-                total_passengers=total_passengers,
-                average_floor_wait_time=0,
-                p95_floor_wait_time=0,
-                average_arrival_wait_time=0,
-                p95_arrival_wait_time=0,
-            )
+        return self.state.performance_metrics()
 
-        floor_wait_times = [float(p.floor_wait_time) for p in completed]
-        arrival_wait_times = [float(p.arrival_wait_time) for p in completed]
-
-        def average_excluding_top_percent(data: List[float], exclude_percent: int) -> float:
-            """计算排除掉最长的指定百分比后的平均值"""
-            if not data:
-                return 0.0
-            sorted_data = sorted(data)
-            # 计算要保留的数据数量（排除掉最长的 exclude_percent）
-            keep_count = int(len(sorted_data) * (100 - exclude_percent) / 100)
-            if keep_count == 0:
-                return 0.0
-            # 只保留前 keep_count 个数据，排除最长的部分
-            kept_data = sorted_data[:keep_count]
-            return sum(kept_data) / len(kept_data)
-
-        return PerformanceMetrics(
-            completed_passengers=len(completed),
-            total_passengers=total_passengers,
-            average_floor_wait_time=sum(floor_wait_times) / len(floor_wait_times) if floor_wait_times else 0,
-            p95_floor_wait_time=average_excluding_top_percent(floor_wait_times, 5),
-            average_arrival_wait_time=sum(arrival_wait_times) / len(arrival_wait_times) if arrival_wait_times else 0,
-            p95_arrival_wait_time=average_excluding_top_percent(arrival_wait_times, 5),
-        )
+    def state_checksum(self) -> int:
+        """当前状态的校验和，随步进响应返回给客户端"""
+        with self.lock:
+            return compute_state_checksum(self.state)
 
     def get_events(self, since_tick: int = 0) -> List[SimulationEvent]:
         """Get events since specified tick"""
@@ -602,23 +721,22 @@ class ElevatorSimulation:
     def force_complete_remaining_passengers(self) -> int:
         """强制完成所有未完成的乘客，返回完成的乘客数量"""
         completed_count = 0
-        current_tick = self.tick
-        for passenger in self.state.passengers.values():
-            if passenger.dropoff_tick == 0:
-                passenger.dropoff_tick = current_tick
-            if passenger.pickup_tick == 0:
-                passenger.pickup_tick = current_tick
+        self.passengers.complete_remaining(self.tick)
         return completed_count
 
     def reset(self) -> None:
         """Reset simulation to initial state"""
         with self.lock:
+            if self.recorder is not None:
+                self.recorder.end_scenario(self.state)
             self.state = create_empty_simulation_state(
                 len(self.elevators), len(self.floors), self.elevators[0].max_capacity
             )
-            self.traffic_queue: List[TrafficEntry] = []
+            self.traffic_queue.close()
+            self.traffic_queue = TrafficStream([])
             self.max_duration_ticks = 0
             self.next_passenger_id = 1
+            self._publish_shared_state()
 
 
 # Global simulation instance for Flask routes
@@ -653,12 +771,15 @@ def step_simulation() -> Response | tuple[Response, int]:
         ticks = data.get("ticks", 1)
         # server_debug_log("")
         # server_debug_log(f"HTTP /api/step request ----- ticks: {ticks}")
-        events = simulation.step(ticks)
-        server_debug_log(f"HTTP /api/step response ----- tick: {simulation.tick}, events: {len(events)}\n")
+        start = time.perf_counter()
+        tick, events, checksum = simulation.step_with_checksum(ticks)
+        server_debug_log(f"HTTP /api/step response ----- tick: {tick}, events: {len(events)}\n")
         return json_response(
             {
-                "tick": simulation.tick,
+                "tick": tick,
                 "events": events,
+                "checksum": checksum,
+                "server_time": time.perf_counter() - start,
             }
         )
     except Exception as e:
@@ -710,6 +831,74 @@ def get_traffic_info() -> Response | tuple[Response, int]:
         return json_response({"error": str(e)}, 500)
 
 
+@app.route("/api/recording", methods=["GET"])
+def get_recording_status() -> Response | tuple[Response, int]:
+    """获取服务端录制状态"""
+    try:
+        return json_response(simulation.recording_status())
+    except Exception as e:
+        return json_response({"error": str(e)}, 500)
+
+
+@app.route("/api/recording/start", methods=["POST"])
+def start_recording() -> Response | tuple[Response, int]:
+    """开始服务端录制"""
+    try:
+        data: Dict[str, Any] = request.get_json(silent=True) or {}
+        status = simulation.start_recording(
+            data.get("name"),
+            keyframe_interval=int(data.get("keyframe_interval", DEFAULT_KEYFRAME_INTERVAL)),
+            metadata=data.get("metadata"),
+        )
+        return json_response(status)
+    except ValueError as e:
+        return json_response({"error": str(e)}, 400)
+    except Exception as e:
+        return json_response({"error": str(e)}, 500)
+
+
+@app.route("/api/recording/stop", methods=["POST"])
+def stop_recording() -> Response | tuple[Response, int]:
+    """结束服务端录制"""
+    try:
+        return json_response(simulation.stop_recording())
+    except Exception as e:
+        return json_response({"error": str(e)}, 500)
+
+
+@app.route("/api/live", methods=["GET"])
+def live_stream() -> Response:
+    """实时帧推送（Server-Sent Events）：先发送当前场景和完整帧，之后每个tick一条增量记录"""
+    stream = simulation.live.subscribe()
+    # 先启动生成器注册订阅者，再推送当前状态，保证新订阅者收到的第一帧是最新状态
+    first = next(stream)
+    simulation.publish_live_frame()
+
+    def generate() -> Iterable[bytes]:
+        yield first
+        yield from stream
+
+    response = Response(generate(), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def start_unix_socket_server(socket_path: str) -> threading.Thread:
+    """在后台线程中通过Unix域套接字提供同一套API（长连接、多线程）"""
+    server = make_server(f"unix://{socket_path}", 0, app, threaded=True, request_handler=KeepAliveRequestHandler)
+    thread = threading.Thread(target=server.serve_forever, name="unix-socket-server", daemon=True)
+    thread.start()
+
+    def remove_socket_file() -> None:
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+    atexit.register(remove_socket_file)
+    print(f"Elevator simulation server also listening on unix://{socket_path}")
+    return thread
+
+
 def main() -> None:
     global simulation
 
@@ -717,6 +906,12 @@ def main() -> None:
     parser.add_argument("--host", default="127.0.0.1", help="Server host")
     parser.add_argument("--port", type=int, default=8000, help="Server port")
     parser.add_argument("--debug", default=True, action="store_true", help="Enable debug logging")
+    parser.add_argument("--unix-socket", default=None, help="Also serve the API on this Unix domain socket path")
+    parser.add_argument(
+        "--shared-memory", default=None, help="Publish per-tick state to this multiprocessing.shared_memory name"
+    )
+    parser.add_argument("--recordings-dir", default="recordings", help="Directory for server-side recordings")
+    parser.add_argument("--record", default=None, help="Record the whole session under this recording name")
 
     args = parser.parse_args()
 
@@ -728,12 +923,32 @@ def main() -> None:
 
     # Create simulation with traffic directory
     simulation = ElevatorSimulation(f"{os.path.join(os.path.dirname(__file__), '..', 'traffic')}")
+    simulation.recordings_dir = Path(args.recordings_dir)
 
     # Print traffic status
     print(f"Elevator simulation server running on http://{args.host}:{args.port}")
 
+    # 调试模式下werkzeug的重载器会在子进程中运行服务，本地通道只在实际处理请求的进程中开启
+    if not args.debug or is_running_from_reloader():
+        if args.unix_socket:
+            start_unix_socket_server(args.unix_socket)
+        if args.shared_memory:
+            simulation.enable_shared_state(args.shared_memory)
+            atexit.register(simulation.shared_state.close)  # type: ignore[union-attr]
+            print(f"Publishing simulation state to shared memory {args.shared_memory!r}")
+        if args.record:
+            status = simulation.start_recording(args.record)
+            atexit.register(simulation.stop_recording)
+            print(f"Recording simulation to {status['directory']}")
+
     try:
-        app.run(host=args.host, port=args.port, debug=args.debug, threaded=True)
+        app.run(
+            host=args.host,
+            port=args.port,
+            debug=args.debug,
+            threaded=True,
+            request_handler=KeepAliveRequestHandler,
+        )
     except KeyboardInterrupt:
         print("\nShutting down server...")
 
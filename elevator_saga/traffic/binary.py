@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Columnar Binary Traffic Format
+可内存映射的列式二进制流量格式（.etb），加载时间与乘客数量无关
+
+文件布局（小端序）：
+    偏移 0   8字节   魔数 b"ESTRAFC1"
+    偏移 8   uint32  头部JSON长度 H
+    偏移 12  uint32  保留，写0
+    偏移 16  H字节   UTF-8 JSON头部 {"building": {...}, "count": N, "columns": [...], "dtype": "<i4"}
+    填充至16字节对齐后为数据区：4列 int32，每列N个元素，依次为 tick, origin, destination, id
+    数据区按tick非递减排列
+"""
+import argparse
+import json
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Sequence
+
+import numpy as np
+
+from elevator_saga.core.models import TrafficEntry
+
+BINARY_TRAFFIC_SUFFIX = ".etb"
+MAGIC = b"ESTRAFC1"
+COLUMNS = ("tick", "origin", "destination", "id")
+DTYPE = "<i4"
+_PREFIX = struct.Struct("<8sII")
+_ALIGNMENT = 16
+_CHUNK_SIZE = 4096
+
+
+@dataclass
+class BinaryTraffic:
+    """内存映射的列式流量数据，各列均为只读的零拷贝视图"""
+
+    building: Dict[str, Any]
+    ticks: np.ndarray
+    origins: np.ndarray
+    destinations: np.ndarray
+    ids: np.ndarray
+
+    def __len__(self) -> int:
+        return int(self.ticks.shape[0])
+
+
+def _data_offset(header_len: int) -> int:
+    """数据区起始偏移（16字节对齐）"""
+    end = _PREFIX.size + header_len
+    return (end + _ALIGNMENT - 1) // _ALIGNMENT * _ALIGNMENT
+
+
+def write_binary_traffic(
+    path: Path,
+    building: Dict[str, Any],
+    ticks: Sequence[int],
+    origins: Sequence[int],
+    destinations: Sequence[int],
+    ids: Optional[Sequence[int]] = None,
+) -> int:
+    """写入.etb文件，条目按tick稳定排序，返回写入的乘客数"""
+    columns = np.empty((len(COLUMNS), len(ticks)), dtype=DTYPE)
+    columns[0] = ticks
+    columns[1] = origins
+    columns[2] = destinations
+    columns[3] = ids if ids is not None else np.arange(1, len(ticks) + 1)
+    order = np.argsort(columns[0], kind="stable")
+    columns = np.ascontiguousarray(columns[:, order])
+
+    header = json.dumps(
+        {"building": building, "count": int(columns.shape[1]), "columns": list(COLUMNS), "dtype": DTYPE},
+        ensure_ascii=False,
+    ).encode("utf-8")
+    offset = _data_offset(len(header))
+    with open(path, "wb") as f:
+        f.write(_PREFIX.pack(MAGIC, len(header), 0))
+        f.write(header)
+        f.write(b"\0" * (offset - _PREFIX.size - len(header)))
+        f.write(columns.tobytes())
+    return int(columns.shape[1])
+
+
+def load_binary_traffic(path: Path) -> BinaryTraffic:
+    """内存映射.etb文件，只读取头部，数据列按需从页缓存中读取"""
+    with open(path, "rb") as f:
+        magic, header_len, _ = _PREFIX.unpack(f.read(_PREFIX.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary traffic file (bad magic {magic!r})")
+        header: Dict[str, Any] = json.loads(f.read(header_len).decode("utf-8"))
+
+    count = int(header["count"])
+    if count == 0:
+        columns = np.empty((len(COLUMNS), 0), dtype=DTYPE)
+    else:
+        columns = np.memmap(path, dtype=DTYPE, mode="r", offset=_data_offset(header_len), shape=(len(COLUMNS), count))
+    return BinaryTraffic(
+        building=dict(header["building"]),
+        ticks=columns[0],
+        origins=columns[1],
+        destinations=columns[2],
+        ids=columns[3],
+    )
+
+
+def iter_binary_traffic(traffic: BinaryTraffic, first_id: int = 1) -> Iterator[TrafficEntry]:
+    """按块从内存映射列中产出到达条目，乘客ID按行顺序分配"""
+    passenger_id = first_id
+    for start in range(0, len(traffic), _CHUNK_SIZE):
+        end = start + _CHUNK_SIZE
+        rows = zip(
+            traffic.ticks[start:end].tolist(),
+            traffic.origins[start:end].tolist(),
+            traffic.destinations[start:end].tolist(),
+        )
+        for tick, origin, destination in rows:
+            yield TrafficEntry(id=passenger_id, origin=origin, destination=destination, tick=tick)
+            passenger_id += 1
+
+
+def convert_json_to_binary(src: Path, dst: Path) -> int:
+    """将.json流量文件转换为.etb文件"""
+    with open(src, "r", encoding="utf-8") as f:
+        file_data = json.load(f)
+    traffic = file_data["traffic"]
+    return write_binary_traffic(
+        Path(dst),
+        file_data["building"],
+        [t["tick"] for t in traffic],
+        [t["origin"] for t in traffic],
+        [t["destination"] for t in traffic],
+        [t.get("id", i) for i, t in enumerate(traffic, 1)],
+    )
+
+
+def convert_binary_to_json(src: Path, dst: Path) -> int:
+    """将.etb文件转换回与generators输出一致的.json流量文件"""
+    traffic = load_binary_traffic(Path(src))
+    entries = [
+        {"id": pid, "origin": origin, "destination": destination, "tick": tick}
+        for tick, origin, destination, pid in zip(
+            traffic.ticks.tolist(), traffic.origins.tolist(), traffic.destinations.tolist(), traffic.ids.tolist()
+        )
+    ]
+    with open(dst, "w", encoding="utf-8") as f:
+        json.dump({"building": traffic.building, "traffic": entries}, f, indent=2, ensure_ascii=False)
+    return len(entries)
+
+
+def main() -> None:
+    """命令行接口 - 在.json与.etb之间转换，方向由源文件后缀决定"""
+    parser = argparse.ArgumentParser(description="Convert traffic files between JSON and the columnar binary format")
+    parser.add_argument("src", type=str, help="Source traffic file (.json or .etb)")
+    parser.add_argument("dst", type=str, nargs="?", default=None, help="Destination file")
+    args = parser.parse_args()
+
+    src = Path(args.src)
+    if src.suffix == BINARY_TRAFFIC_SUFFIX:
+        dst = Path(args.dst) if args.dst else src.with_suffix(".json")
+        count = convert_binary_to_json(src, dst)
+    else:
+        dst = Path(args.dst) if args.dst else src.with_suffix(BINARY_TRAFFIC_SUFFIX)
+        count = convert_json_to_binary(src, dst)
+    print(f"Converted {count} passengers: {src} -> {dst}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Compiled Scenario Cache
+将流量文件编译为校验过、按tick排序的列式表示，并按内容哈希缓存，避免反复解析同一个JSON文件
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from elevator_saga.core.models import TrafficEntry
+from elevator_saga.traffic.binary import DTYPE, BinaryTraffic, iter_binary_traffic
+
+# 默认缓存上限（字节），按编译后的列数据大小计算
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+
+REQUIRED_BUILDING_KEYS = ("floors", "elevators", "elevator_capacity", "duration")
+
+
+@dataclass
+class CompiledScenario:
+    """编译后的场景"""
+
+    digest: str
+    traffic: BinaryTraffic
+
+    @property
+    def building(self) -> Dict[str, Any]:
+        return self.traffic.building
+
+    @property
+    def nbytes(self) -> int:
+        """列数据占用的字节数"""
+        return int(self.traffic.ticks.nbytes + self.traffic.origins.nbytes + self.traffic.destinations.nbytes)
+
+    def iter_entries(self, first_id: int = 1) -> Iterator[TrafficEntry]:
+        """按tick顺序产出到达条目"""
+        return iter_binary_traffic(self.traffic, first_id)
+
+    def __len__(self) -> int:
+        return len(self.traffic)
+
+
+def compile_scenario(data: bytes, digest: str = "") -> CompiledScenario:
+    """解析并校验JSON流量文件内容，生成按tick稳定排序的列式场景"""
+    file_data = json.loads(data.decode("utf-8"))
+    building: Dict[str, Any] = dict(file_data["building"])
+    missing = [key for key in REQUIRED_BUILDING_KEYS if key not in building]
+    if missing:
+        raise ValueError(f"Building config is missing {missing}")
+
+    traffic = file_data["traffic"]
+    ticks = np.fromiter((t["tick"] for t in traffic), dtype=DTYPE, count=len(traffic))
+    origins = np.fromiter((t["origin"] for t in traffic), dtype=DTYPE, count=len(traffic))
+    destinations = np.fromiter((t["destination"] for t in traffic), dtype=DTYPE, count=len(traffic))
+
+    floors = int(building["floors"])
+    if np.any(ticks < 0):
+        raise ValueError("Traffic contains negative ticks")
+    if np.any((origins < 0) | (origins >= floors) | (destinations < 0) | (destinations >= floors)):
+        raise ValueError(f"Traffic contains floors outside [0, {floors})")
+    same = np.flatnonzero(origins == destinations)
+    if same.size:
+        raise ValueError(f"Traffic entry #{int(same[0])} has the same origin and destination")
+
+    order = np.argsort(ticks, kind="stable")
+    ids = np.arange(1, len(traffic) + 1, dtype=DTYPE)
+    return CompiledScenario(
+        digest=digest,
+        traffic=BinaryTraffic(
+            building=building,
+            ticks=ticks[order],
+            origins=origins[order],
+            destinations=destinations[order],
+            ids=ids,
+        ),
+    )
+
+
+class ScenarioCache:
+    """
+    按内容哈希缓存编译后的场景
+
+    文件的 (mtime, size) 未变化时直接复用已知哈希，否则重新读取并计算哈希；
+    内容相同的文件共享同一个编译结果，超过 max_bytes 时按LRU淘汰
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._scenarios: "OrderedDict[str, CompiledScenario]" = OrderedDict()
+        self._file_digests: Dict[Path, Tuple[int, int, str]] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: Path) -> CompiledScenario:
+        """获取文件对应的编译场景，必要时编译并放入缓存"""
+        path = Path(path).resolve()
+        stat = path.stat()
+        with self._lock:
+            known = self._file_digests.get(path)
+            if known is not None and known[:2] == (stat.st_mtime_ns, stat.st_size):
+                scenario = self._lookup(known[2])
+                if scenario is not None:
+                    return scenario
+
+        data = path.read_bytes()
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._file_digests[path] = (stat.st_mtime_ns, stat.st_size, digest)
+            scenario = self._lookup(digest)
+            if scenario is not None:
+                return scenario
+
+        scenario = compile_scenario(data, digest)
+        with self._lock:
+            self.misses += 1
+            self._insert(scenario)
+        return scenario
+
+    def _lookup(self, digest: str) -> Optional[CompiledScenario]:
+        scenario = self._scenarios.get(digest)
+        if scenario is not None:
+            self._scenarios.move_to_end(digest)
+            self.hits += 1
+        return scenario
+
+    def _insert(self, scenario: CompiledScenario) -> None:
+        if scenario.digest in self._scenarios:
+            return
+        self._scenarios[scenario.digest] = scenario
+        self._total_bytes += scenario.nbytes
+        # 至少保留最新的一个场景
+        while self._total_bytes > self.max_bytes and len(self._scenarios) > 1:
+            _, evicted = self._scenarios.popitem(last=False)
+            self._total_bytes -= evicted.nbytes
+
+    def invalidate(self, path: Optional[Path] = None) -> None:
+        """使指定文件（或全部）的缓存失效"""
+        with self._lock:
+            if path is None:
+                self._scenarios.clear()
+                self._file_digests.clear()
+                self._total_bytes = 0
+                return
+            known = self._file_digests.pop(Path(path).resolve(), None)
+            if known is not None and known[2] in self._scenarios:
+                self._total_bytes -= self._scenarios.pop(known[2]).nbytes
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._scenarios)
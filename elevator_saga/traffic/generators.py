@@ -3,13 +3,21 @@
 Traffic Pattern Generators for Elevator Simulation
 Generate JSON traffic files for different scenarios with scalable building sizes
 From small (1 elevator, 3 floors, 10 people) to large (4 elevators, 12 floors, 200 people)
+
+所有生成器基于NumPy向量化实现：到达过程为按tick变化的速率曲线驱动的非齐次泊松过程，
+起点/终点按整批乘客一次性采样，百万乘客、百层建筑的场景也可在数秒内生成
 """
 import json
-import math
 import os.path
-import random
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from elevator_saga.traffic.binary import BINARY_TRAFFIC_SUFFIX, write_binary_traffic
+from elevator_saga.traffic.loader import write_jsonl_traffic
 
 # 建筑规模配置
 BUILDING_SCALES = {
@@ -41,7 +49,7 @@ BUILDING_SCALES = {
 
 
 def calculate_intensity_for_scale(base_intensity: float, floors: int, target_people: int, duration: int) -> float:
-    """根据建筑规模计算合适的流量强度"""
+    """根据建筑规模计算合适的流量强度（每tick的平均到达人数，可大于1）"""
     # 估算每tick平均产生的人数
     estimated_people_per_tick = base_intensity
     total_estimated = estimated_people_per_tick * duration
@@ -51,7 +59,7 @@ def calculate_intensity_for_scale(base_intensity: float, floors: int, target_peo
 
     # 调整强度以达到目标人数
     adjustment_factor = target_people / total_estimated
-    return min(1.0, base_intensity * adjustment_factor)
+    return base_intensity * adjustment_factor
 
 
 def limit_traffic_count(traffic: List[Dict[str, Any]], max_people: int) -> List[Dict[str, Any]]:
@@ -64,89 +72,100 @@ def limit_traffic_count(traffic: List[Dict[str, Any]], max_people: int) -> List[
     return traffic_sorted[:max_people]
 
 
+def _poisson_arrivals(rng: np.random.Generator, rates: np.ndarray, start: int = 0) -> np.ndarray:
+    """非齐次泊松到达：第 start+i 个tick的到达人数服从 Poisson(rates[i])，返回每个乘客的到达tick"""
+    counts = rng.poisson(np.maximum(rates, 0.0))
+    return np.repeat(np.arange(start, start + len(rates)), counts)
+
+
+def _uniform_trips(rng: np.random.Generator, n: int, low: int, high: int) -> Tuple[np.ndarray, np.ndarray]:
+    """起点在 [low, high) 中均匀选择，终点在其余楼层中均匀选择"""
+    origins = rng.integers(low, high, n)
+    destinations = rng.integers(low, high - 1, n)
+    destinations += destinations >= origins
+    return origins, destinations
+
+
+def _build_traffic(
+    ticks: np.ndarray, origins: np.ndarray, destinations: np.ndarray, max_people: int
+) -> List[Dict[str, Any]]:
+    """按tick稳定排序、保留最早的 max_people 个乘客，并转换为流量字典列表"""
+    order = np.argsort(ticks, kind="stable")[:max_people]
+    return [
+        {"id": passenger_id, "origin": origin, "destination": destination, "tick": tick}
+        for passenger_id, (origin, destination, tick) in enumerate(
+            zip(origins[order].tolist(), destinations[order].tolist(), ticks[order].tolist()), 1
+        )
+    ]
+
+
 def generate_up_peak_traffic(
     floors: int = 10, duration: int = 300, intensity: float = 0.6, max_people: int = 100, seed: int = 42
 ) -> List[Dict[str, Any]]:
     """生成上行高峰流量 - 主要从底层到高层"""
-    random.seed(seed)
-    traffic = []
-    passenger_id = 1
+    rng = np.random.default_rng(seed)
 
     # 根据目标人数调整强度
     adjusted_intensity = calculate_intensity_for_scale(intensity, floors, max_people, duration)
 
-    for tick in range(duration):
-        # 根据时间调整强度 - 早期高峰
-        time_factor = 1.0 + 0.5 * math.sin(tick * math.pi / duration)
-        current_intensity = adjusted_intensity * time_factor
-
-        if random.random() < current_intensity:
-            # 针对小建筑调整比例 - 小建筑大厅使用更频繁
-            lobby_ratio = 0.95 if floors <= 5 else 0.9
+    # 根据时间调整强度 - 早期高峰
+    t = np.arange(duration)
+    ticks = _poisson_arrivals(rng, adjusted_intensity * (1.0 + 0.5 * np.sin(t * np.pi / duration)))
+    n = len(ticks)
 
-            if random.random() < lobby_ratio:
-                origin = 0
-                destination = random.randint(1, floors - 1)
-            else:
-                # 其他楼层间流量
-                if floors > 2:
-                    origin = random.randint(1, min(floors - 2, floors - 1))
-                    destination = random.randint(origin + 1, floors - 1)
-                else:
-                    origin = 0
-                    destination = floors - 1
+    # 针对小建筑调整比例 - 小建筑大厅使用更频繁
+    lobby_ratio = 0.95 if floors <= 5 else 0.9
+    from_lobby = rng.random(n) < lobby_ratio
 
-            traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
-            passenger_id += 1
+    # 其他楼层间流量
+    if floors > 2:
+        other_origins = rng.integers(1, floors - 1, n)
+        other_destinations = rng.integers(other_origins + 1, floors)
+    else:
+        other_origins = np.zeros(n, dtype=np.int64)
+        other_destinations = np.full(n, floors - 1)
 
-    return limit_traffic_count(traffic, max_people)
+    origins = np.where(from_lobby, 0, other_origins)
+    destinations = np.where(from_lobby, rng.integers(1, floors, n), other_destinations)
+    return _build_traffic(ticks, origins, destinations, max_people)
 
 
 def generate_down_peak_traffic(
     floors: int = 10, duration: int = 300, intensity: float = 0.6, max_people: int = 100, seed: int = 42
 ) -> List[Dict[str, Any]]:
     """生成下行高峰流量 - 主要从高层到底层"""
-    random.seed(seed)
-    traffic = []
-    passenger_id = 1
+    rng = np.random.default_rng(seed)
 
     # 根据目标人数调整强度
     adjusted_intensity = calculate_intensity_for_scale(intensity, floors, max_people, duration)
 
-    for tick in range(duration):
-        # 根据时间调整强度 - 后期高峰
-        time_factor = 1.0 + 0.5 * math.sin((tick + duration / 2) * math.pi / duration)
-        current_intensity = adjusted_intensity * time_factor
-
-        if random.random() < current_intensity:
-            # 针对小建筑调整比例 - 小建筑到大厅更频繁
-            lobby_ratio = 0.95 if floors <= 5 else 0.9
+    # 根据时间调整强度 - 后期高峰
+    t = np.arange(duration)
+    ticks = _poisson_arrivals(rng, adjusted_intensity * (1.0 + 0.5 * np.sin((t + duration / 2) * np.pi / duration)))
+    n = len(ticks)
 
-            if random.random() < lobby_ratio:
-                origin = random.randint(1, floors - 1)
-                destination = 0
-            else:
-                # 其他楼层间流量
-                if floors > 2:
-                    origin = random.randint(2, floors - 1)
-                    destination = random.randint(1, origin - 1)
-                else:
-                    origin = floors - 1
-                    destination = 0
+    # 针对小建筑调整比例 - 小建筑到大厅更频繁
+    lobby_ratio = 0.95 if floors <= 5 else 0.9
+    to_lobby = rng.random(n) < lobby_ratio
 
-            traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
-            passenger_id += 1
+    # 其他楼层间流量
+    if floors > 2:
+        other_origins = rng.integers(2, floors, n)
+        other_destinations = rng.integers(1, other_origins)
+    else:
+        other_origins = np.full(n, floors - 1)
+        other_destinations = np.zeros(n, dtype=np.int64)
 
-    return limit_traffic_count(traffic, max_people)
+    origins = np.where(to_lobby, rng.integers(1, floors, n), other_origins)
+    destinations = np.where(to_lobby, 0, other_destinations)
+    return _build_traffic(ticks, origins, destinations, max_people)
 
 
 def generate_inter_floor_traffic(
     floors: int = 10, duration: int = 400, intensity: float = 0.4, max_people: int = 80, seed: int = 42
 ) -> List[Dict[str, Any]]:
     """生成楼层间流量 - 主要楼层间移动，适合小建筑"""
-    random.seed(seed)
-    traffic = []
-    passenger_id = 1
+    rng = np.random.default_rng(seed)
 
     # 小建筑更适合这种场景，调整强度
     if floors <= 5:
@@ -154,127 +173,86 @@ def generate_inter_floor_traffic(
     else:
         adjusted_intensity = calculate_intensity_for_scale(intensity, floors, max_people, duration)
 
-    for tick in range(duration):
-        # 平稳的流量，轻微波动
-        time_variation = 1.0 + 0.2 * math.sin(tick * 2 * math.pi / duration)
-        current_intensity = adjusted_intensity * time_variation
-
-        if random.random() < current_intensity:
-            if floors <= 3:
-                # 超小建筑，允许包含大厅
-                origin = random.randint(0, floors - 1)
-                destination = random.choice([f for f in range(floors) if f != origin])
-            else:
-                # 其他建筑，避免大厅
-                origin = random.randint(1, floors - 1)
-                destination = random.choice([f for f in range(1, floors) if f != origin])
+    # 平稳的流量，轻微波动
+    t = np.arange(duration)
+    ticks = _poisson_arrivals(rng, adjusted_intensity * (1.0 + 0.2 * np.sin(t * 2 * np.pi / duration)))
 
-            traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
-            passenger_id += 1
-
-    return limit_traffic_count(traffic, max_people)
+    # 超小建筑允许包含大厅，其他建筑避免大厅
+    low = 0 if floors <= 3 else 1
+    origins, destinations = _uniform_trips(rng, len(ticks), low, floors)
+    return _build_traffic(ticks, origins, destinations, max_people)
 
 
 def generate_lunch_rush_traffic(
     floors: int = 10, duration: int = 200, intensity: float = 0.7, max_people: int = 60, seed: int = 42
 ) -> List[Dict[str, Any]]:
     """生成午餐时间流量 - 双向流量，适合中大型建筑"""
-    random.seed(seed)
-    traffic = []
-    passenger_id = 1
+    rng = np.random.default_rng(seed)
+
+    # 高斯分布的流量强度
+    t = np.arange(duration)
+    peak_center = duration // 2
+    peak_width = max(1, duration // 4)
+    distance_from_peak = np.abs(t - peak_center) / peak_width
+    peak_shape = np.exp(-distance_from_peak * distance_from_peak)
 
     # 小建筑没有餐厅概念，生成简单的双向流量
     if floors <= 5:
         # 小建筑简化为楼层间随机流量
         adjusted_intensity = calculate_intensity_for_scale(intensity * 0.6, floors, max_people, duration)
+        ticks = _poisson_arrivals(rng, adjusted_intensity * np.maximum(0.3, peak_shape))
+        origins, destinations = _uniform_trips(rng, len(ticks), 0, floors)
+        return _build_traffic(ticks, origins, destinations, max_people)
 
-        for tick in range(duration):
-            # 高斯分布的流量强度
-            peak_center = duration // 2
-            peak_width = duration // 4
-            distance_from_peak = abs(tick - peak_center) / peak_width
-            current_intensity = adjusted_intensity * max(0.3, math.exp(-distance_from_peak * distance_from_peak))
-
-            if random.random() < current_intensity:
-                origin = random.randint(0, floors - 1)
-                destination = random.choice([f for f in range(floors) if f != origin])
-                traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
-                passenger_id += 1
-    else:
-        # 中大型建筑，假设1-2楼是餐厅，3+楼是办公室
-        restaurant_floors = [1, 2] if floors > 2 else [1]
-        office_floors = list(range(max(3, len(restaurant_floors) + 1), floors))
-
-        adjusted_intensity = calculate_intensity_for_scale(intensity, floors, max_people, duration)
+    # 中大型建筑，假设1-2楼是餐厅，3+楼是办公室
+    restaurant_floors = np.array([1, 2] if floors > 2 else [1])
+    office_floors = np.arange(max(3, len(restaurant_floors) + 1), floors)
 
-        for tick in range(duration):
-            # 高斯分布的流量强度
-            peak_center = duration // 2
-            peak_width = duration // 4
-            distance_from_peak = abs(tick - peak_center) / peak_width
-            current_intensity = adjusted_intensity * max(0.2, math.exp(-distance_from_peak * distance_from_peak))
-
-            if random.random() < current_intensity:
-                if office_floors and random.random() < 0.5:
-                    # 去餐厅
-                    origin = random.choice(office_floors)
-                    destination = random.choice(restaurant_floors)
-                else:
-                    # 回办公室
-                    origin = random.choice(restaurant_floors)
-                    destination = random.choice(office_floors) if office_floors else 0
+    adjusted_intensity = calculate_intensity_for_scale(intensity, floors, max_people, duration)
+    ticks = _poisson_arrivals(rng, adjusted_intensity * np.maximum(0.2, peak_shape))
+    n = len(ticks)
 
-                traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
-                passenger_id += 1
+    restaurants = rng.choice(restaurant_floors, n)
+    if len(office_floors) == 0:
+        return _build_traffic(ticks, restaurants, np.zeros(n, dtype=np.int64), max_people)
 
-    return limit_traffic_count(traffic, max_people)
+    # 一半去餐厅，一半回办公室
+    offices = rng.choice(office_floors, n)
+    to_restaurant = rng.random(n) < 0.5
+    origins = np.where(to_restaurant, offices, restaurants)
+    destinations = np.where(to_restaurant, restaurants, offices)
+    return _build_traffic(ticks, origins, destinations, max_people)
 
 
 def generate_random_traffic(
     floors: int = 10, duration: int = 500, intensity: float = 0.3, max_people: int = 80, seed: int = 42
 ) -> List[Dict[str, Any]]:
     """生成随机流量 - 均匀分布，适合所有规模建筑"""
-    random.seed(seed)
-    traffic = []
-    passenger_id = 1
+    rng = np.random.default_rng(seed)
 
     # 根据目标人数调整强度
     adjusted_intensity = calculate_intensity_for_scale(intensity, floors, max_people, duration)
 
-    for tick in range(duration):
-        # 添加轻微的时间变化，避免完全平坦
-        time_variation = 1.0 + 0.1 * math.sin(tick * 4 * math.pi / duration)
-        current_intensity = adjusted_intensity * time_variation
-
-        if random.random() < current_intensity:
-            origin = random.randint(0, floors - 1)
-            destination = random.choice([f for f in range(floors) if f != origin])
-
-            traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
-            passenger_id += 1
-
-    return limit_traffic_count(traffic, max_people)
+    # 添加轻微的时间变化，避免完全平坦
+    t = np.arange(duration)
+    ticks = _poisson_arrivals(rng, adjusted_intensity * (1.0 + 0.1 * np.sin(t * 4 * np.pi / duration)))
+    origins, destinations = _uniform_trips(rng, len(ticks), 0, floors)
+    return _build_traffic(ticks, origins, destinations, max_people)
 
 
 def generate_fire_evacuation_traffic(
     floors: int = 10, duration: int = 150, max_people: int = 120, seed: int = 42
 ) -> List[Dict[str, Any]]:
     """生成火警疏散流量 - 紧急疏散到大厅"""
-    random.seed(seed)
-    traffic = []
-    passenger_id = 1
+    rng = np.random.default_rng(seed)
 
     # 正常时间段
     normal_duration = duration // 3
 
     # 正常流量 - 较少
     normal_intensity = 0.15
-    for tick in range(normal_duration):
-        if random.random() < normal_intensity:
-            origin = random.randint(0, floors - 1)
-            destination = random.choice([f for f in range(floors) if f != origin])
-            traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
-            passenger_id += 1
+    normal_ticks = _poisson_arrivals(rng, np.full(normal_duration, normal_intensity))
+    normal_origins, normal_destinations = _uniform_trips(rng, len(normal_ticks), 0, floors)
 
     # 火警开始 - 大量疏散到大厅
     alarm_tick = normal_duration
@@ -287,26 +265,25 @@ def generate_fire_evacuation_traffic(
     else:
         people_per_floor = (4, 8)  # 大建筑每层4-8人
 
-    for floor in range(1, floors):
-        # 每层随机数量的人需要疏散
-        num_people = random.randint(people_per_floor[0], people_per_floor[1])
-        for i in range(num_people):
-            # 在10个tick内陆续到达，模拟疏散的紧急性
-            arrival_tick = alarm_tick + random.randint(0, min(10, duration - alarm_tick - 1))
-            if arrival_tick < duration:
-                traffic.append({"id": passenger_id, "origin": floor, "destination": 0, "tick": arrival_tick})  # 疏散到大厅
-                passenger_id += 1
+    # 每层随机数量的人需要疏散，在10个tick内陆续到达，模拟疏散的紧急性
+    people_counts = rng.integers(people_per_floor[0], people_per_floor[1] + 1, floors - 1)
+    evacuee_origins = np.repeat(np.arange(1, floors), people_counts)
+    spread = max(0, min(10, duration - alarm_tick - 1))
+    evacuee_ticks = alarm_tick + rng.integers(0, spread + 1, len(evacuee_origins))
+    in_time = evacuee_ticks < duration
 
-    return limit_traffic_count(traffic, max_people)
+    ticks = np.concatenate([normal_ticks, evacuee_ticks[in_time]])
+    origins = np.concatenate([normal_origins, evacuee_origins[in_time]])
+    destinations = np.concatenate([normal_destinations, np.zeros(int(in_time.sum()), dtype=np.int64)])
+    return _build_traffic(ticks, origins, destinations, max_people)
 
 
 def generate_mixed_scenario_traffic(
     floors: int = 10, duration: int = 600, max_people: int = 150, seed: int = 42
 ) -> List[Dict[str, Any]]:
     """生成混合场景流量 - 包含多种模式，适合中大型建筑"""
-    random.seed(seed)
-    traffic = []
-    passenger_id = 1
+    rng = np.random.default_rng(seed)
+    phases: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
 
     # 根据人数目标调整各阶段强度
     target_per_phase = max_people // 4
@@ -314,218 +291,150 @@ def generate_mixed_scenario_traffic(
     # 第一阶段：上行高峰 (0-25%)
     phase1_end = duration // 4
     phase1_intensity = calculate_intensity_for_scale(0.7, floors, target_per_phase, phase1_end)
-
-    for tick in range(phase1_end):
-        if random.random() < phase1_intensity:
-            lobby_ratio = 0.9 if floors > 5 else 0.95
-            if random.random() < lobby_ratio:
-                origin = 0
-                destination = random.randint(1, floors - 1)
-            else:
-                if floors > 2:
-                    origin = random.randint(0, floors - 2)
-                    destination = random.randint(origin + 1, floors - 1)
-                else:
-                    origin = 0
-                    destination = floors - 1
-
-            traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
-            passenger_id += 1
+    ticks = _poisson_arrivals(rng, np.full(phase1_end, phase1_intensity))
+    n = len(ticks)
+    lobby_ratio = 0.9 if floors > 5 else 0.95
+    from_lobby = rng.random(n) < lobby_ratio
+    if floors > 2:
+        other_origins = rng.integers(0, floors - 1, n)
+        other_destinations = rng.integers(other_origins + 1, floors)
+    else:
+        other_origins = np.zeros(n, dtype=np.int64)
+        other_destinations = np.full(n, floors - 1)
+    phases.append(
+        (
+            ticks,
+            np.where(from_lobby, 0, other_origins),
+            np.where(from_lobby, rng.integers(1, floors, n), other_destinations),
+        )
+    )
 
     # 第二阶段：正常流量 (25%-50%)
     phase2_end = duration // 2
     phase2_intensity = calculate_intensity_for_scale(0.3, floors, target_per_phase, phase2_end - phase1_end)
-
-    for tick in range(phase1_end, phase2_end):
-        if random.random() < phase2_intensity:
-            origin = random.randint(0, floors - 1)
-            destination = random.choice([f for f in range(floors) if f != origin])
-
-            traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
-            passenger_id += 1
+    ticks = _poisson_arrivals(rng, np.full(phase2_end - phase1_end, phase2_intensity), phase1_end)
+    phases.append((ticks, *_uniform_trips(rng, len(ticks), 0, floors)))
 
     # 第三阶段：午餐/中峰流量 (50%-67%)
     phase3_end = phase2_end + duration // 6
     phase3_intensity = calculate_intensity_for_scale(0.6, floors, target_per_phase, phase3_end - phase2_end)
-
-    for tick in range(phase2_end, phase3_end):
-        if random.random() < phase3_intensity:
-            if floors > 5 and random.random() < 0.6:
-                # 餐厅流量 - 仅适用于大型建筑
-                if random.random() < 0.5:
-                    origin = random.randint(3, floors - 1)
-                    destination = random.randint(1, 2)
-                else:
-                    origin = random.randint(1, 2)
-                    destination = random.randint(3, floors - 1)
-            else:
-                # 其他流量
-                origin = random.randint(0, floors - 1)
-                destination = random.choice([f for f in range(floors) if f != origin])
-
-            traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
-            passenger_id += 1
+    ticks = _poisson_arrivals(rng, np.full(phase3_end - phase2_end, phase3_intensity), phase2_end)
+    n = len(ticks)
+    origins, destinations = _uniform_trips(rng, n, 0, floors)
+    if floors > 5:
+        # 餐厅流量 - 仅适用于大型建筑
+        restaurant_trip = rng.random(n) < 0.6
+        to_restaurant = rng.random(n) < 0.5
+        offices = rng.integers(3, floors, n)
+        restaurants = rng.integers(1, 3, n)
+        origins = np.where(restaurant_trip, np.where(to_restaurant, offices, restaurants), origins)
+        destinations = np.where(restaurant_trip, np.where(to_restaurant, restaurants, offices), destinations)
+    phases.append((ticks, origins, destinations))
 
     # 第四阶段：下行高峰 (67%-100%)
     phase4_intensity = calculate_intensity_for_scale(0.6, floors, target_per_phase, duration - phase3_end)
+    ticks = _poisson_arrivals(rng, np.full(duration - phase3_end, phase4_intensity), phase3_end)
+    n = len(ticks)
+    lobby_ratio = 0.85 if floors > 5 else 0.9
+    to_lobby = rng.random(n) < lobby_ratio
+    if floors > 2:
+        other_origins = rng.integers(2, floors, n)
+        other_destinations = rng.integers(1, other_origins)
+    else:
+        other_origins = np.full(n, floors - 1)
+        other_destinations = np.zeros(n, dtype=np.int64)
+    phases.append(
+        (
+            ticks,
+            np.where(to_lobby, rng.integers(1, floors, n), other_origins),
+            np.where(to_lobby, 0, other_destinations),
+        )
+    )
 
-    for tick in range(phase3_end, duration):
-        if random.random() < phase4_intensity:
-            lobby_ratio = 0.85 if floors > 5 else 0.9
-            if random.random() < lobby_ratio:
-                origin = random.randint(1, floors - 1)
-                destination = 0
-            else:
-                if floors > 2:
-                    origin = random.randint(2, floors - 1)
-                    destination = random.randint(1, origin - 1)
-                else:
-                    origin = floors - 1
-                    destination = 0
-
-            traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
-            passenger_id += 1
-
-    return limit_traffic_count(traffic, max_people)
+    all_ticks, all_origins, all_destinations = (np.concatenate(column) for column in zip(*phases))
+    return _build_traffic(all_ticks, all_origins, all_destinations, max_people)
 
 
 def generate_high_density_traffic(
     floors: int = 10, duration: int = 300, intensity: float = 1.2, max_people: int = 200, seed: int = 42
 ) -> List[Dict[str, Any]]:
     """生成高密度流量 - 压力测试，适合测试电梯系统极限"""
-    random.seed(seed)
-    traffic = []
-    passenger_id = 1
+    rng = np.random.default_rng(seed)
 
     # 计算目标强度，确保不超过人数限制
     target_people_per_tick = max_people / duration
     safe_intensity = min(intensity, target_people_per_tick * 1.5)  # 留出一些余量
 
-    for tick in range(duration):
-        # 高强度的随机流量，使用高斯分布增加变化
-        base_passengers = safe_intensity
-        variation = random.gauss(0, safe_intensity * 0.3)  # 30%变化
-        num_passengers = max(0, int(base_passengers + variation))
-
-        for _ in range(num_passengers):
-            origin = random.randint(0, floors - 1)
-            destination = random.choice([f for f in range(floors) if f != origin])
-
-            traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
-            passenger_id += 1
-
-            # 提前检查，避免生成过多乘客
-            if len(traffic) >= max_people:
-                break
+    # 高强度的随机流量，使用高斯分布增加变化（30%变化）
+    variation = rng.normal(0.0, safe_intensity * 0.3, duration)
+    counts = np.maximum(0, (safe_intensity + variation).astype(np.int64))
+    ticks = np.repeat(np.arange(duration), counts)
 
-        if len(traffic) >= max_people:
-            break
-
-    return limit_traffic_count(traffic, max_people)
+    origins, destinations = _uniform_trips(rng, len(ticks), 0, floors)
+    return _build_traffic(ticks, origins, destinations, max_people)
 
 
 def generate_small_building_traffic(
     floors: int = 4, duration: int = 180, intensity: float = 0.4, max_people: int = 25, seed: int = 42
 ) -> List[Dict[str, Any]]:
     """生成小建筑专用流量 - 简单楼层间移动，适合3-5层建筑"""
-    random.seed(seed)
-    traffic = []
-    passenger_id = 1
+    rng = np.random.default_rng(seed)
 
     # 小建筑特点：频繁使用大厅，简单的上下楼
     adjusted_intensity = calculate_intensity_for_scale(intensity, floors, max_people, duration)
 
-    for tick in range(duration):
-        # 轻微的时间变化
-        time_factor = 1.0 + 0.3 * math.sin(tick * 2 * math.pi / duration)
-        current_intensity = adjusted_intensity * time_factor
-
-        if random.random() < current_intensity:
-            # 80%涉及大厅的移动
-            if random.random() < 0.8:
-                if random.random() < 0.5:
-                    # 从大厅上楼
-                    origin = 0
-                    destination = random.randint(1, floors - 1)
-                else:
-                    # 下到大厅
-                    origin = random.randint(1, floors - 1)
-                    destination = 0
-            else:
-                # 楼层间移动
-                origin = random.randint(1, floors - 1)
-                destination = random.choice([f for f in range(1, floors) if f != origin])
-
-            traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
-            passenger_id += 1
-
-    return limit_traffic_count(traffic, max_people)
+    # 轻微的时间变化
+    t = np.arange(duration)
+    ticks = _poisson_arrivals(rng, adjusted_intensity * (1.0 + 0.3 * np.sin(t * 2 * np.pi / duration)))
+    n = len(ticks)
+
+    # 80%涉及大厅的移动，其中一半从大厅上楼、一半下到大厅；其余为楼层间移动
+    via_lobby = rng.random(n) < 0.8
+    upward = rng.random(n) < 0.5
+    upper_floors = rng.integers(1, floors, n)
+    origins, destinations = _uniform_trips(rng, n, 1, floors)
+    origins = np.where(via_lobby, np.where(upward, 0, upper_floors), origins)
+    destinations = np.where(via_lobby, np.where(upward, upper_floors, 0), destinations)
+    return _build_traffic(ticks, origins, destinations, max_people)
 
 
 def generate_medical_building_traffic(
     floors: int = 8, duration: int = 240, intensity: float = 0.5, max_people: int = 80, seed: int = 42
 ) -> List[Dict[str, Any]]:
     """生成医疗建筑流量 - 模拟医院/诊所的特殊流量模式"""
-    random.seed(seed)
-    traffic = []
-    passenger_id = 1
+    rng = np.random.default_rng(seed)
 
     # 医疗建筑特点：大厅使用频繁，某些楼层(如手术室)访问较少
     adjusted_intensity = calculate_intensity_for_scale(intensity, floors, max_people, duration)
 
-    # 定义楼层类型权重 - 大厅和低层更频繁
-    floor_weights = []
-    for floor in range(floors):
-        if floor == 0:  # 大厅 - 最高权重
-            weight = 3.0
-        elif floor <= 2:  # 急诊、门诊 - 高权重
-            weight = 2.0
-        elif floor <= floors - 2:  # 普通病房 - 中等权重
-            weight = 1.0
-        else:  # 手术室、ICU - 低权重
-            weight = 0.3
-        floor_weights.append(weight)
-
-    for tick in range(duration):
-        # 医疗建筑通常有明显的时间模式
-        time_factor = 1.0 + 0.4 * math.sin((tick + duration * 0.2) * math.pi / duration)
-        current_intensity = adjusted_intensity * time_factor
-
-        if random.random() < current_intensity:
-            # 85%的移动涉及大厅
-            if random.random() < 0.85:
-                if random.random() < 0.6:
-                    # 从大厅到其他楼层
-                    origin = 0
-                    # 使用权重选择目标楼层
-                    destinations = list(range(1, floors))
-                    weights = floor_weights[1:]
-                    destination = random.choices(destinations, weights=weights)[0]
-                else:
-                    # 从其他楼层到大厅
-                    origins = list(range(1, floors))
-                    weights = floor_weights[1:]
-                    origin = random.choices(origins, weights=weights)[0]
-                    destination = 0
-            else:
-                # 楼层间移动（较少）
-                floor_candidates = list(range(floors))
-                origin = random.choice(floor_candidates)
-                destination = random.choice([f for f in floor_candidates if f != origin])
-
-            traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
-            passenger_id += 1
-
-    return limit_traffic_count(traffic, max_people)
+    # 定义楼层类型权重 - 大厅(3.0)、急诊门诊(2.0)、普通病房(1.0)、手术室ICU(0.3)
+    floor_index = np.arange(floors)
+    floor_weights = np.where(
+        floor_index == 0, 3.0, np.where(floor_index <= 2, 2.0, np.where(floor_index <= floors - 2, 1.0, 0.3))
+    )
+    upper_weights = floor_weights[1:] / floor_weights[1:].sum()
+
+    # 医疗建筑通常有明显的时间模式
+    t = np.arange(duration)
+    ticks = _poisson_arrivals(rng, adjusted_intensity * (1.0 + 0.4 * np.sin((t + duration * 0.2) * np.pi / duration)))
+    n = len(ticks)
+
+    # 85%的移动涉及大厅：60%从大厅到其他楼层，其余从其他楼层到大厅（均按权重选择楼层）
+    via_lobby = rng.random(n) < 0.85
+    from_lobby = rng.random(n) < 0.6
+    weighted_floors = rng.choice(floor_index[1:], n, p=upper_weights)
+    # 楼层间移动（较少）
+    origins, destinations = _uniform_trips(rng, n, 0, floors)
+    origins = np.where(via_lobby, np.where(from_lobby, 0, weighted_floors), origins)
+    destinations = np.where(via_lobby, np.where(from_lobby, weighted_floors, 0), destinations)
+    return _build_traffic(ticks, origins, destinations, max_people)
 
 
 def generate_meeting_event_traffic(
     floors: int = 6, duration: int = 150, intensity: float = 0.8, max_people: int = 50, seed: int = 42
 ) -> List[Dict[str, Any]]:
     """生成会议事件流量 - 模拟大型会议开始和结束的流量模式"""
-    random.seed(seed)
-    traffic = []
-    passenger_id = 1
+    rng = np.random.default_rng(seed)
 
     # 假设会议在某个楼层举行
     meeting_floor = floors // 2 if floors > 2 else 1
@@ -534,66 +443,37 @@ def generate_meeting_event_traffic(
     arrival_end = duration // 3
     departure_start = duration * 2 // 3
 
-    for tick in range(duration):
-        should_add_passenger = False
-        origin = 0
-        destination = 0
-
-        if tick < arrival_end:
-            # 到达阶段 - 大量人员前往会议楼层
-            phase_progress = tick / arrival_end
-            current_intensity = intensity * (1.0 + math.sin(phase_progress * math.pi))
-
-            if random.random() < current_intensity:
-                # 主要从大厅到会议楼层
-                if random.random() < 0.9:
-                    origin = 0
-                    destination = meeting_floor
-                else:
-                    # 少量其他楼层间移动
-                    origin = random.randint(0, floors - 1)
-                    destination = random.choice([f for f in range(floors) if f != origin])
-                should_add_passenger = True
-
-        elif tick >= departure_start:
-            # 离开阶段 - 大量人员从会议楼层离开
-            phase_progress = (tick - departure_start) / (duration - departure_start)
-            current_intensity = intensity * (1.0 + math.sin(phase_progress * math.pi))
-
-            if random.random() < current_intensity:
-                # 主要从会议楼层到大厅
-                if random.random() < 0.9:
-                    origin = meeting_floor
-                    destination = 0
-                else:
-                    # 少量其他移动
-                    origin = random.randint(0, floors - 1)
-                    destination = random.choice([f for f in range(floors) if f != origin])
-                should_add_passenger = True
-        else:
-            # 中间阶段 - 低流量
-            if random.random() < intensity * 0.1:
-                origin = random.randint(0, floors - 1)
-                destination = random.choice([f for f in range(floors) if f != origin])
-                should_add_passenger = True
-
-        if should_add_passenger:
-            traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
-            passenger_id += 1
-
-    return limit_traffic_count(traffic, max_people)
+    # 到达/离开阶段强度按正弦上升再回落，中间阶段为低流量；
+    # 会议强度是未按人数缩放的每tick概率，超过1的部分截断，保持各阶段的人数比例
+    t = np.arange(duration)
+    rates = np.full(duration, intensity * 0.1)
+    arrival_progress = t[:arrival_end] / max(1, arrival_end)
+    rates[:arrival_end] = intensity * (1.0 + np.sin(arrival_progress * np.pi))
+    departure_progress = (t[departure_start:] - departure_start) / max(1, duration - departure_start)
+    rates[departure_start:] = intensity * (1.0 + np.sin(departure_progress * np.pi))
+    ticks = _poisson_arrivals(rng, np.minimum(rates, 1.0))
+    n = len(ticks)
+
+    # 到达阶段主要从大厅到会议楼层，离开阶段主要从会议楼层到大厅，其余为少量随机移动
+    origins, destinations = _uniform_trips(rng, n, 0, floors)
+    main_flow = rng.random(n) < 0.9
+    arriving = main_flow & (ticks < arrival_end)
+    departing = main_flow & (ticks >= departure_start)
+    origins = np.where(arriving, 0, np.where(departing, meeting_floor, origins))
+    destinations = np.where(arriving, meeting_floor, np.where(departing, 0, destinations))
+    return _build_traffic(ticks, origins, destinations, max_people)
 
 
 def generate_progressive_test_traffic(
     floors: int = 8, duration: int = 400, max_people: int = 100, seed: int = 42
 ) -> List[Dict[str, Any]]:
     """生成渐进式测试流量 - 从低强度逐渐增加到高强度"""
-    random.seed(seed)
-    traffic = []
-    passenger_id = 1
+    rng = np.random.default_rng(seed)
 
     # 分为四个阶段，强度逐渐增加
     stage_duration = duration // 4
+    rates = np.zeros(duration)
+    t = np.arange(duration)
 
     for stage in range(4):
         stage_start = stage * stage_duration
@@ -603,20 +483,13 @@ def generate_progressive_test_traffic(
         stage_target = max_people // 4
         adjusted_intensity = calculate_intensity_for_scale(stage_intensity, floors, stage_target, stage_duration)
 
-        for tick in range(stage_start, stage_end):
-            # 每个阶段内部也有变化
-            local_progress = (tick - stage_start) / stage_duration
-            time_factor = 1.0 + 0.3 * math.sin(local_progress * 2 * math.pi)
-            current_intensity = adjusted_intensity * time_factor
-
-            if random.random() < current_intensity:
-                origin = random.randint(0, floors - 1)
-                destination = random.choice([f for f in range(floors) if f != origin])
+        # 每个阶段内部也有变化
+        local_progress = (t[stage_start:stage_end] - stage_start) / max(1, stage_duration)
+        rates[stage_start:stage_end] = adjusted_intensity * (1.0 + 0.3 * np.sin(local_progress * 2 * np.pi))
 
-                traffic.append({"id": passenger_id, "origin": origin, "destination": destination, "tick": tick})
-                passenger_id += 1
-
-    return limit_traffic_count(traffic, max_people)
+    ticks = _poisson_arrivals(rng, rates)
+    origins, destinations = _uniform_trips(rng, len(ticks), 0, floors)
+    return _build_traffic(ticks, origins, destinations, max_people)
 
 
 # 按建筑规模分类的场景配置
@@ -726,6 +599,15 @@ TRAFFIC_SCENARIOS = {
 }
 
 
+# 单个生成任务：(场景名, 输出文件, 规模, 生成参数)
+GenerationJob = Tuple[str, str, str, Dict[str, Any]]
+
+
+def scenario_seed(seed: int, scenario_name: str) -> int:
+    """为每个场景派生不同的seed；使用CRC32而非hash()，不受字符串哈希随机化影响，跨进程可复现"""
+    return seed + zlib.crc32(scenario_name.encode("utf-8")) % 1000
+
+
 def determine_building_scale(floors: int, elevators: int) -> str:
     """根据楼层数和电梯数确定建筑规模"""
     if floors <= 5 and elevators <= 2:
@@ -737,7 +619,7 @@ def determine_building_scale(floors: int, elevators: int) -> str:
 
 
 def generate_traffic_file(scenario: str, output_file: str, scale: Optional[str] = None, **kwargs: Any) -> int:
-    """生成单个流量文件，支持规模化配置"""
+    """生成单个流量文件，支持规模化配置；输出格式由文件后缀决定（.json / .jsonl / .etb）"""
     if scenario not in TRAFFIC_SCENARIOS:
         raise ValueError(f"Unknown scenario: {scenario}. Available: {list(TRAFFIC_SCENARIOS.keys())}")
 
@@ -802,12 +684,24 @@ def generate_traffic_file(scenario: str, output_file: str, scale: Optional[str]
         "duration": params["duration"],
     }
 
-    # 组合完整的数据结构
-    complete_data = {"building": building_config, "traffic": traffic_data}
-
-    # 写入文件
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(complete_data, f, indent=2, ensure_ascii=False)
+    # 写入文件 - 大规模场景可使用流式或列式二进制格式，避免生成巨大的缩进JSON
+    suffix = Path(output_file).suffix
+    if suffix == BINARY_TRAFFIC_SUFFIX:
+        write_binary_traffic(
+            Path(output_file),
+            building_config,
+            [t["tick"] for t in traffic_data],
+            [t["origin"] for t in traffic_data],
+            [t["destination"] for t in traffic_data],
+            [t["id"] for t in traffic_data],
+        )
+    elif suffix == ".jsonl":
+        write_jsonl_traffic(Path(output_file), building_config, traffic_data)
+    else:
+        # 组合完整的数据结构
+        complete_data = {"building": building_config, "traffic": traffic_data}
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(complete_data, f, indent=2, ensure_ascii=False)
 
     print(f"Generated {len(traffic_data)} passengers for scenario '{scenario}' ({scale}) -> {output_file}")
     return len(traffic_data)
@@ -819,17 +713,25 @@ def generate_scaled_traffic_files(
     seed: int = 42,
     generate_all_scales: bool = False,
     custom_building: Optional[Dict[str, Any]] = None,
+    workers: int = 1,
 ) -> None:
-    """生成按规模分类的流量文件"""
+    """生成按规模分类的流量文件，workers > 1 时使用进程池并发生成"""
     output_path = Path(output_dir)
     output_path.mkdir(exist_ok=True)
 
     if generate_all_scales:
-        # 生成所有规模的文件
+        # 生成所有规模的文件 - 所有规模的所有场景放入同一个任务池
+        plans = []
         for scale_name in ["small", "medium", "large"]:
             scale_dir = output_path / scale_name
             scale_dir.mkdir(exist_ok=True)
-            _generate_files_for_scale(scale_dir, scale_name, seed)
+            plans.append((scale_dir, scale_name, _scale_jobs(scale_dir, scale_name, seed)))
+
+        results = _run_generation_jobs([job for _, _, jobs in plans for job in jobs], workers)
+        offset = 0
+        for scale_dir, scale_name, jobs in plans:
+            _report_scale(scale_dir, scale_name, results[offset : offset + len(jobs)])
+            offset += len(jobs)
     else:
         # 只生成指定规模
         if custom_building:
@@ -843,16 +745,22 @@ def generate_scaled_traffic_files(
                 print(f"Note: Building config suggests {detected_scale} scale, but {scale} was requested")
                 scale = detected_scale
 
-        _generate_files_for_scale(output_path, scale, seed, custom_building)
+        _generate_files_for_scale(output_path, scale, seed, custom_building, workers)
 
 
 def _generate_files_for_scale(
-    output_path: Path, scale: str, seed: int, custom_building: Optional[Dict[str, Any]] = None
+    output_path: Path, scale: str, seed: int, custom_building: Optional[Dict[str, Any]] = None, workers: int = 1
 ) -> None:
     """为指定规模生成所有适合的场景文件"""
+    jobs = _scale_jobs(output_path, scale, seed, custom_building)
+    _report_scale(output_path, scale, _run_generation_jobs(jobs, workers))
+
+
+def _scale_jobs(
+    output_path: Path, scale: str, seed: int, custom_building: Optional[Dict[str, Any]] = None
+) -> List[GenerationJob]:
+    """列出指定规模下所有适合场景的生成任务"""
     building_config = BUILDING_SCALES[scale]
-    total_passengers = 0
-    files_generated = 0
 
     # 确定建筑参数
     if custom_building:
@@ -868,30 +776,57 @@ def _generate_files_for_scale(
     print(f"\nGenerating {scale} scale traffic files:")
     print(f"Building: {floors} floors, {elevators} elevators, capacity {elevator_capacity}")
 
+    jobs: List[GenerationJob] = []
     for scenario_name, scenario_config in TRAFFIC_SCENARIOS.items():
         # 检查场景是否适合该规模
         config_dict: Dict[str, Any] = scenario_config
         if scale not in config_dict["suitable_scales"]:
             continue
 
-        filename = f"{scenario_name}.json"
-        file_path = output_path / filename
-
         # 准备参数
         params = {
             "floors": floors,
             "elevators": elevators,
             "elevator_capacity": elevator_capacity,
-            "seed": seed + hash(scenario_name) % 1000,  # 为每个场景使用不同的seed
+            "seed": scenario_seed(seed, scenario_name),  # 为每个场景使用不同的seed
         }
-
-        # 生成流量文件
-        try:
-            passenger_count = generate_traffic_file(scenario_name, str(file_path), scale=scale, **params)
-            total_passengers += passenger_count
-            files_generated += 1
-        except Exception as e:
-            print(f"Error generating {scenario_name}: {e}")
+        jobs.append((scenario_name, str(output_path / f"{scenario_name}.json"), scale, params))
+    return jobs
+
+
+def _run_generation_job(job: GenerationJob) -> int:
+    """执行单个生成任务（可在子进程中运行）"""
+    scenario_name, output_file, scale, params = job
+    return generate_traffic_file(scenario_name, output_file, scale=scale, **params)
+
+
+def _run_generation_jobs(jobs: List[GenerationJob], workers: int = 1) -> List[Optional[int]]:
+    """执行生成任务，返回与jobs顺序一致的乘客数，失败的任务为None"""
+    results: List[Optional[int]] = [None] * len(jobs)
+    if workers <= 1 or len(jobs) <= 1:
+        for index, job in enumerate(jobs):
+            try:
+                results[index] = _run_generation_job(job)
+            except Exception as e:
+                print(f"Error generating {job[0]}: {e}")
+        return results
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        futures = {executor.submit(_run_generation_job, job): index for index, job in enumerate(jobs)}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result()
+            except Exception as e:
+                print(f"Error generating {jobs[index][0]} ({jobs[index][2]}): {e}")
+    return results
+
+
+def _report_scale(output_path: Path, scale: str, results: List[Optional[int]]) -> None:
+    """打印指定规模的生成统计"""
+    counts = [count for count in results if count is not None]
+    total_passengers = sum(counts)
+    files_generated = len(counts)
 
     print(f"Generated {files_generated} traffic files for {scale} scale in {output_path}")
     print(f"Total passengers: {total_passengers}")
@@ -906,12 +841,15 @@ def generate_all_traffic_files(
     elevators: int = 2,
     elevator_capacity: int = 8,
     seed: int = 42,
+    workers: int = 1,
 ) -> None:
     """生成所有场景的流量文件 - 保持向后兼容"""
     scale = determine_building_scale(floors, elevators)
     custom_building = {"floors": floors, "elevators": elevators, "capacity": elevator_capacity}
 
-    generate_scaled_traffic_files(output_dir=output_dir, scale=scale, seed=seed, custom_building=custom_building)
+    generate_scaled_traffic_files(
+        output_dir=output_dir, scale=scale, seed=seed, custom_building=custom_building, workers=workers
+    )
 
 
 def main() -> None:
@@ -933,14 +871,18 @@ def main() -> None:
     parser.add_argument("--elevator-capacity", type=int, help="Elevator capacity")
     parser.add_argument("--seed", type=int, default=42, help="Random seed")
     parser.add_argument("--output-dir", type=str, default=None, help="Output directory (default: current directory)")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Worker processes for concurrent generation (0 = one per CPU)"
+    )
 
     args = parser.parse_args()
 
     output_dir = args.output_dir or os.path.dirname(__file__)
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
 
     if args.all_scales:
         # 生成所有规模的文件
-        generate_scaled_traffic_files(output_dir=output_dir, generate_all_scales=True, seed=args.seed)
+        generate_scaled_traffic_files(output_dir=output_dir, generate_all_scales=True, seed=args.seed, workers=workers)
     elif args.scale:
         # 生成指定规模的文件
         custom_building = None
@@ -954,7 +896,11 @@ def main() -> None:
                 custom_building["capacity"] = args.elevator_capacity
 
         generate_scaled_traffic_files(
-            output_dir=output_dir, scale=args.scale, seed=args.seed, custom_building=custom_building
+            output_dir=output_dir,
+            scale=args.scale,
+            seed=args.seed,
+            custom_building=custom_building,
+            workers=workers,
         )
     else:
         # 向后兼容模式：使用旧的参数
@@ -968,11 +914,14 @@ def main() -> None:
             elevators=elevators,
             elevator_capacity=elevator_capacity,
             seed=args.seed,
+            workers=workers,
         )
 
     print("\nUsage examples:")
     print("  # Generate all scales:")
     print("  python generators.py --all-scales")
+    print("  # Generate all scales concurrently on every CPU:")
+    print("  python generators.py --all-scales --workers 0")
     print("  # Generate small scale:")
     print("  python generators.py --scale small")
     print("  # Custom building (auto-detect scale):")
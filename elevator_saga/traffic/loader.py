@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Streaming Traffic Loader
+按tick顺序惰性读取流量文件，仅在内存中保留一个小的未来到达窗口
+
+行分隔格式（.jsonl）：
+    第一行为建筑配置 {"building": {...}}
+    之后每行一个乘客 {"origin": 0, "destination": 5, "tick": 1}，必须按tick非递减排列
+
+列式二进制格式（.etb）见 elevator_saga.traffic.binary
+"""
+import argparse
+import itertools
+import json
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from elevator_saga.core.models import TrafficEntry
+from elevator_saga.traffic.binary import BINARY_TRAFFIC_SUFFIX, iter_binary_traffic, load_binary_traffic
+from elevator_saga.traffic.cache import ScenarioCache
+
+# 默认预读窗口大小（条目数）
+DEFAULT_LOOKAHEAD = 256
+
+# 模拟器可以直接加载的流量文件后缀，按优先级排列：同名场景有多种格式时只加载最靠前的一种
+TRAFFIC_FILE_SUFFIXES = (BINARY_TRAFFIC_SUFFIX, ".jsonl", ".json")
+
+
+class TrafficStream:
+    """
+    按tick顺序提供乘客到达的流
+
+    从有序的 TrafficEntry 迭代器中分块读取，内存中最多保留 lookahead 个未来条目
+    """
+
+    def __init__(self, entries: Iterable[TrafficEntry], lookahead: int = DEFAULT_LOOKAHEAD):
+        if lookahead <= 0:
+            raise ValueError(f"lookahead must be positive, got {lookahead}")
+        self._source: Iterator[TrafficEntry] = iter(entries)
+        self._lookahead = lookahead
+        self._buffer: Deque[TrafficEntry] = deque()
+        self._last_tick = -1
+        self._exhausted = False
+
+    def _fill(self) -> None:
+        """从数据源补充预读窗口"""
+        if self._exhausted:
+            return
+        chunk = list(itertools.islice(self._source, self._lookahead))
+        if len(chunk) < self._lookahead:
+            self._exhausted = True
+        for entry in chunk:
+            if entry.tick < self._last_tick:
+                raise ValueError(
+                    f"Traffic entry {entry.id} at tick {entry.tick} is out of order (after {self._last_tick})"
+                )
+            self._last_tick = entry.tick
+        self._buffer.extend(chunk)
+
+    def peek_tick(self) -> Optional[int]:
+        """下一个到达乘客的tick，没有剩余乘客时返回None"""
+        if not self._buffer:
+            self._fill()
+        return self._buffer[0].tick if self._buffer else None
+
+    def pop_due(self, tick: int) -> List[TrafficEntry]:
+        """取出所有 tick <= 指定tick 的到达条目"""
+        due: List[TrafficEntry] = []
+        while True:
+            if not self._buffer:
+                self._fill()
+                if not self._buffer:
+                    break
+            if self._buffer[0].tick > tick:
+                break
+            due.append(self._buffer.popleft())
+        return due
+
+    def close(self) -> None:
+        """释放底层数据源（例如打开的文件）"""
+        close = getattr(self._source, "close", None)
+        if callable(close):
+            close()
+        self._buffer.clear()
+        self._exhausted = True
+
+    def __bool__(self) -> bool:
+        return self.peek_tick() is not None
+
+
+def iter_json_traffic(traffic_data: List[Dict[str, Any]], first_id: int = 1) -> Iterator[TrafficEntry]:
+    """将完整JSON文件中的traffic列表按tick排序后逐条产出，乘客ID按排序后的顺序重新分配"""
+    ordered = sorted(traffic_data, key=lambda t: int(t["tick"]))
+    for passenger_id, entry in enumerate(ordered, first_id):
+        yield TrafficEntry(
+            id=passenger_id, origin=entry["origin"], destination=entry["destination"], tick=entry["tick"]
+        )
+
+
+def iter_jsonl_traffic(path: Path, first_id: int = 1) -> Iterator[TrafficEntry]:
+    """逐行读取.jsonl流量文件（跳过首行建筑配置），乘客ID按行顺序分配"""
+    with open(path, "r", encoding="utf-8") as f:
+        f.readline()
+        passenger_id = first_id
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            yield TrafficEntry(
+                id=passenger_id, origin=entry["origin"], destination=entry["destination"], tick=entry["tick"]
+            )
+            passenger_id += 1
+
+
+def read_jsonl_header(path: Path) -> Dict[str, Any]:
+    """读取.jsonl流量文件首行的建筑配置"""
+    with open(path, "r", encoding="utf-8") as f:
+        header: Dict[str, Any] = json.loads(f.readline())
+    return dict(header["building"])
+
+
+def find_traffic_files(directory: Path) -> List[Path]:
+    """
+    目录中的流量文件，按文件名排序
+
+    转换工具默认把结果写在源文件旁边，同名（去掉后缀后相同）的场景只保留 TRAFFIC_FILE_SUFFIXES 中最靠前的格式，
+    避免转换后同一场景被运行多次
+    """
+    chosen: Dict[str, Path] = {}
+    for path in Path(directory).iterdir():
+        if not path.is_file() or path.suffix not in TRAFFIC_FILE_SUFFIXES:
+            continue
+        current = chosen.get(path.stem)
+        if current is None or TRAFFIC_FILE_SUFFIXES.index(path.suffix) < TRAFFIC_FILE_SUFFIXES.index(current.suffix):
+            chosen[path.stem] = path
+    return sorted(chosen.values())
+
+
+def open_traffic_stream(
+    path: Path,
+    first_id: int = 1,
+    lookahead: int = DEFAULT_LOOKAHEAD,
+    cache: Optional[ScenarioCache] = None,
+) -> Tuple[Dict[str, Any], TrafficStream]:
+    """
+    打开流量文件，返回建筑配置和到达流
+
+    .jsonl 文件按需逐行读取；.etb 文件内存映射后按块读取；
+    .json 文件仍需一次性解析，但同样以流的形式提供给模拟器；传入cache时只在文件内容变化后重新解析
+    """
+    path = Path(path)
+    if path.suffix == BINARY_TRAFFIC_SUFFIX:
+        traffic = load_binary_traffic(path)
+        return traffic.building, TrafficStream(iter_binary_traffic(traffic, first_id), lookahead)
+    if path.suffix == ".jsonl":
+        building = read_jsonl_header(path)
+        return building, TrafficStream(iter_jsonl_traffic(path, first_id), lookahead)
+    if cache is not None:
+        scenario = cache.get(path)
+        return dict(scenario.building), TrafficStream(scenario.iter_entries(first_id), lookahead)
+
+    with open(path, "r", encoding="utf-8") as f:
+        file_data = json.load(f)
+    return dict(file_data["building"]), TrafficStream(iter_json_traffic(file_data["traffic"], first_id), lookahead)
+
+
+def write_jsonl_traffic(path: Path, building: Dict[str, Any], traffic: Iterable[Dict[str, Any]]) -> int:
+    """将建筑配置和按tick排序的流量写为.jsonl文件，返回写入的乘客数"""
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"building": building}, ensure_ascii=False) + "\n")
+        for entry in sorted(traffic, key=lambda t: int(t["tick"])):
+            record = {"origin": entry["origin"], "destination": entry["destination"], "tick": entry["tick"]}
+            f.write(json.dumps(record) + "\n")
+            count += 1
+    return count
+
+
+def convert_json_to_jsonl(src: Path, dst: Path) -> int:
+    """将现有的.json流量文件转换为可流式读取的.jsonl文件"""
+    with open(src, "r", encoding="utf-8") as f:
+        file_data = json.load(f)
+    return write_jsonl_traffic(Path(dst), file_data["building"], file_data["traffic"])
+
+
+def main() -> None:
+    """命令行接口 - 将.json流量文件转换为.jsonl"""
+    parser = argparse.ArgumentParser(description="Convert traffic JSON files to the streaming line-delimited format")
+    parser.add_argument("src", type=str, help="Source .json traffic file")
+    parser.add_argument("dst", type=str, nargs="?", default=None, help="Destination .jsonl file")
+    args = parser.parse_args()
+
+    src = Path(args.src)
+    dst = Path(args.dst) if args.dst else src.with_suffix(".jsonl")
+    count = convert_json_to_jsonl(src, dst)
+    print(f"Converted {count} passengers: {src} -> {dst}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,35 +1,44 @@
 #!/usr/bin/env python3
 """
 电梯模拟数据记录器 - 集成版
-继承算法类，在运行时记录数据
+继承算法类运行算法，由服务端在每个tick结束时直接录制（不需要额外的状态请求），结束后导出 simulation_data.json
+需要与服务端共用文件系统（录制目录位于服务端的 recordings 目录下）
 """
-import json
+import os
 import time
-from typing import Any, Dict, List
+from typing import List
 from pathlib import Path
 
 from elevator_saga.client_examples.our_example import TestElevatorBusController
-from elevator_saga.client.proxy_models import ProxyElevator, ProxyFloor, ProxyPassenger
+from elevator_saga.client.proxy_models import ProxyElevator, ProxyFloor
 from elevator_saga.core.models import SimulationEvent
+from elevator_saga.recording.writer import export_combined
 
 
 class RecordingController(TestElevatorBusController):
     """带录制功能的电梯控制器"""
     
-    def __init__(self):
+    def __init__(self, name: str = ""):
         super().__init__()
-        self.scenarios_data = []
-        self.current_scenario_frames = []
+        self.recording_name = name or time.strftime("run_%Y%m%d_%H%M%S")
+        self.output_dir = None
         self.current_scenario_name = ""
         self.scenario_count = 0
         self.max_scenarios = 11
         
+    def on_start(self) -> None:
+        """开始服务端录制（服务端在加载每个流量文件时自动开始新场景）"""
+        super().on_start()
+        status = self.api_client.start_recording(self.recording_name, metadata={"algorithm": "OptimizedLOOK"})
+        if status is None:
+            raise RuntimeError("服务端录制启动失败")
+        self.output_dir = Path(status["directory"])
+        print(f"[录制] 服务端录制目录: {self.output_dir}")
+        
     def on_init(self, elevators: List[ProxyElevator], floors: List[ProxyFloor]) -> None:
-        """初始化时开始新场景的录制"""
+        """初始化时输出场景信息"""
         super().on_init(elevators, floors)
         
-        # 开始新场景
-        self.current_scenario_frames = []
         self.scenario_count += 1
         
         # 获取场景名称
@@ -48,21 +57,13 @@ class RecordingController(TestElevatorBusController):
         print(f"[场景] 开始记录场景 {self.scenario_count}: {self.current_scenario_name}")
         print(f"{'='*60}\n")
         
-        # 记录初始状态
-        state = self.api_client.get_state()
-        self.current_scenario_frames.append(self._serialize_state(state, []))
-        
     def on_event_execute_start(
         self, tick: int, events: List[SimulationEvent], 
         elevators: List[ProxyElevator], floors: List[ProxyFloor]
     ) -> None:
-        """每个tick开始时记录状态"""
+        """显示录制进度"""
         super().on_event_execute_start(tick, events, elevators, floors)
         
-        # 记录当前帧
-        state = self.api_client.get_state()
-        self.current_scenario_frames.append(self._serialize_state(state, events))
-        
         # 显示进度
         if tick % 50 == 0 and tick > 0:
             progress = tick * 100 // self.current_traffic_max_tick
@@ -91,31 +92,12 @@ class RecordingController(TestElevatorBusController):
             self._save_all_data()
     
     def _save_current_scenario(self):
-        """保存当前场景"""
-        if not self.current_scenario_frames:
-            return
-        
+        """输出当前场景的结果（场景由服务端在加载下一个流量文件时结束）"""
         state = self.api_client.get_state()
-        
-        scenario_data = {
-            "scenario_name": self.current_scenario_name,
-            "max_tick": self.current_traffic_max_tick,
-            "total_frames": len(self.current_scenario_frames),
-            "frames": self.current_scenario_frames,
-            "final_metrics": self._serialize_metrics(state.metrics),
-            "building_info": {
-                "floors": len(state.floors),
-                "elevators": len(state.elevators),
-                "max_capacity": state.elevators[0].max_capacity if state.elevators else 0
-            }
-        }
-        
-        self.scenarios_data.append(scenario_data)
-        
         metrics = state.metrics
         print(f"\n[OK] 场景 {self.scenario_count} 记录完成！")
         print(f"   - 场景名称: {self.current_scenario_name}")
-        print(f"   - 记录了 {len(self.current_scenario_frames)} 帧")
+        print(f"   - 记录到 tick {state.tick}")
         print(f"   - 完成乘客: {metrics.completed_passengers}/{metrics.total_passengers}")
         print(f"   - 完成率: {metrics.completion_rate*100:.1f}%")
     
@@ -125,113 +107,24 @@ class RecordingController(TestElevatorBusController):
         print("[保存] 正在保存数据到 simulation_data.json...")
         print(f"{'='*60}\n")
         
-        output_data = {
-            "version": "1.0",
-            "total_scenarios": len(self.scenarios_data),
-            "metadata": {
-                "algorithm": "OptimizedLOOK",
-                "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "total_frames": sum(s["total_frames"] for s in self.scenarios_data)
-            },
-            "scenarios": self.scenarios_data
-        }
-        
-        with open("simulation_data.json", "w", encoding="utf-8") as f:
-            json.dump(output_data, f, ensure_ascii=False, indent=2)
+        # 结束服务端录制（等待写完剩余的帧），再从录制目录流式导出可视化使用的单文件
+        status = self.api_client.stop_recording()
+        if status is None or "directory" not in status:
+            print("[错误] 服务端录制结束失败")
+            return
+        total_frames = export_combined(status["directory"], "simulation_data.json")
         
-        import os
         file_size = os.path.getsize("simulation_data.json") / (1024 * 1024)
         
         print("[OK] 数据已保存！")
+        print(f"   - 录制目录: {self.output_dir}")
         print(f"   - 文件: simulation_data.json")
         print(f"   - 大小: {file_size:.2f} MB")
-        print(f"   - 场景数: {len(self.scenarios_data)}")
-        print(f"   - 总帧数: {sum(s['total_frames'] for s in self.scenarios_data)}")
+        print(f"   - 场景数: {status['scenarios']}")
+        print(f"   - 总帧数: {total_frames}")
         print(f"\n{'='*60}")
         print("[完成] 记录完成！现在可以打开 index.html 查看可视化")
         print(f"{'='*60}\n")
-    
-    def _serialize_state(self, state: Any, events: List[Any]) -> Dict[str, Any]:
-        """序列化状态"""
-        # 只记录活跃乘客（waiting或in_elevator），不记录已完成的
-        active_passengers = {
-            str(pid): self._serialize_passenger(p) 
-            for pid, p in state.passengers.items()
-            if hasattr(p.status, 'value') and p.status.value != 'completed'
-        }
-        
-        return {
-            "tick": state.tick,
-            "elevators": [self._serialize_elevator(e) for e in state.elevators],
-            "floors": [self._serialize_floor(f) for f in state.floors],
-            "passengers": active_passengers,
-            "metrics": self._serialize_metrics(state.metrics),
-            "events": [self._serialize_event(e) for e in events]
-        }
-    
-    def _serialize_elevator(self, elevator: Any) -> Dict[str, Any]:
-        """序列化电梯"""
-        return {
-            "id": elevator.id,
-            "current_floor": elevator.current_floor,
-            "current_floor_float": elevator.current_floor_float,
-            "target_floor": elevator.target_floor if elevator.target_floor is not None else elevator.current_floor,
-            "passengers": list(elevator.passengers),
-            "passenger_count": len(elevator.passengers),
-            "max_capacity": elevator.max_capacity,
-            "load_factor": len(elevator.passengers) / elevator.max_capacity if elevator.max_capacity > 0 else 0,
-            "run_status": elevator.run_status.value if hasattr(elevator.run_status, 'value') else str(elevator.run_status),
-            "direction": elevator.target_floor_direction.value if hasattr(elevator.target_floor_direction, 'value') else str(elevator.target_floor_direction),
-            "last_direction": elevator.last_tick_direction.value if hasattr(elevator.last_tick_direction, 'value') else str(elevator.last_tick_direction),
-            "is_idle": elevator.is_idle,
-            "is_full": len(elevator.passengers) >= elevator.max_capacity,
-            "pressed_floors": elevator.pressed_floors,
-            "floor_up_position": elevator.position.floor_up_position
-        }
-    
-    def _serialize_floor(self, floor: Any) -> Dict[str, Any]:
-        """序列化楼层"""
-        return {
-            "floor": floor.floor,
-            "up_queue": list(floor.up_queue),
-            "down_queue": list(floor.down_queue),
-            "up_queue_count": len(floor.up_queue),
-            "down_queue_count": len(floor.down_queue),
-            "total_waiting": len(floor.up_queue) + len(floor.down_queue)
-        }
-    
-    def _serialize_passenger(self, passenger: Any) -> Dict[str, Any]:
-        """序列化乘客"""
-        return {
-            "id": passenger.id,
-            "origin": passenger.origin,
-            "destination": passenger.destination,
-            "arrive_tick": passenger.arrive_tick,
-            "status": passenger.status.value if hasattr(passenger.status, 'value') else str(passenger.status)
-        }
-    
-    def _serialize_metrics(self, metrics: Any) -> Dict[str, Any]:
-        """序列化性能指标"""
-        return {
-            "completed_passengers": metrics.completed_passengers,
-            "total_passengers": metrics.total_passengers,
-            "completion_rate": metrics.completion_rate,
-            "average_floor_wait_time": metrics.average_floor_wait_time,
-            "p95_floor_wait_time": metrics.p95_floor_wait_time,
-            "average_arrival_wait_time": metrics.average_arrival_wait_time,
-            "p95_arrival_wait_time": metrics.p95_arrival_wait_time
-        }
-    
-    def _serialize_event(self, event: Any) -> Dict[str, Any]:
-        """序列化事件"""
-        if hasattr(event, 'type'):
-            return {
-                "tick": event.tick if hasattr(event, 'tick') else 0,
-                "type": event.type.value if hasattr(event.type, 'value') else str(event.type),
-                "data": event.data if hasattr(event, 'data') else {}
-            }
-        else:
-            return event
 
 
 if __name__ == "__main__":
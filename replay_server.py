@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+录制回放服务
+提供 index.html 和录制数据的按需读取：场景列表和 manifest 立即返回，帧按区间读取，
+借助帧索引直接定位，打开和跳转的耗时与录制大小无关
+"""
+import argparse
+import os
+
+from flask import Flask, Response, jsonify, request, send_from_directory
+
+from elevator_saga.recording.replay import ReplayStore
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+app = Flask(__name__)
+store = ReplayStore("recordings")
+
+
+def error_response(error: Exception, status: int) -> tuple[Response, int]:
+    return jsonify({"error": str(error)}), status
+
+
+@app.route("/")
+@app.route("/index.html")
+def index_page() -> Response:
+    return send_from_directory(BASE_DIR, "index.html")
+
+
+@app.route("/simulation_data.json")
+def combined_data() -> Response:
+    """record.py 导出的单文件数据（回放服务中没有录制时 index.html 回退读取）"""
+    return send_from_directory(os.getcwd(), "simulation_data.json")
+
+
+@app.route("/api/replay/recordings")
+def list_recordings() -> Response:
+    """全部录制，最近的在前"""
+    return jsonify({"recordings": store.recordings()})
+
+
+@app.route("/api/replay/<name>/manifest")
+def get_manifest(name: str) -> Response | tuple[Response, int]:
+    try:
+        return jsonify(store.manifest(name))
+    except ValueError as e:
+        return error_response(e, 400)
+    except LookupError as e:
+        return error_response(e, 404)
+
+
+@app.route("/api/replay/<name>/scenarios/<int:scenario>/index")
+def get_index(name: str, scenario: int) -> Response | tuple[Response, int]:
+    """场景的帧索引（每隔 interval 帧的字节偏移）"""
+    try:
+        return jsonify(store.index(name, scenario).to_dict())
+    except ValueError as e:
+        return error_response(e, 400)
+    except LookupError as e:
+        return error_response(e, 404)
+
+
+@app.route("/api/replay/<name>/scenarios/<int:scenario>/lod")
+def get_lod(name: str, scenario: int) -> Response | tuple[Response, int]:
+    """场景的粗粒度轨道：每个关键帧一个精简帧，以及完成人数、平均等待时间等指标的时间序列"""
+    try:
+        return jsonify(store.lod(name, scenario))
+    except ValueError as e:
+        return error_response(e, 400)
+    except LookupError as e:
+        return error_response(e, 404)
+
+
+@app.route("/api/replay/<name>/scenarios/<int:scenario>/passengers")
+def get_passengers(name: str, scenario: int) -> Response | tuple[Response, int]:
+    """场景的乘客生命周期表（columns 和每个乘客一行的 rows），帧中只按ID引用乘客"""
+    try:
+        return jsonify(store.passengers(name, scenario))
+    except ValueError as e:
+        return error_response(e, 400)
+    except LookupError as e:
+        return error_response(e, 404)
+
+
+@app.route("/api/replay/<name>/scenarios/<int:scenario>/frames")
+def get_frames(name: str, scenario: int) -> Response | tuple[Response, int]:
+    """解码后的帧区间，参数 start（默认0）和 count（默认100，最多1000）"""
+    try:
+        start = int(request.args.get("start", 0))
+        count = int(request.args.get("count", 100))
+        return jsonify(store.frames(name, scenario, start, count))
+    except ValueError as e:
+        return error_response(e, 400)
+    except LookupError as e:
+        return error_response(e, 404)
+
+
+def main() -> None:
+    global store
+    parser = argparse.ArgumentParser(description="Recording replay server")
+    parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
+    parser.add_argument("--port", type=int, default=8080, help="Port to bind to")
+    parser.add_argument("--recordings-dir", default="recordings", help="Directory containing recordings")
+    args = parser.parse_args()
+
+    store = ReplayStore(args.recordings_dir)
+    print(f"录制回放服务运行在 http://{args.host}:{args.port}/index.html")
+    print(f"录制目录: {os.path.abspath(args.recordings_dir)}")
+    app.run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -56,6 +56,7 @@ def check_files():
     os.path.join(BASE_DIR, 'elevator_saga/server/simulator.py'),
     os.path.join(BASE_DIR, 'elevator_saga/client_examples/our_example.py'),
     os.path.join(BASE_DIR, 'record.py'),
+    os.path.join(BASE_DIR, 'replay_server.py'),
     os.path.join(BASE_DIR, 'index.html')
     ]
     
@@ -122,19 +123,19 @@ def record_data():
 
 
 def start_web_server():
-    """启动Web服务器"""
+    """启动Web服务器（回放服务：提供 index.html，并按需读取 recordings/ 下的录制帧）"""
     print("\n[Web] 启动 Web 服务器...")
     
     if sys.platform == "win32":
         # Windows
         web_process = subprocess.Popen(
-            [sys.executable, "-m", "http.server", "8080"],
+            [sys.executable, os.path.join(BASE_DIR, "replay_server.py"), "--port", "8080"],
             creationflags=subprocess.CREATE_NEW_CONSOLE
         )
     else:
         # Linux/Mac
         web_process = subprocess.Popen(
-            [sys.executable, "-m", "http.server", "8080"],
+            [sys.executable, os.path.join(BASE_DIR, "replay_server.py"), "--port", "8080"],
             stdout=subprocess.PIPE,
             stderr=subprocess.PIPE
         )
@@ -190,7 +191,7 @@ def main():
         print("请选择模式：")
         print("  1. 完整流程（推荐）- 启动服务器、运行优化算法并记录数据、打开可视化")
         print("  2. 仅数据记录 - 假设服务器已在运行")
-        print("  3. 仅可视化 - 假设 simulation_data.json 已存在")
+        print("  3. 仅可视化 - 假设 recordings/ 下已有录制或 simulation_data.json 已存在")
         print("="*70)
         
         choice = input("\n请输入选择 (1/2/3): ").strip()
@@ -255,8 +256,8 @@ def main():
             print("\n[Web] 仅可视化模式...")
             
             # 检查数据文件
-            if not Path("simulation_data.json").exists():
-                print("[错误] 未找到 simulation_data.json")
+            if not any(Path("recordings").glob("*/manifest.json")) and not Path("simulation_data.json").exists():
+                print("[错误] 未找到录制或 simulation_data.json")
                 print("   请先运行模式1或2生成数据")
                 sys.exit(1)
             
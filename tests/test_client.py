@@ -0,0 +1,103 @@
+"""
+Tests for proxies, event routing and controller instrumentation
+"""
+
+import pytest
+
+
+def test_proxy_snapshot():
+    """Test that proxies read from one indexed snapshot per tick and refresh after the tick is processed"""
+    from elevator_saga.client.api_client import ElevatorAPIClient
+    from elevator_saga.client.proxy_models import ProxyElevator, ProxyPassenger
+    from elevator_saga.client.transport import Transport
+
+    class StateTransport(Transport):
+        def __init__(self):
+            self.tick = 0
+
+        def request(self, method, endpoint, data=None, timeout=None):
+            assert (method, endpoint) == ("GET", "/api/state")
+            self.tick += 1
+            return {
+                "tick": self.tick,
+                "elevators": [{"id": i, "position": {"current_floor": self.tick + i}} for i in range(2)],
+                "floors": [{"floor": i} for i in range(3)],
+                "passengers": {"7": {"id": 7, "origin": 0, "destination": 2, "arrive_tick": self.tick}},
+            }
+
+    transport = StateTransport()
+    client = ElevatorAPIClient("http://127.0.0.1:1", transport=transport)
+    elevator, passenger = ProxyElevator(1, client), ProxyPassenger(7, client)
+
+    snapshot = client.get_snapshot()
+    assert snapshot.elevators[1] is snapshot.state.elevators[1] and snapshot.passengers[7].destination == 2
+    assert (elevator.current_floor, passenger.arrive_tick, elevator.current_floor) == (2, 1, 2)
+    assert transport.tick == 1
+
+    client.mark_tick_processed()
+    assert (elevator.current_floor, passenger.arrive_tick) == (3, 2) and transport.tick == 2
+    with pytest.raises(AttributeError):
+        elevator.current_floor = 5
+
+
+def test_proxy_registry_identity():
+    """Test that the registry hands out one proxy per ID with ID-based equality and hashing"""
+    from elevator_saga.client.api_client import ElevatorAPIClient
+    from elevator_saga.client.proxy_models import ProxyElevator, ProxyFloor, ProxyRegistry
+
+    client = ElevatorAPIClient("http://127.0.0.1:1")
+    registry = ProxyRegistry(client)
+
+    assert registry.elevator(0) is registry.elevator(0) and registry.elevator(0) is not registry.elevator(1)
+    assert registry.floor(2) is registry.floor(2)
+    assert registry.elevator(0) == ProxyElevator(0, client) and registry.elevator(0) != ProxyFloor(0, client)
+    assert {registry.elevator(0), ProxyElevator(0, client), registry.elevator(1)} == {
+        registry.elevator(0),
+        registry.elevator(1),
+    }
+
+    passenger = registry.passenger(3)
+    assert registry.passenger(3) is passenger
+    registry.clear_passengers()
+    assert registry.passenger(3) is not passenger and registry.passenger(3) == passenger
+    assert registry.elevator(0) is registry.elevator(0)
+
+
+def test_event_routes():
+    """Test that every routed event type maps to an existing controller method"""
+    from elevator_saga.client.base_controller import EVENT_ROUTES, ElevatorController, group_events_by_type
+
+    for route in EVENT_ROUTES.values():
+        assert callable(getattr(ElevatorController, route))
+    assert group_events_by_type([]) == {}
+
+
+def test_latency_histogram():
+    """Test that histogram percentiles stay within the 2x bucket error of the exact percentiles"""
+    import math
+    import random
+
+    from elevator_saga.client.instrumentation import LatencyHistogram
+
+    histogram = LatencyHistogram()
+    assert histogram.percentile(0.5) == 0.0 and histogram.summary()["mean_ms"] == 0.0
+
+    rng = random.Random(7)
+    samples = [rng.lognormvariate(math.log(200e-6), 1.0) for _ in range(5000)] + [0.2e-6]
+    for seconds in samples:
+        histogram.add(seconds)
+    samples.sort()
+    for fraction in (0.01, 0.5, 0.9, 0.95, 0.99, 1.0):
+        exact = samples[max(math.ceil(fraction * len(samples)) - 1, 0)]
+        estimate = histogram.percentile(fraction)
+        assert exact <= estimate <= 2 * exact, fraction
+    assert histogram.percentile(1.0) == max(samples)
+
+    summary = histogram.summary()
+    assert summary["count"] == len(samples) == sum(histogram.buckets)
+    assert summary["max_ms"] == max(samples) * 1e3
+    assert math.isclose(summary["mean_ms"], sum(samples) / len(samples) * 1e3)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
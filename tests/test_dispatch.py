@@ -0,0 +1,75 @@
+"""
+Tests for call assignment, ETA lookups and pending calls
+"""
+
+import pytest
+
+
+def test_linear_assignment():
+    """Test that linear_assignment finds the brute-force minimum and that solvers skip infeasible pairs"""
+    import itertools
+
+    import numpy as np
+
+    from elevator_saga.client.dispatcher import CostMatrixDispatcher, linear_assignment, sequential_greedy
+
+    rng = np.random.default_rng(11)
+    for _ in range(60):
+        n, m = rng.integers(1, 6, size=2).tolist()
+        cost = rng.integers(0, 20, size=(n, m)).astype(float)
+        cost[rng.random((n, m)) < 0.15] = np.inf
+        finite = np.where(np.isfinite(cost), cost, 1e12)
+        if n <= m:
+            best = min(finite[range(n), list(p)].sum() for p in itertools.permutations(range(m), n))
+        else:
+            best = min(finite[list(p), range(m)].sum() for p in itertools.permutations(range(n), m))
+
+        rows, columns = linear_assignment(cost)
+        assert len(rows) == min(n, m)
+        assert len(set(rows.tolist())) == len(rows) and len(set(columns.tolist())) == len(columns)
+        assert finite[rows, columns].sum() == best
+        assert all(np.isfinite(c) for _, _, c in CostMatrixDispatcher("hungarian").solve(cost))
+
+    inf = np.inf
+    cost = np.array([[1.0, 2.0], [0.0, 5.0], [3.0, 4.0]])
+    assert sequential_greedy(cost) == [(0, 0, 1.0), (1, 1, 5.0)]
+    assert sequential_greedy(cost, rows=[1, 0]) == [(1, 0, 0.0), (0, 1, 2.0)]
+    assert sequential_greedy(np.array([[inf, inf], [1.0, 2.0], [inf, 3.0]])) == [(1, 0, 1.0), (2, 1, 3.0)]
+    assert CostMatrixDispatcher("greedy").solve(np.array([[inf, 1.0], [inf, 2.0]])) == [(0, 1, 1.0)]
+
+
+def test_eta_oracle():
+    """Test exact ETA lookups for an idle elevator"""
+    from elevator_saga.client.eta import EtaOracle
+    from elevator_saga.core.models import ElevatorState, Position
+
+    elevator = ElevatorState(id=0, position=Position(current_floor=0, target_floor=0))
+    eta = EtaOracle(num_floors=3)
+    # 1 tick start-up + (10 - 2) / 2 ticks at constant speed + 1 tick slow-down
+    assert eta.ticks_to_floor(elevator, 0) == 0
+    assert eta.ticks_to_floor(elevator, 1) == 6
+    assert eta.eta_matrix([elevator]).tolist() == [[0.0, 6.0, 11.0]]
+
+
+def test_pending_calls():
+    """Test pending call aging, best call lookup and removal"""
+    from elevator_saga.client.pending_calls import PendingCalls
+    from elevator_saga.core.models import Direction
+
+    pending = PendingCalls(num_floors=6, aging_weight=0.5)
+    pending.add(1, 5, Direction.DOWN, arrive_tick=0)
+    pending.add(2, 2, Direction.UP, arrive_tick=8)
+    pending.add(3, 2, Direction.UP, arrive_tick=9)
+    # from floor 1 at tick 10: call 1 scores 4 - 5 = -1, call 2 scores 1 - 1 = 0
+    assert pending.best_for(1) == 1
+    assert pending.score(1, 1, tick=10) == -1.0
+    assert pending.oldest_at(2, Direction.UP) == 2
+    assert pending.discard(1) and not pending.discard(1)
+    assert pending.best_for(1) == 2
+    pending.discard(2)
+    assert pending.oldest_at(2, Direction.UP) == 3
+    assert list(pending) == [3] and pending.waiting_ticks(3, tick=12) == 3
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
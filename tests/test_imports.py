@@ -69,5 +69,39 @@ def test_import_client_example():
     assert ElevatorBusExampleController is not None
 
 
+def test_import_client_transport():
+    """Test importing client transports"""
+    from elevator_saga.client.transport import KeepAliveTransport, Transport, UrllibTransport
+
+    assert issubclass(KeepAliveTransport, Transport)
+    assert issubclass(UrllibTransport, Transport)
+
+
+def test_import_async_controller():
+    """Test importing asyncio client and controller"""
+    from elevator_saga.client.async_api_client import AsyncElevatorAPIClient
+    from elevator_saga.client.async_controller import AsyncElevatorController, run_concurrently
+
+    assert AsyncElevatorAPIClient is not None
+    assert AsyncElevatorController is not None
+    assert run_concurrently is not None
+
+
+def test_import_local_transports():
+    """Test importing Unix socket and shared-memory transports"""
+    from elevator_saga.client.transport import SharedMemoryTransport, UnixSocketTransport, create_transport
+
+    assert SharedMemoryTransport is not None
+    assert UnixSocketTransport is not None
+    assert create_transport is not None
+
+
+def test_import_instrumentation():
+    """Test importing controller instrumentation"""
+    from elevator_saga.client.instrumentation import ControllerProfiler
+
+    assert ControllerProfiler is not None
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
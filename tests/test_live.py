@@ -0,0 +1,119 @@
+"""
+Tests for the live frame broadcaster
+"""
+
+import pytest
+
+
+def test_live_broadcaster():
+    """Test that live subscribers get a full frame first and then shared per-tick deltas"""
+    import json
+
+    from elevator_saga.recording.codec import FrameDecoder
+    from elevator_saga.server.live import LiveBroadcaster
+
+    broadcaster = LiveBroadcaster()
+    broadcaster.begin_scenario({"scenario_name": "demo", "max_tick": 3})
+    stream = broadcaster.subscribe()
+    assert b"event: scenario" in next(stream)
+    assert broadcaster.active
+
+    decoder = FrameDecoder()
+    for tick in range(3):
+        broadcaster.publish({"tick": tick, "elevators": [{"id": 0, "floor": tick}]})
+        chunk = next(stream).decode("utf-8")
+        for message in chunk.strip().split("\n\n"):
+            frame = decoder.decode(json.loads(message.split("data: ", 1)[1]))
+        assert frame == {"tick": tick, "elevators": [{"id": 0, "floor": tick}]}
+
+    stream.close()
+    assert not broadcaster.active
+
+
+def test_live_broadcaster_dropped_frames():
+    """Test that events of frames dropped on a full queue reach the passenger table through the next frame"""
+    import json
+    import threading
+    import time
+
+    from elevator_saga.server.live import LiveBroadcaster
+
+    def frame(tick):
+        data = {"passenger": tick + 1, "floor": 0, "destination": 3}
+        return {"tick": tick, "elevators": [], "events": [{"tick": tick, "type": "up_button_pressed", "data": data}]}
+
+    broadcaster = LiveBroadcaster(queue_size=1)
+    broadcaster.begin_scenario({"scenario_name": "demo", "max_tick": 5})
+    broadcaster._thread = threading.current_thread()  # hold the encoder back so the queue stays full
+    for tick in range(4):
+        broadcaster.publish(frame(tick))
+    assert broadcaster.dropped_frames == 3
+
+    broadcaster._thread = None
+    broadcaster.start()
+    while not broadcaster._queue.empty():
+        time.sleep(0.001)
+    broadcaster.publish(frame(4))
+    while broadcaster._sequence < 2:
+        time.sleep(0.001)
+
+    stream = broadcaster.subscribe()
+    messages = next(stream).decode("utf-8").strip().split("\n\n")
+    table = next(json.loads(m.split("data: ", 1)[1]) for m in messages if m.startswith("event: passengers"))
+    assert sorted(row[0] for row in table["rows"]) == [1, 2, 3, 4, 5]
+    assert sorted(row[3] for row in table["rows"]) == [0, 1, 2, 3, 4]
+    stream.close()
+
+
+def test_live_frame_on_connect(monkeypatch):
+    """Test that a connecting viewer only triggers a frame when the live stream is behind the simulation"""
+    from pathlib import Path
+
+    import elevator_saga
+    from elevator_saga.server.simulator import ElevatorSimulation
+
+    simulation = ElevatorSimulation(str(Path(elevator_saga.__file__).parent / "traffic"))
+    published = []
+    publish = simulation.live.publish
+    monkeypatch.setattr(simulation.live, "publish", lambda frame: (published.append(frame["tick"]), publish(frame)))
+
+    simulation.publish_live_frame()
+    simulation.publish_live_frame()
+    assert published == [0]
+    simulation.step(3)  # no subscribers, so no frames are built
+    simulation.publish_live_frame()
+    simulation.publish_live_frame()
+    assert published == [0, 3]
+
+
+def test_live_passengers_seeded_on_connect():
+    """Test that a viewer connecting mid-scenario gets rows for passengers that arrived before any frame was built"""
+    import json
+    import time
+    from pathlib import Path
+
+    import elevator_saga
+    from elevator_saga.server.simulator import ElevatorSimulation
+
+    simulation = ElevatorSimulation(str(Path(elevator_saga.__file__).parent / "traffic"))
+    simulation.step(30)
+    assert len(simulation.passengers) > 0
+
+    first = simulation.live.subscribe()
+    next(first)
+    simulation.publish_live_frame()
+    # the passenger rows and the frame are encoded in order; wait for both before the next viewer connects
+    deadline = time.monotonic() + 2
+    while simulation.live._sequence < 2 and time.monotonic() < deadline:
+        time.sleep(0.001)
+
+    second = simulation.live.subscribe()
+    messages = next(second).decode("utf-8").strip().split("\n\n")
+    table = next(json.loads(m.split("data: ", 1)[1]) for m in messages if m.startswith("event: passengers"))
+    first.close()
+    second.close()
+    assert sorted(row[0] for row in table["rows"]) == sorted(simulation.passengers)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,75 @@
+"""
+Tests for core models and the columnar passenger table
+"""
+
+import pytest
+
+
+def test_slotted_models():
+    """Test that the high-volume models are slotted and still round-trip through dicts"""
+    from elevator_saga.client.proxy_models import ProxyPassenger
+    from elevator_saga.core.models import Direction, ElevatorState, ElevatorStatus, PassengerInfo, TrafficEntry
+
+    assert not hasattr(PassengerInfo(1, 0, 3, 5), "__dict__")
+    assert not hasattr(TrafficEntry(1, 0, 3, 5), "__dict__")
+
+    elevator = ElevatorState.from_dict(
+        {"id": 0, "position": {"current_floor": 2}, "run_status": "constant_speed", "last_tick_direction": "up"}
+    )
+    assert elevator.run_status is ElevatorStatus.CONSTANT_SPEED
+    assert elevator.last_tick_direction is Direction.UP
+    assert ElevatorState.from_dict(elevator.to_dict()).to_dict() == elevator.to_dict()
+
+    proxy = ProxyPassenger(1, None)  # type: ignore[arg-type]
+    assert proxy == ProxyPassenger(1, None)  # type: ignore[arg-type]
+
+
+def test_passenger_table_store():
+    """Test that the columnar passenger table behaves like the passenger dict it replaces"""
+    from elevator_saga.core.models import (
+        PassengerInfo,
+        PassengerStatus,
+        PassengerTable,
+        SimulationState,
+        compute_performance_metrics,
+    )
+
+    state = SimulationState(tick=0, elevators=[], floors=[])
+    assert isinstance(state.passengers, PassengerTable)
+    passengers = [PassengerInfo(i, i % 3, 4, i) for i in range(1, 6)]
+    for passenger in passengers:
+        state.passengers[passenger.id] = passenger
+
+    record = state.passengers[2]
+    record.pickup_tick, record.elevator_id = 7, 1
+    passengers[1].pickup_tick, passengers[1].elevator_id = 7, 1
+    record = state.passengers[3]
+    record.pickup_tick, record.dropoff_tick, record.arrived = 4, 9, True
+    passengers[2].pickup_tick, passengers[2].dropoff_tick, passengers[2].arrived = 4, 9, True
+
+    assert [p.id for p in state.get_passengers_by_status(PassengerStatus.IN_ELEVATOR)] == [2]
+    assert [p.id for p in state.get_passengers_by_status(PassengerStatus.WAITING)] == [1, 4, 5]
+    assert state.performance_metrics() == compute_performance_metrics(passengers)
+    assert state.passengers.to_dict() == {p.id: p.to_dict() for p in passengers}
+
+    state.passengers.complete_remaining(20)
+    assert state.passengers[1].dropoff_tick == 20 and state.passengers[3].dropoff_tick == 9
+    with pytest.raises(KeyError):
+        state.passengers[9] = PassengerInfo(9, 0, 1, 0)
+    with pytest.raises(AttributeError):
+        state.passengers[1].id = 4
+
+    assert state.passengers.popitem() == (5, PassengerInfo(5, 2, 4, 5, pickup_tick=20, dropoff_tick=20))
+    with pytest.raises(KeyError):
+        del state.passengers[2]
+    assert state.passengers.pop(2, None) is None and 2 in state.passengers
+    del state.passengers[4]
+    assert list(state.passengers) == [1, 2, 3]
+    state.passengers[4] = passengers[3]
+    assert state.passengers[4].to_dict() == passengers[3].to_dict()
+    state.passengers.clear()
+    assert len(state.passengers) == 0 and 1 not in state.passengers
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
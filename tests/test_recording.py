@@ -0,0 +1,179 @@
+"""
+Tests for recording, frame encoding and replay indexes
+"""
+
+import pytest
+
+
+def test_recording_writer(tmp_path):
+    """Test streaming recording round trip"""
+    from elevator_saga.recording.writer import RecordingWriter, export_combined, iter_frames, read_manifest
+
+    with RecordingWriter(tmp_path / "run") as writer:
+        writer.begin_scenario("demo", max_tick=2)
+        writer.write_frame({"tick": 0})
+        writer.write_frame({"tick": 1})
+        writer.end_scenario(final_metrics={"completed_passengers": 1})
+
+    manifest = read_manifest(tmp_path / "run")
+    scenario = manifest["scenarios"][0]
+    assert scenario["complete"] and scenario["total_frames"] == 2 and scenario["max_tick"] == 2
+    assert [frame["tick"] for frame in iter_frames(tmp_path / "run", scenario)] == [0, 1]
+    assert export_combined(tmp_path / "run", tmp_path / "combined.json") == 2
+
+
+def test_frame_codec():
+    """Test keyframe + delta encoding round trip and random access"""
+    from elevator_saga.recording.codec import FrameDecoder, FrameEncoder, FrameSequence
+
+    frames = [
+        {
+            "tick": tick,
+            "elevators": [{"id": 0, "floor_up_position": tick % 10, "status": "moving"}],
+            "passengers": {str(pid): {"id": pid, "status": "waiting"} for pid in range(tick)},
+            "metrics": {"completed": tick // 2},
+            "events": [{"tick": tick, "type": "elevator_move", "data": {"elevator": 0}}] if tick % 2 else [],
+        }
+        for tick in range(12)
+    ]
+    encoder = FrameEncoder(keyframe_interval=5)
+    records = [encoder.encode(frame) for frame in frames]
+    assert [index for index, record in enumerate(records) if "key" in record] == [0, 5, 10]
+    assert records[1]["items"]["elevators"] == [[0, 1, 1]]
+
+    decoder = FrameDecoder()
+    assert [decoder.decode(record) for record in records] == frames
+    sequence = FrameSequence(records)
+    assert [sequence[index] for index in (7, 3, 11, 0, 8)] == [frames[index] for index in (7, 3, 11, 0, 8)]
+
+
+def test_server_recorder(tmp_path):
+    """Test recording inside the simulator without client state fetches"""
+    from pathlib import Path
+
+    import elevator_saga
+    from elevator_saga.recording.writer import iter_frames, read_manifest
+    from elevator_saga.server.simulator import ElevatorSimulation
+
+    simulation = ElevatorSimulation(str(Path(elevator_saga.__file__).parent / "traffic"))
+    simulation.recordings_dir = tmp_path
+    simulation.start_recording("run")
+    simulation.step(3)
+    status = simulation.stop_recording()
+    assert status["scenarios"] == 1 and status["frames"] == 4
+
+    scenario = read_manifest(tmp_path / "run")["scenarios"][0]
+    assert scenario["complete"] and "final_metrics" in scenario
+    assert [frame["tick"] for frame in iter_frames(tmp_path / "run", scenario)] == [0, 1, 2, 3]
+
+
+def test_frame_index(tmp_path):
+    """Test seeking into a recording through its frame index"""
+    from elevator_saga.recording.index import build_index, load_index, read_frame_range
+    from elevator_saga.recording.replay import ReplayStore
+    from elevator_saga.recording.writer import RecordingWriter, iter_frames, read_manifest
+
+    with RecordingWriter(tmp_path / "run", keyframe_interval=4) as writer:
+        writer.begin_scenario("demo")
+        for tick in range(10):
+            writer.write_frame({"tick": tick, "metrics": {"completed": tick // 3}})
+
+    scenario = read_manifest(tmp_path / "run")["scenarios"][0]
+    index = load_index(tmp_path / "run", scenario)
+    assert index.frames == 10 and len(index.offsets) == 3
+    assert index.to_dict() == build_index(tmp_path / "run" / scenario["file"], 4).to_dict()
+    frames = list(iter_frames(tmp_path / "run", scenario))
+    assert read_frame_range(tmp_path / "run", scenario, 5, 3) == frames[5:8]
+    assert read_frame_range(tmp_path / "run", scenario, 9, 5) == frames[9:]
+
+    store = ReplayStore(tmp_path)
+    assert store.frames("run", 0, 6, 2)["frames"] == frames[6:8]
+    with pytest.raises(ValueError):
+        store.manifest("../run")
+    with pytest.raises(LookupError):
+        store.index("run", 1)
+
+
+def test_lod_track(tmp_path):
+    """Test coarse level-of-detail tracks written next to the frames"""
+    from elevator_saga.recording.writer import RecordingWriter, load_lod, read_manifest
+
+    with RecordingWriter(tmp_path / "run", keyframe_interval=5, lod_stride=2) as writer:
+        writer.begin_scenario("demo")
+        for tick in range(23):
+            writer.write_frame({"tick": tick, "passengers": {"1": {}}, "metrics": {"completed_passengers": tick}})
+
+    scenario = read_manifest(tmp_path / "run")["scenarios"][0]
+    lod = load_lod(tmp_path / "run", scenario)
+    assert [frame["tick"] for frame in lod["frames"]] == [0, 10, 20]
+    assert all(frame["passengers"] == {} for frame in lod["frames"])
+    assert lod["series"]["tick"] == [0, 10, 20, 22]
+    assert lod["series"]["completed_passengers"] == [0, 10, 20, 22]
+
+
+def test_passenger_table(tmp_path):
+    """Test that recordings keep one lifecycle row per passenger built from the frame events"""
+    from elevator_saga.recording.passengers import passenger_records
+    from elevator_saga.recording.writer import RecordingWriter, load_passengers, read_manifest
+
+    events = {
+        1: [{"tick": 1, "type": "up_button_pressed", "data": {"floor": 0, "passenger": 7, "destination": 3}}],
+        4: [{"tick": 4, "type": "passenger_board", "data": {"elevator": 1, "floor": 0, "passenger": 7}}],
+        9: [{"tick": 9, "type": "passenger_alight", "data": {"elevator": 1, "floor": 3, "passenger": 7}}],
+    }
+    with RecordingWriter(tmp_path / "run", keyframe_interval=5) as writer:
+        writer.begin_scenario("demo")
+        for tick in range(12):
+            writer.write_frame({"tick": tick, "elevators": [], "events": events.get(tick, [])})
+
+    scenario = read_manifest(tmp_path / "run")["scenarios"][0]
+    assert scenario["passengers"].endswith(".passengers.json")
+    records = passenger_records(load_passengers(tmp_path / "run", scenario))
+    assert records == {
+        7: {"id": 7, "origin": 0, "destination": 3, "arrive": 1, "pickup": 4, "dropoff": 9, "elevator": 1}
+    }
+
+
+def test_recording_started_mid_scenario(tmp_path):
+    """Test that a recording started mid-scenario has a lifecycle row for every passenger its frames reference"""
+    from pathlib import Path
+
+    import elevator_saga
+    from elevator_saga.recording.passengers import passenger_records
+    from elevator_saga.recording.writer import iter_frames, load_passengers, read_manifest
+    from elevator_saga.server.simulator import ElevatorSimulation
+
+    simulation = ElevatorSimulation(str(Path(elevator_saga.__file__).parent / "traffic"))
+    simulation.recordings_dir = tmp_path
+    simulation.step(60)
+    simulation.start_recording("mid")
+    simulation.step(40)
+    simulation.stop_recording()
+
+    scenario = read_manifest(tmp_path / "mid")["scenarios"][0]
+    records = passenger_records(load_passengers(tmp_path / "mid", scenario))
+    referenced = set()
+    for frame in iter_frames(tmp_path / "mid", scenario):
+        for elevator in frame["elevators"]:
+            referenced.update(elevator["passengers"])
+        for floor in frame["floors"]:
+            referenced.update(floor["up_queue"] + floor["down_queue"])
+        referenced.update(e["data"]["passenger"] for e in frame["events"] if "passenger" in e["data"])
+    assert referenced and referenced <= set(records)
+    assert set(records) == set(simulation.passengers)
+    for passenger_id, passenger in simulation.passengers.items():
+        record = records[passenger_id]
+        assert (record["origin"], record["arrive"]) == (passenger.origin, passenger.arrive_tick)
+
+    # passengers force-completed at max_duration_ticks get their dropoff without an alight event
+    simulation.start_recording("end")
+    simulation.step(simulation.max_duration_ticks - simulation.tick)
+    simulation.stop_recording()
+    scenario = read_manifest(tmp_path / "end")["scenarios"][0]
+    records = passenger_records(load_passengers(tmp_path / "end", scenario))
+    assert len(records) == len(simulation.passengers)
+    assert all(record["dropoff"] is not None for record in records.values())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
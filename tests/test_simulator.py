@@ -0,0 +1,72 @@
+"""
+Tests for the simulation server
+"""
+
+import pytest
+
+
+def _simulation():
+    from pathlib import Path
+
+    import elevator_saga
+    from elevator_saga.server.simulator import ElevatorSimulation
+
+    return ElevatorSimulation(str(Path(elevator_saga.__file__).parent / "traffic"))
+
+
+def test_next_passenger_id_follows_arrivals():
+    """Test that next_passenger_id tracks the ids handed out by the traffic stream"""
+    simulation = _simulation()
+    assert simulation.next_passenger_id == 1
+    simulation.step(30)
+    assert len(simulation.passengers) > 0
+    assert simulation.next_passenger_id == len(simulation.passengers) + 1
+    simulation.reset()
+    assert simulation.next_passenger_id == 1
+
+
+def test_load_traffic_mid_scenario(tmp_path):
+    """Test that traffic loaded mid-scenario gets fresh dense ids whatever ids the file asks for"""
+    import json
+
+    simulation = _simulation()
+    simulation.step(30)
+    existing = {pid: p.to_dict() for pid, p in simulation.passengers.items()}
+    count = len(existing)
+
+    traffic_file = tmp_path / "extra.json"
+    traffic_file.write_text(
+        json.dumps(
+            [
+                {"id": 500, "origin": 1, "destination": 2, "tick": 33},
+                {"origin": 0, "destination": 3, "tick": 31},
+            ]
+        )
+    )
+    simulation.load_traffic(str(traffic_file))
+    simulation.step(5)
+
+    assert {pid: simulation.passengers[pid].to_dict() for pid in existing} == existing
+    assert len(simulation.passengers) == count + 2
+    first, second = simulation.passengers[count + 1], simulation.passengers[count + 2]
+    assert (first.origin, first.arrive_tick) == (0, 31) and (second.origin, second.arrive_tick) == (1, 33)
+    assert simulation.next_passenger_id == count + 3
+
+
+def test_go_to_floor_waits_for_step_lock():
+    """Test that a command is applied under the simulation lock, never in the middle of a step"""
+    import threading
+
+    simulation = _simulation()
+    elevator = simulation.elevators[0]
+    with simulation.lock:
+        command = threading.Thread(target=simulation.elevator_go_to_floor, args=(0, 2))
+        command.start()
+        command.join(0.05)
+        assert command.is_alive() and elevator.next_target_floor is None
+    command.join()
+    assert elevator.next_target_floor == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
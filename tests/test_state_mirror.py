@@ -0,0 +1,90 @@
+"""
+Tests for the client-side state mirror
+"""
+
+import pytest
+
+
+def _mirrored_clients(monkeypatch):
+    """A simulation behind the Flask test client, with a mirroring and a fetching API client"""
+    from pathlib import Path
+
+    import elevator_saga
+    from elevator_saga.client.api_client import ElevatorAPIClient
+    from elevator_saga.client.transport import Transport
+    from elevator_saga.server import simulator
+
+    class FlaskTransport(Transport):
+        def __init__(self, client):
+            self.client = client
+
+        def request(self, method, endpoint, data=None, timeout=None):
+            return self.client.open(endpoint, method=method, json=data).get_json()
+
+    simulation = simulator.ElevatorSimulation(str(Path(elevator_saga.__file__).parent / "traffic"))
+    monkeypatch.setattr(simulator, "simulation", simulation)
+    transport = FlaskTransport(simulator.app.test_client())
+    mirrored = ElevatorAPIClient("http://127.0.0.1:1", transport=transport, mirror_state=True)
+    fetched = ElevatorAPIClient("http://127.0.0.1:1", transport=transport)
+    mirrored.get_traffic_info()
+    mirrored.get_state()
+    return simulation, mirrored, fetched
+
+
+def test_state_mirror_tracks_server(monkeypatch):
+    """Test that the event-sourced mirror matches /api/state and the step checksums after every step"""
+    import random
+
+    simulation, mirrored, fetched = _mirrored_clients(monkeypatch)
+    rng = random.Random(3)
+    floors = len(simulation.floors)
+    for tick in range(1, 151):
+        if tick % 4 == 1:
+            for elevator in simulation.elevators:
+                mirrored.go_to_floor(elevator.id, rng.randrange(floors), immediate=rng.random() < 0.3)
+        mirrored.step(1)
+        mirror, server = mirrored.get_state(), fetched.get_state(force_reload=True)
+        assert [e.to_dict() for e in mirror.elevators] == [e.to_dict() for e in server.elevators], tick
+        assert [f.to_dict() for f in mirror.floors] == [f.to_dict() for f in server.floors], tick
+        assert {k: p.to_dict() for k, p in mirror.passengers.items()} == {
+            k: p.to_dict() for k, p in server.passengers.items()
+        }, tick
+    assert mirrored.mirror.mismatches == 0 and mirrored.mirror.resyncs == 1
+
+
+def test_checksum_covers_passenger_fields(monkeypatch):
+    """Test that the checksum matches across passenger storages and catches a diverged passenger field"""
+    from elevator_saga.core.models import Direction, SimulationState, compute_state_checksum
+
+    simulation, mirrored, _ = _mirrored_clients(monkeypatch)
+    while not simulation.passengers:
+        mirrored.step(1)
+    passenger = next(iter(simulation.passengers.values()))
+    elevator = simulation.elevators[0]
+    mirrored.go_to_floor(elevator.id, passenger.origin)
+    while elevator.current_floor != passenger.origin or elevator.target_floor_direction != Direction.STOPPED:
+        mirrored.step(1)
+    mirrored.go_to_floor(elevator.id, passenger.destination)
+    while not passenger.pickup_tick:
+        mirrored.step(1)
+    assert simulation.tick < simulation.max_duration_ticks
+    assert mirrored.mirror.mismatches == 0
+
+    state = simulation.state
+    as_dict = SimulationState(
+        tick=state.tick,
+        elevators=state.elevators,
+        floors=state.floors,
+        passengers={pid: p for pid, p in mirrored.get_state().passengers.items()},
+    )
+    assert compute_state_checksum(as_dict) == compute_state_checksum(state)
+
+    boarded = next(p for p in mirrored.get_state().passengers.values() if p.pickup_tick)
+    boarded.pickup_tick += 1
+    assert compute_state_checksum(as_dict) != compute_state_checksum(state)
+    mirrored.step(1)
+    assert mirrored.mirror.mismatches == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,135 @@
+"""
+Tests for traffic files, generators and the scenario cache
+"""
+
+import pytest
+
+
+def test_jsonl_traffic_matches_json(tmp_path):
+    """Test that .json and converted .jsonl files stream the same entries and only one format is scheduled"""
+    import json
+
+    from elevator_saga.traffic.loader import convert_json_to_jsonl, find_traffic_files, open_traffic_stream
+
+    source = tmp_path / "scenario.json"
+    traffic = [{"origin": 0, "destination": 3, "tick": 4}, {"origin": 2, "destination": 0, "tick": 1}]
+    source.write_text(json.dumps({"building": {"floors": 4, "elevators": 1}, "traffic": traffic}))
+    convert_json_to_jsonl(source, source.with_suffix(".jsonl"))
+
+    building, json_stream = open_traffic_stream(source)
+    jsonl_building, jsonl_stream = open_traffic_stream(source.with_suffix(".jsonl"))
+    assert jsonl_building == building
+    assert jsonl_stream.pop_due(10) == json_stream.pop_due(10)
+    assert find_traffic_files(tmp_path) == [source.with_suffix(".jsonl")]
+
+
+def test_binary_traffic_round_trip(tmp_path):
+    """Test that a .json file converted to .etb yields the same entries and converts back losslessly"""
+    import json
+
+    from elevator_saga.traffic.binary import (
+        convert_binary_to_json,
+        convert_json_to_binary,
+        iter_binary_traffic,
+        load_binary_traffic,
+    )
+    from elevator_saga.traffic.loader import iter_json_traffic
+
+    source = tmp_path / "scenario.json"
+    traffic = [{"id": i, "origin": i % 5, "destination": (i + 2) % 5, "tick": (i * 7) % 11} for i in range(1, 5001)]
+    building = {"floors": 5, "elevators": 2}
+    source.write_text(json.dumps({"building": building, "traffic": traffic}))
+
+    assert convert_json_to_binary(source, tmp_path / "scenario.etb") == len(traffic)
+    binary = load_binary_traffic(tmp_path / "scenario.etb")
+    assert binary.building == building
+    assert list(iter_binary_traffic(binary)) == list(iter_json_traffic(traffic))
+
+    convert_binary_to_json(tmp_path / "scenario.etb", tmp_path / "back.json")
+    back = json.loads((tmp_path / "back.json").read_text())
+    assert back["building"] == building
+    assert back["traffic"] == sorted(traffic, key=lambda t: t["tick"])
+
+
+def test_scenario_cache(tmp_path):
+    """Test cache hits, invalidation on content change and LRU eviction by compiled size"""
+    import json
+
+    from elevator_saga.traffic.cache import ScenarioCache
+
+    def write(name, passengers, start=0):
+        building = {"floors": 4, "elevators": 1, "elevator_capacity": 8, "duration": 100}
+        traffic = [{"origin": 0, "destination": 1 + i % 3, "tick": start + i} for i in range(passengers)]
+        path = tmp_path / name
+        path.write_text(json.dumps({"building": building, "traffic": traffic}))
+        return path
+
+    cache = ScenarioCache()
+    a = write("a.json", 10)
+    first = cache.get(a)
+    assert cache.get(a) is first and (cache.hits, cache.misses) == (1, 1)
+    assert cache.get(write("copy.json", 10)) is first and cache.misses == 1
+
+    write("a.json", 11)
+    changed = cache.get(a)
+    assert changed is not first and len(changed) == 11 and cache.misses == 2
+
+    # 每个乘客12字节，上限只能容纳两个10人场景
+    cache = ScenarioCache(max_bytes=240)
+    b, c = write("b.json", 10, start=1), write("c.json", 10, start=2)
+    write("a.json", 10)
+    for path in (a, b, a, c):
+        cache.get(path)
+    assert len(cache) == 2 and cache.total_bytes == 240
+    misses = cache.misses
+    cache.get(a)
+    assert cache.misses == misses
+    cache.get(b)
+    assert cache.misses == misses + 1
+
+
+def test_traffic_generators():
+    """Test that every generator is reproducible per seed and yields sorted, in-range Poisson arrivals"""
+    import inspect
+
+    from elevator_saga.traffic.generators import TRAFFIC_SCENARIOS
+
+    settings = {"floors": 6, "duration": 200, "max_people": 80}
+    for name, config in TRAFFIC_SCENARIOS.items():
+        generator = config["generator"]
+        kwargs = {k: v for k, v in settings.items() if k in inspect.signature(generator).parameters}
+        traffic = generator(seed=7, **kwargs)
+        assert traffic and len(traffic) <= 80, name
+        assert generator(seed=7, **kwargs) == traffic, name
+
+        ticks = [t["tick"] for t in traffic]
+        assert ticks == sorted(ticks) and 0 <= ticks[0] and ticks[-1] < 200, name
+        assert [t["id"] for t in traffic] == list(range(1, len(traffic) + 1)), name
+        for t in traffic:
+            assert t["origin"] != t["destination"], name
+            assert 0 <= t["origin"] < 6 and 0 <= t["destination"] < 6, name
+
+    generator = TRAFFIC_SCENARIOS["random"]["generator"]
+    assert generator(seed=1, **settings) != generator(seed=2, **settings)
+
+
+def test_parallel_traffic_generation(tmp_path):
+    """Test stable per-scenario seeds and that the process pool writes the same files as the serial path"""
+    import zlib
+
+    from elevator_saga.traffic.generators import TRAFFIC_SCENARIOS, generate_scaled_traffic_files, scenario_seed
+
+    seeds = [scenario_seed(42, name) for name in TRAFFIC_SCENARIOS]
+    assert len(set(seeds)) == len(seeds)
+    assert scenario_seed(42, "up_peak") == 42 + zlib.crc32(b"up_peak") % 1000
+
+    generate_scaled_traffic_files(str(tmp_path / "serial"), scale="small", seed=3)
+    generate_scaled_traffic_files(str(tmp_path / "parallel"), scale="small", seed=3, workers=2)
+    serial = sorted(path.name for path in (tmp_path / "serial").iterdir())
+    assert serial and serial == sorted(path.name for path in (tmp_path / "parallel").iterdir())
+    for name in serial:
+        assert (tmp_path / "serial" / name).read_bytes() == (tmp_path / "parallel" / name).read_bytes()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
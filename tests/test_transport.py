@@ -0,0 +1,138 @@
+"""
+Tests for client transports and the shared-memory state channel
+"""
+
+import pytest
+
+
+def test_keepalive_transport():
+    """Test connection reuse and that a POST is not resent once it may have reached the server"""
+    import http.client
+    import json
+    import threading
+
+    from werkzeug.serving import make_server
+
+    from elevator_saga.client.transport import KeepAliveTransport
+    from elevator_saga.server.keepalive import KeepAliveRequestHandler
+
+    calls = {"GET": 0, "POST": 0}
+
+    def app(environ, start_response):
+        calls[environ["REQUEST_METHOD"]] += 1
+        body = json.dumps(calls).encode("utf-8")
+        start_response("200 OK", [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+        return [body]
+
+    class LostResponse(http.client.HTTPConnection):
+        """Writes the request, then fails as if the server closed the connection before answering"""
+
+        def getresponse(self):
+            raise http.client.RemoteDisconnected("Remote end closed connection without response")
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=KeepAliveRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    transport = KeepAliveTransport(f"http://127.0.0.1:{server.server_port}")
+    try:
+        for _ in range(3):
+            transport.request("GET", "/api/state")
+        assert transport.request("POST", "/api/step", {"ticks": 1}) == {"GET": 3, "POST": 1}
+        assert transport.connections_opened == 1
+
+        for method in ("POST", "GET"):
+            lost = LostResponse("127.0.0.1", server.server_port)
+            lost.connect()
+            transport._idle.put_nowait(lost)
+            if method == "POST":
+                with pytest.raises(RuntimeError):
+                    transport.request("POST", "/api/step", {"ticks": 1})
+            else:
+                transport.request("GET", "/api/state")
+        assert calls == {"GET": 5, "POST": 2}
+    finally:
+        transport.close()
+        server.shutdown()
+
+
+def test_pipelined_connection():
+    """Test that pipelined requests on one connection resolve in the order they were sent"""
+    import asyncio
+    import json
+    import threading
+
+    from werkzeug.serving import make_server
+
+    from elevator_saga.client.async_api_client import PipelinedHTTPConnection
+    from elevator_saga.server.keepalive import KeepAliveRequestHandler
+
+    seen = []
+
+    def app(environ, start_response):
+        seen.append(environ["PATH_INFO"])
+        body = json.dumps({"path": environ["PATH_INFO"], "count": len(seen)}).encode("utf-8")
+        start_response("200 OK", [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+        return [body]
+
+    async def scenario():
+        connection = PipelinedHTTPConnection("127.0.0.1", server.server_port)
+        await connection.connect()
+        try:
+            futures = [connection.send("POST", f"/api/step/{i}", {"ticks": 1}) for i in range(5)]
+            futures.append(connection.send("GET", "/api/state"))
+            return await asyncio.gather(*futures), connection.connections_opened
+        finally:
+            await connection.close()
+
+    server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=KeepAliveRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        responses, opened = asyncio.run(scenario())
+    finally:
+        server.shutdown()
+    assert [r["path"] for r in responses] == [f"/api/step/{i}" for i in range(5)] + ["/api/state"]
+    assert [r["count"] for r in responses] == list(range(1, 7))
+    assert opened == 1
+
+
+def test_shared_state_round_trip():
+    """Test that SharedStateReader reproduces the server state while the writer grows its segment"""
+    import os
+    import random
+    from pathlib import Path
+
+    import elevator_saga
+    from elevator_saga.core.shared_state import SharedStateReader, SharedStateWriter
+    from elevator_saga.server.simulator import ElevatorSimulation
+
+    simulation = ElevatorSimulation(str(Path(elevator_saga.__file__).parent / "traffic"))
+    # start at capacity 1 so growing passengers and queues must recreate the segment
+    simulation.shared_state = writer = SharedStateWriter(
+        f"es_test_{os.getpid()}", queue_capacity=1, passenger_capacity=1
+    )
+    with simulation.lock:
+        simulation._publish_shared_state()
+    reader = SharedStateReader(writer.name)
+    try:
+        rng = random.Random(5)
+        floors = len(simulation.floors)
+        for tick in range(1, 121):
+            if tick % 5 == 1:
+                for elevator in simulation.elevators:
+                    simulation.elevator_go_to_floor(elevator.id, rng.randrange(floors), rng.random() < 0.3)
+            simulation.step(1)
+            shared, server = reader.read_state(), simulation.state
+            assert shared.tick == server.tick
+            assert [e.to_dict() for e in shared.elevators] == [e.to_dict() for e in server.elevators], tick
+            assert [f.to_dict() for f in shared.floors] == [f.to_dict() for f in server.floors], tick
+            assert {k: p.to_dict() for k, p in shared.passengers.items()} == {
+                k: p.to_dict() for k, p in server.passengers.items()
+            }, tick
+        assert len(server.passengers) > 1
+        assert reader.views.passengers.shape[0] >= len(server.passengers) > 1
+    finally:
+        reader.close()
+        writer.close()
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])